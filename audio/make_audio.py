@@ -3,19 +3,34 @@
 # dependencies = [
 # "google-cloud-texttospeech",
 # "scipy",
-# "librosa"
+# "numpy",
+# "soundfile"
 # ]
 # ///
 
+import sys
 import time
 from google.cloud import texttospeech
 from pathlib import Path
 from scipy.io import wavfile
-import librosa
+
+# Shared helpers live at the repository root
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from audio_trim import split_on_silence
 
 OUTPUT_DIR = "generated_audio"  # For synthesized files
 TRIMMED_OUTPUT_DIR = "trimmed_audio"  # For trimmed files
 
+_client = None
+
+
+def get_tts_client():
+    """Return the shared TextToSpeechClient, creating it on first use."""
+    global _client
+    if _client is None:
+        _client = texttospeech.TextToSpeechClient()
+    return _client
+
 
 def synthesize_raw_audio(
     bangla,
@@ -26,7 +41,7 @@ def synthesize_raw_audio(
     effects_profile_id="headphone-class-device",
 ):
     """Synthesizes speech from Google TTS and saves the raw audio file."""
-    client = texttospeech.TextToSpeechClient()
+    client = get_tts_client()
 
     input_text = texttospeech.SynthesisInput(ssml=bangla)
 
@@ -119,7 +134,7 @@ if __name__ == "__main__":
 
         sf.write("out.wav", samples, sample_rate)
 
-        splits = librosa.effects.split(samples, top_db=40)
+        splits = split_on_silence(samples, top_db=40)
 
         try:
             assert splits.shape[0] == 2
@@ -0,0 +1,219 @@
+"""
+Columnar cache of per-file features shared by the audio tools.
+
+make_tree_audio.py (validation), clean_small_audio.py (anomaly features) and
+generate_audio_manifest.py (duration, sample rate and hash) all derive values
+from the same recordings. This cache keeps them in one NumPy .npz file with a
+column per feature, keyed by path and stamped with the file's size and mtime,
+so each tool only reads the files that changed since any of them last looked,
+and corpus-wide analyses load every row in a single read.
+
+Features a tool did not compute are NaN (or "" for the hash). Updating a row
+whose file is unchanged keeps the features other tools already stored.
+"""
+
+import os
+import threading
+from pathlib import Path
+
+DEFAULT_FEATURE_CACHE_PATH = Path(".audio_features.npz")
+
+# Float features, NaN when unknown
+FEATURE_COLUMNS = (
+    "duration",
+    "sample_rate",
+    "rms",
+    "peak",
+    "clipped_fraction",
+    "leading_silence",
+    "trailing_silence",
+    "segments",
+    "longest_gap",
+    "centroid_mean",
+    "centroid_std",
+)
+
+# Bumped when a feature's definition changes, so old values are recomputed
+FEATURE_CACHE_VERSION = 1
+
+
+def feature_key(path):
+    """Normalize ``path`` into the key used by the cache (paths are relative to the project root)."""
+    return os.path.normpath(str(path))
+
+
+class AudioFeatureCache:
+    """
+    Thread-safe per-file feature store backed by a columnar .npz file.
+
+    Changes are kept in memory until save() is called.
+
+    Args:
+        cache_path: Location of the .npz file, or None for an in-memory cache
+            that is never saved
+    """
+
+    def __init__(self, cache_path=DEFAULT_FEATURE_CACHE_PATH):
+        self.cache_path = Path(cache_path) if cache_path is not None else None
+        self._lock = threading.Lock()
+        self._columns = self._load()
+        self._pending = {}  # key -> row dict, newer than self._columns
+        self._dirty = False
+        self._reindex()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._index.keys() | self._pending.keys())
+
+    def _load(self):
+        import numpy as np
+
+        if self.cache_path is None:
+            return _empty_columns()
+        try:
+            with np.load(self.cache_path, allow_pickle=False) as data:
+                if int(data["version"]) == FEATURE_CACHE_VERSION:
+                    columns = {name: data[name] for name in _COLUMN_DTYPES}
+                    # Strings are stored as UTF-8 bytes, a quarter of the size of NumPy unicode
+                    for name in _STRING_COLUMNS:
+                        columns[name] = np.char.decode(columns[name], "utf-8")
+                    return columns
+        except (FileNotFoundError, ValueError, KeyError, OSError):
+            pass
+        return _empty_columns()
+
+    def get(self, path, size, mtime_ns):
+        """
+        Return the cached row for ``path`` as a dict, or None.
+
+        A row is only returned if it was stored for the same file size and
+        mtime. Unknown features are NaN (hash: "").
+        """
+        key = feature_key(path)
+        with self._lock:
+            row = self._pending.get(key)
+            if row is None:
+                index = self._index.get(key)
+                if index is not None:
+                    row = {name: values[index] for name, values in self._lists.items()}
+            if row is None or row["size"] != size or row["mtime_ns"] != mtime_ns:
+                return None
+            return dict(row)
+
+    def update(self, path, size, mtime_ns, **features):
+        """
+        Store ``features`` (column name -> value) for ``path``.
+
+        Other features of a row stored for the same size and mtime are kept; a
+        row for an older version of the file is replaced.
+        """
+        unknown = features.keys() - set(FEATURE_COLUMNS) - {"hash"}
+        if unknown:
+            raise ValueError(f"Unknown feature columns: {sorted(unknown)}")
+        key = feature_key(path)
+        current = self.get(path, size, mtime_ns)
+        with self._lock:
+            if current is None:
+                current = {"path": key, "size": size, "mtime_ns": mtime_ns, "hash": ""}
+                current.update({name: float("nan") for name in FEATURE_COLUMNS})
+            for name, value in features.items():
+                if value is None:
+                    value = "" if name == "hash" else float("nan")
+                current[name] = value
+            self._pending[key] = current
+
+    def columns(self, paths=None):
+        """
+        Return every row (or the rows for ``paths``) as a dict of column arrays.
+
+        Rows for ``paths`` that are not cached are left out; the "path" column
+        says which rows were returned.
+        """
+        with self._lock:
+            self._merge_pending()
+            if paths is None:
+                return {name: column.copy() for name, column in self._columns.items()}
+            rows = [self._index[key] for key in map(feature_key, paths) if key in self._index]
+            return {name: column[rows] for name, column in self._columns.items()}
+
+    def prune(self, keep_paths, root=None):
+        """
+        Drop rows whose path is not in ``keep_paths``, e.g. deleted or renamed files.
+
+        With ``root``, only rows below that directory are considered, so a tool
+        that scanned one language's tree leaves the other rows alone.
+
+        Returns:
+            Number of rows dropped
+        """
+        import numpy as np
+
+        keep = {feature_key(path) for path in keep_paths}
+        prefix = feature_key(root) + os.sep if root is not None else ""
+        with self._lock:
+            self._merge_pending()
+            paths = self._lists["path"]
+            mask = np.fromiter((key in keep or not key.startswith(prefix) for key in paths), bool, len(paths))
+            dropped = len(paths) - int(mask.sum())
+            if dropped:
+                self._columns = {name: column[mask] for name, column in self._columns.items()}
+                self._reindex()
+                self._dirty = True
+            return dropped
+
+    def save(self):
+        """Write the cache atomically (a no-op if nothing changed)."""
+        import numpy as np
+
+        if self.cache_path is None:
+            return
+        with self._lock:
+            if not self._pending and not self._dirty and self.cache_path.exists():
+                return
+            self._merge_pending()
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+            # np.savez appends .npz to names without it
+            tmp_path = self.cache_path.with_name(f".{self.cache_path.stem}.{os.getpid()}.tmp.npz")
+            try:
+                stored = dict(self._columns)
+                for name in _STRING_COLUMNS:
+                    stored[name] = np.char.encode(stored[name], "utf-8")
+                np.savez(tmp_path, version=np.array(FEATURE_CACHE_VERSION), **stored)
+                os.replace(tmp_path, self.cache_path)
+                self._dirty = False
+            except BaseException:
+                tmp_path.unlink(missing_ok=True)
+                raise
+
+    def _merge_pending(self):
+        """Fold pending rows into the column arrays. Caller holds the lock."""
+        import numpy as np
+
+        if not self._pending:
+            return
+        paths = self._lists["path"]
+        keep = np.fromiter((key not in self._pending for key in paths), bool, len(paths))
+        added = list(self._pending.values())
+        self._columns = {
+            name: np.concatenate([column[keep], np.array([row[name] for row in added], dtype=_COLUMN_DTYPES[name])])
+            for name, column in self._columns.items()
+        }
+        self._pending = {}
+        self._reindex()
+        self._dirty = True
+
+    def _reindex(self):
+        """Rebuild the path index and the list view used for row lookups."""
+        self._lists = {name: column.tolist() for name, column in self._columns.items()}
+        self._index = {key: row for row, key in enumerate(self._lists["path"])}
+
+
+_COLUMN_DTYPES = {"path": "U", "size": "int64", "mtime_ns": "int64", "hash": "U"}
+_COLUMN_DTYPES.update({name: "float64" for name in FEATURE_COLUMNS})
+_STRING_COLUMNS = ("path", "hash")
+
+
+def _empty_columns():
+    import numpy as np
+
+    return {name: np.array([], dtype=dtype) for name, dtype in _COLUMN_DTYPES.items()}
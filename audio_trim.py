@@ -0,0 +1,165 @@
+# /// script
+# requires-python = ">=3.12"
+# dependencies = [
+# "numpy",
+# "librosa"
+# ]
+# ///
+
+"""
+Vectorized silence detection for speech clips.
+
+split_on_silence follows the semantics of librosa.effects.split (framed RMS
+with centered, zero-padded frames, dB relative to ``ref``, ``top_db``,
+``frame_length`` and ``hop_length``), so it can replace it without pulling in
+librosa and numba at startup.
+
+Running this file checks parity with librosa on a synthetic corpus and
+reports throughput for both implementations.
+"""
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+# Same floor as librosa.amplitude_to_db (applied to power, so squared)
+_AMIN_POWER = 1e-10
+
+
+def frame_rms(y, frame_length=2048, hop_length=512):
+    """
+    Return the RMS of each centered frame of ``y``.
+
+    Args:
+        y: Samples, shape (n,) or (n, channels) as returned by soundfile
+        frame_length: Samples per analysis frame
+        hop_length: Samples between successive frames
+
+    Returns:
+        np.ndarray of shape (n_frames,) or (channels, n_frames)
+    """
+    y = np.asarray(y)
+    power = np.square(y, dtype=np.float32)
+    if power.ndim == 1:
+        power = power[np.newaxis, :]
+    else:
+        power = power.T
+
+    # Center the frames on hop boundaries, padding with silence like librosa
+    pad = frame_length // 2
+    power = np.pad(power, ((0, 0), (pad, pad)))
+    frames = sliding_window_view(power, frame_length, axis=-1)[:, ::hop_length]
+    rms = np.sqrt(frames.mean(axis=-1))
+    return rms[0] if y.ndim == 1 else rms
+
+
+def nonsilent_frames(y, top_db=60, frame_length=2048, hop_length=512, ref=np.max):
+    """
+    Return a boolean array marking frames louder than ``ref`` minus ``top_db`` dB.
+
+    ``ref`` may be a number or a callable applied to the frame RMS values.
+    Multi-channel input counts a frame as non-silent if any channel is.
+    """
+    rms = frame_rms(y, frame_length, hop_length)
+    ref_value = ref(rms) if callable(ref) else ref
+    db = 10.0 * np.log10(np.maximum(_AMIN_POWER, np.square(rms)))
+    db -= 10.0 * np.log10(np.maximum(_AMIN_POWER, np.square(ref_value)))
+    if db.ndim > 1:
+        db = db.max(axis=0)
+    return db > -top_db
+
+
+def split_on_silence(y, top_db=60, frame_length=2048, hop_length=512, ref=np.max, keep_silence=0):
+    """
+    Split ``y`` into non-silent intervals.
+
+    Args:
+        y: Samples, shape (n,) or (n, channels)
+        top_db: Threshold in dB below ``ref`` under which a frame is silent
+        frame_length: Samples per analysis frame
+        hop_length: Samples between successive frames
+        ref: Reference amplitude, or a callable computing it from the frame RMS
+        keep_silence: Samples of padding to keep around each interval;
+            intervals that overlap after padding are merged
+
+    Returns:
+        np.ndarray of shape (n_intervals, 2) with [start, end) sample indices
+    """
+    n_samples = np.shape(y)[0]
+    non_silent = nonsilent_frames(y, top_db, frame_length, hop_length, ref)
+
+    # Frame indices where the silent/non-silent state flips
+    flags = np.concatenate(([False], non_silent, [False]))
+    edges = np.flatnonzero(flags[1:] != flags[:-1])
+    intervals = np.minimum(edges * hop_length, n_samples).reshape(-1, 2)
+
+    if keep_silence and len(intervals):
+        intervals[:, 0] = np.maximum(intervals[:, 0] - keep_silence, 0)
+        intervals[:, 1] = np.minimum(intervals[:, 1] + keep_silence, n_samples)
+        # Merge intervals whose padding now overlaps the next one
+        starts_new = np.concatenate(([True], intervals[1:, 0] > intervals[:-1, 1]))
+        merged_ends = np.maximum.reduceat(intervals[:, 1], np.flatnonzero(starts_new))
+        intervals = np.column_stack((intervals[starts_new, 0], merged_ends))
+
+    return intervals
+
+
+def nonsilent_bounds(y, top_db=60, frame_length=2048, hop_length=512, ref=np.max):
+    """
+    Return the [start, end) sample range from the first to the last non-silent frame.
+
+    Equivalent to the outer edges of split_on_silence (the first interval's
+    start and the last interval's end), found from a single framing of ``y``:
+    the first and last set entries of the non-silent mask give the leading and
+    trailing silence without scanning a reversed copy.
+
+    Returns:
+        (start, end), or None if every frame is silent
+    """
+    n_samples = np.shape(y)[0]
+    loud = np.flatnonzero(nonsilent_frames(y, top_db, frame_length, hop_length, ref))
+    if not len(loud):
+        return None
+    return min(int(loud[0]) * hop_length, n_samples), min((int(loud[-1]) + 1) * hop_length, n_samples)
+
+
+def _synthetic_corpus(n_clips=200, sample_rate=24000, seed=0):
+    """Speech-like int16 clips: harmonic bursts with envelopes separated by silence and noise."""
+    rng = np.random.default_rng(seed)
+    clips = []
+    for _ in range(n_clips):
+        parts = [rng.normal(0, rng.uniform(0, 30), int(rng.uniform(0.05, 0.5) * sample_rate))]
+        for _ in range(rng.integers(1, 4)):
+            n = int(rng.uniform(0.15, 0.6) * sample_rate)
+            t = np.arange(n) / sample_rate
+            f0 = rng.uniform(90, 260)
+            voiced = sum(np.sin(2 * np.pi * f0 * k * t) / k for k in range(1, 6))
+            parts.append(rng.uniform(2000, 12000) * voiced * np.hanning(n))
+            parts.append(rng.normal(0, rng.uniform(0, 30), int(rng.uniform(0.1, 0.4) * sample_rate)))
+        clips.append(np.clip(np.concatenate(parts), -32768, 32767).astype(np.int16))
+    return clips
+
+
+if __name__ == "__main__":
+    import time
+
+    import librosa
+
+    clips = _synthetic_corpus()
+    total_seconds = sum(len(c) for c in clips) / 24000
+
+    mismatches = 0
+    for top_db in (20, 40, 60):
+        for clip in clips:
+            ours = split_on_silence(clip, top_db=top_db)
+            theirs = librosa.effects.split(clip, top_db=top_db)
+            if not np.array_equal(ours, theirs):
+                mismatches += 1
+    print(f"Parity with librosa.effects.split: {3 * len(clips) - mismatches}/{3 * len(clips)} clips identical")
+
+    for name, split in (("audio_trim", split_on_silence), ("librosa", librosa.effects.split)):
+        split(clips[0], top_db=40)  # warm up (numba compilation for librosa)
+        start = time.perf_counter()
+        for clip in clips:
+            split(clip, top_db=40)
+        elapsed = time.perf_counter() - start
+        print(f"{name:>10}: {len(clips) / elapsed:8.0f} clips/s ({total_seconds / elapsed:6.0f}x realtime)")
@@ -0,0 +1,381 @@
+#!/usr/bin/env python3
+# /// script
+# requires-python = ">=3.12"
+# dependencies = [
+# "google-cloud-texttospeech",
+# "numpy",
+# "rich",
+# "soundfile"
+# ]
+# ///
+
+"""
+Benchmark for the recording pipeline, run offline against fake_tts.FakeTTSClient
+(or, with --tts-endpoint, against fake_tts_server.py).
+
+For each word count, a synthetic minimal pairs file is written to a temporary
+project directory and the whole make_tree_audio.py flow is run there, followed
+by the tools that read its output. The stages timed are:
+
+    collect_words           collect_all_unique_words() on the synthetic data
+    process_word_recording  one recording at a time, on a sample of the jobs
+    pipeline                make_tree_audio.main() generating every recording
+    rerun                   make_tree_audio.main() again, with everything up to date
+    validate                validate_audio_file() on every generated file
+    manifest_scan           generate_audio_manifest.scan_audio_directory(), cold
+
+The pipeline's own per-stage metrics (API, decode, trim, write, validate,
+retries; summed over all workers) are included in the JSON results.
+
+Each word count runs in its own process so peak memory (max RSS of the
+benchmark process and of the largest CPU worker) is measured per size.
+
+Results can be saved as a baseline (--save-baseline) and later runs are compared
+against it; the exit status is 1 if pipeline throughput dropped by more than
+--max-regression percent.
+"""
+
+import argparse
+import json
+import os
+import random
+import resource
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from pathlib import Path
+from rich.console import Console
+from rich.table import Table
+from rich import box
+
+console = Console()
+
+DEFAULT_SIZES = (100, 1000, 10000)
+DEFAULT_BASELINE_PATH = Path("benchmark_baseline.json")
+
+STAGES = ("collect_words", "process_word_recording", "pipeline", "rerun", "validate", "manifest_scan")
+
+# Recordings timed one by one in the process_word_recording stage
+SERIAL_SAMPLE_SIZE = 50
+
+# Building blocks for synthetic Bengali words
+CONSONANTS = "কখগঘচছজঝটঠডঢতথদধনপফবভমরলশষসহ"
+VOWEL_SIGNS = ("", "া", "ি", "ী", "ু", "ূ", "ে", "ো")
+PAIRS_PER_CATEGORY = 50
+
+
+def build_word_data(n_words, seed=0):
+    """
+    Return minimal pairs data (the minimal_pairs_db.json layout) with ``n_words`` unique words.
+
+    Words are random 2-4 syllable Bengali strings, grouped into pairs and
+    categories like the real data.
+    """
+    rng = random.Random(seed)
+    words = []
+    seen = set()
+    while len(words) < n_words:
+        text = "".join(rng.choice(CONSONANTS) + rng.choice(VOWEL_SIGNS) for _ in range(rng.randint(2, 4)))
+        if text not in seen:
+            seen.add(text)
+            words.append([text, f"w{len(words):05d}"])
+
+    types = {}
+    for start in range(0, n_words, 2 * PAIRS_PER_CATEGORY):
+        chunk = words[start:start + 2 * PAIRS_PER_CATEGORY]
+        pairs = [chunk[i:i + 2] for i in range(0, len(chunk), 2)]
+        types[f"Synthetic Category {len(types) + 1}"] = {"pairs": pairs}
+    return {"bn-IN": {"languageName": "Bengali", "audioBasePath": "audio/bn-IN", "types": types}}
+
+
+def peak_rss_mb(who=resource.RUSAGE_SELF):
+    """Max resident set size in MB (of this process, or of its largest child)."""
+    return resource.getrusage(who).ru_maxrss / 1024  # ru_maxrss is in KB on Linux
+
+
+def run_size(n_words, options):
+    """
+    Run every stage for one word count in a fresh temporary project directory.
+
+    Runs in a worker process; returns a JSON-serializable result dict.
+    """
+    import generate_audio_manifest
+    import make_tree_audio
+    from fake_tts import FakeTTSClient
+
+    project_dir = Path(tempfile.mkdtemp(prefix=f"pipeline-bench-{n_words}-", dir=options["tmp_dir"]))
+    os.chdir(project_dir)
+    make_tree_audio.console.quiet = True
+    generate_audio_manifest.console.quiet = True
+    if options["tts_endpoint"]:
+        make_tree_audio.use_tts_endpoint(options["tts_endpoint"])
+    else:
+        make_tree_audio.set_tts_client_factory(
+            lambda beta: FakeTTSClient(latency=options["latency"], jitter=options["jitter"])
+        )
+
+    all_data = build_word_data(n_words)
+    Path("public").mkdir()
+    with open(Path("public", "minimal_pairs_db.json"), "w", encoding="utf-8") as f:
+        json.dump(all_data, f, ensure_ascii=False)
+    base_output_path = Path("public", "audio", "bn-IN")
+    voices = options["voices"]
+
+    stages = {}
+
+    def timed(name, fn, *args, **kwargs):
+        start = time.perf_counter()
+        result = fn(*args, **kwargs)
+        stages[name] = time.perf_counter() - start
+        return result
+
+    try:
+        unique_words = timed("collect_words", make_tree_audio.collect_all_unique_words, all_data)["bn-IN"]
+
+        # Serial baseline: one recording at a time, written outside the real tree
+        base_audio_config = {"volume_gain_db": 0.0, "effects_profile": "headphone-class-device", "language_code": "bn-IN"}
+        sample = make_tree_audio.build_recording_jobs(unique_words, voices, base_audio_config)[:SERIAL_SAMPLE_SIZE]
+
+        def record_serially():
+            for job in sample:
+                make_tree_audio.process_word_recording(
+                    job["word_text"], job["transliteration"], Path("serial"), job["voice_config"], base_audio_config
+                )
+
+        timed("process_word_recording", record_serially)
+
+        argv = [
+            "--voices", *voices,
+            "--concurrency", str(options["concurrency"]),
+            "--batch-size", str(options["batch_size"]),
+        ]
+        if options["cpu_workers"]:
+            argv += ["--cpu-workers", str(options["cpu_workers"])]
+        stats = timed("pipeline", make_tree_audio.main, argv)
+        with open(make_tree_audio.DEFAULT_METRICS_PATH, "r", encoding="utf-8") as f:
+            pipeline_stages = {stage: summary["total"] for stage, summary in json.load(f)["stages"].items()}
+        rerun_stats = timed("rerun", make_tree_audio.main, argv)
+
+        wav_files = sorted(base_output_path.glob("*/*.wav"))
+
+        def validate_all():
+            return sum(make_tree_audio.validate_audio_file(path)["valid"] for path in wav_files)
+
+        valid = timed("validate", validate_all)
+        timed("manifest_scan", generate_audio_manifest.scan_audio_directory, base_output_path, None, 8)
+
+        recordings = n_words * len(voices)
+        return {
+            "words": n_words,
+            "recordings": recordings,
+            "successful": stats["successful"],
+            "failed": stats["failed"],
+            "rerun_skipped": rerun_stats["skipped"],
+            "valid_files": valid,
+            "recordings_per_second": stats["successful"] / stages["pipeline"] if stages["pipeline"] else 0.0,
+            "serial_ms_per_recording": 1000 * stages["process_word_recording"] / max(len(sample), 1),
+            "stages": stages,
+            "pipeline_stages": pipeline_stages,
+            "peak_rss_mb": peak_rss_mb(),
+            "peak_worker_rss_mb": peak_rss_mb(resource.RUSAGE_CHILDREN),
+        }
+    finally:
+        os.chdir(options["tmp_dir"])
+        if not options["keep"]:
+            shutil.rmtree(project_dir, ignore_errors=True)
+        else:
+            console.print(f"[dim]Kept {project_dir}[/dim]")
+
+
+def run_isolated(n_words, options):
+    """Run run_size() in a fresh interpreter so memory and caches don't carry over between sizes."""
+    with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as pool:
+        return pool.submit(run_size, n_words, options).result()
+
+
+def compare_to_baseline(results, baseline, max_regression):
+    """
+    Print each metric next to its baseline value.
+
+    Returns:
+        List of sizes whose pipeline throughput regressed by more than ``max_regression`` percent
+    """
+    regressions = []
+    table = Table(title="Compared to baseline", box=box.ROUNDED)
+    for column in ("Words", "Metric", "Baseline", "Now", "Change"):
+        table.add_column(column, justify="right" if column != "Metric" else "left")
+
+    for size, result in results.items():
+        old = baseline.get(size)
+        if old is None:
+            continue
+        metrics = [("recordings/s", old["recordings_per_second"], result["recordings_per_second"], True)]
+        metrics += [
+            (f"{stage} (s)", old["stages"][stage], result["stages"][stage], False)
+            for stage in STAGES if stage in old["stages"]
+        ]
+        metrics.append(("peak RSS (MB)", old["peak_rss_mb"], result["peak_rss_mb"], False))
+        for name, before, now, higher_is_better in metrics:
+            change = (now - before) / before * 100 if before else 0.0
+            worse = change < 0 if higher_is_better else change > 0
+            style = "red" if worse and abs(change) > max_regression else "green" if not worse else ""
+            table.add_row(size, name, f"{before:.3f}", f"{now:.3f}", f"[{style}]{change:+.1f}%[/{style}]" if style else f"{change:+.1f}%")
+
+        drop = (old["recordings_per_second"] - result["recordings_per_second"]) / old["recordings_per_second"] * 100
+        if drop > max_regression:
+            regressions.append(size)
+
+    console.print(table)
+    return regressions
+
+
+def print_results(results):
+    table = Table(title="Pipeline Benchmark", box=box.ROUNDED)
+    table.add_column("Metric", style="cyan")
+    for size in results:
+        table.add_column(f"{size} words", justify="right")
+
+    rows = [
+        ("Recordings", lambda r: f"{r['successful']}/{r['recordings']}"),
+        ("Recordings/s", lambda r: f"[green]{r['recordings_per_second']:.1f}[/green]"),
+        ("Serial ms/recording", lambda r: f"{r['serial_ms_per_recording']:.1f}"),
+    ]
+    rows += [(f"{stage} (s)", lambda r, stage=stage: f"{r['stages'][stage]:.3f}") for stage in STAGES]
+    rows += [
+        ("Peak RSS (MB)", lambda r: f"{r['peak_rss_mb']:.0f}"),
+        ("Peak worker RSS (MB)", lambda r: f"{r['peak_worker_rss_mb']:.0f}"),
+    ]
+    for name, cell in rows:
+        table.add_row(name, *(cell(result) for result in results.values()))
+    console.print(table)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the recording pipeline against an offline fake TTS backend")
+    parser.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=list(DEFAULT_SIZES),
+        help="Numbers of unique words to benchmark (default: 100 1000 10000)",
+    )
+    parser.add_argument(
+        "--voices",
+        nargs="+",
+        default=["bn-IN-Chirp3-HD-Aoede", "bn-IN-Chirp3-HD-Puck"],
+        help="Voices to generate for every word (default: two Chirp3-HD voices)",
+    )
+    parser.add_argument(
+        "--latency-ms",
+        type=float,
+        default=20.0,
+        help="Simulated TTS request latency in ms (default: 20)",
+    )
+    parser.add_argument(
+        "--jitter-ms",
+        type=float,
+        default=10.0,
+        help="Extra random latency of up to this many ms per request (default: 10)",
+    )
+    parser.add_argument(
+        "--tts-endpoint",
+        default=None,
+        help="Use this TTS endpoint (e.g. fake_tts_server.py at http://localhost:8080) instead of the "
+             "in-process fake client; --latency-ms and --jitter-ms are then ignored",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=8,
+        help="make_tree_audio.py --concurrency (default: 8)",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=1,
+        help="make_tree_audio.py --batch-size, for Wavenet voices (default: 1)",
+    )
+    parser.add_argument(
+        "--cpu-workers",
+        type=int,
+        default=None,
+        help="make_tree_audio.py --cpu-workers (default: CPU count)",
+    )
+    parser.add_argument(
+        "--baseline",
+        default=str(DEFAULT_BASELINE_PATH),
+        help=f"Baseline results to compare against (default: {DEFAULT_BASELINE_PATH})",
+    )
+    parser.add_argument(
+        "--save-baseline",
+        action="store_true",
+        help="Store this run's results as the new baseline",
+    )
+    parser.add_argument(
+        "--max-regression",
+        type=float,
+        default=10.0,
+        help="Percent drop in recordings/s that counts as a regression (default: 10)",
+    )
+    parser.add_argument(
+        "--output",
+        default=None,
+        help="Also write the results as JSON to this file",
+    )
+    parser.add_argument(
+        "--keep",
+        action="store_true",
+        help="Keep the temporary project directories",
+    )
+    args = parser.parse_args()
+
+    console.print("[bold blue]Recording Pipeline Benchmark[/bold blue]")
+
+    config = {
+        "voices": args.voices,
+        "latency": args.latency_ms / 1000,
+        "jitter": args.jitter_ms / 1000,
+        "tts_endpoint": args.tts_endpoint,
+        "concurrency": args.concurrency,
+        "batch_size": args.batch_size,
+        "cpu_workers": args.cpu_workers,
+    }
+    options = dict(config, keep=args.keep, tmp_dir=tempfile.gettempdir())
+
+    results = {}
+    for n_words in args.sizes:
+        console.print(f"[cyan]{n_words} words x {len(args.voices)} voices...[/cyan]")
+        results[str(n_words)] = run_isolated(n_words, options)
+
+    print_results(results)
+    report = {"config": config, "python": sys.version.split()[0], "cpu_count": os.cpu_count(), "results": results}
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    regressions = []
+    baseline_path = Path(args.baseline)
+    if baseline_path.exists():
+        with open(baseline_path, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("config") != config:
+            console.print("[yellow]⚠ Baseline was recorded with different settings; differences may not be meaningful[/yellow]")
+        regressions = compare_to_baseline(results, baseline.get("results", {}), args.max_regression)
+    elif not args.save_baseline:
+        console.print(f"[dim]No baseline at {baseline_path}; use --save-baseline to record one[/dim]")
+
+    if args.save_baseline:
+        with open(baseline_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        console.print(f"[green]Baseline saved to {baseline_path}[/green]")
+
+    if regressions:
+        console.print(f"[red]✗ Throughput regressed by more than {args.max_regression}% for: {', '.join(regressions)} words[/red]")
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
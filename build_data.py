@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+# /// script
+# requires-python = ">=3.12"
+# dependencies = [
+# "rich"
+# ]
+# ///
+
+"""
+Compile minimal_pairs_db.json into small files the frontend and the audio
+tools can load piecemeal.
+
+Writes, under public/audio/data/:
+
+    index.json                          languages, their settings and, per
+                                        category (type), the shard URL and
+                                        pair and word counts
+    <lang>/<type-slug>.<hash>.json      one shard per language and type:
+                                        {"language", "type", "data"} where
+                                        "data" is the type's entry in the database
+    <lang>/words.<hash>.json            compact word table of the language
+                                        (optional): one [text, transliteration,
+                                        [type index, ...]] row per unique word
+
+Shard names contain a hash of their contents, so they can be cached as
+immutable; only index.json has to be revalidated. The index records a hash of
+the database it was built from, and load_word_tables() only uses the word
+tables while that still matches, so the generators fall back to the full
+database when the build is stale. The frontend prefers the index whenever it
+exists, so `npm run build` runs this script first (npm run build:data).
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+from pathlib import Path
+from rich.console import Console
+
+console = Console()
+
+DEFAULT_DATA_PATH = Path("public", "minimal_pairs_db.json")
+DEFAULT_OUTPUT_DIR = Path("public", "audio", "data")
+INDEX_FILENAME = "index.json"
+DATA_VERSION = 1
+
+HASH_DIGEST_SIZE = 8
+
+
+def slugify(name):
+    """Turn a type name into an ASCII file name part (e.g. 'Dental ত vs. Retroflex ট' -> 'dental-vs-retroflex')."""
+    return re.sub(r"[^a-z0-9]+", "-", name.lower()).strip("-") or "type"
+
+
+def content_hash(data):
+    """Return the hex BLAKE2b hash used in shard names."""
+    return hashlib.blake2b(data, digest_size=HASH_DIGEST_SIZE).hexdigest()
+
+
+def encode_json(obj):
+    """Compact, deterministic UTF-8 JSON (key order is kept, so rebuilding unchanged data gives the same bytes)."""
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def build_word_table(lang_data):
+    """
+    Walk one language's types once and return its compact word table.
+
+    Words are listed in first-appearance order (the order the generators
+    process them in) with the indices of every type they appear in.
+
+    Returns:
+        {"types": [type name, ...], "words": [[text, transliteration, [type index, ...]], ...]}
+    """
+    types = list(lang_data.get("types", {}))
+    rows = {}  # transliteration -> row
+    for type_index, (type_name, type_data) in enumerate(lang_data.get("types", {}).items()):
+        for pair in type_data.get("pairs", []):
+            for word in pair:
+                row = rows.setdefault(word[1], [word[0], word[1], []])
+                if type_index not in row[2]:
+                    row[2].append(type_index)
+    return {"types": types, "words": list(rows.values())}
+
+
+def word_tables_from_data(all_data):
+    """
+    Return the word data of every language in the form load_word_tables() returns,
+    computed from the full database.
+    """
+    return {lang_code: _language_words(lang_data, build_word_table(lang_data)) for lang_code, lang_data in all_data.items()}
+
+
+def _language_words(lang_data, table):
+    """Expand a word table into {transliteration: (text, transliteration)} and {transliteration: [type, ...]}."""
+    types = table["types"]
+    return {
+        "languageName": lang_data.get("languageName"),
+        "audioBasePath": lang_data.get("audioBasePath"),
+        "words": {transliteration: (text, transliteration) for text, transliteration, _ in table["words"]},
+        "categories": {
+            transliteration: sorted(types[i] for i in type_indices)
+            for _, transliteration, type_indices in table["words"]
+        },
+    }
+
+
+def build_data(all_data, source_hash, word_tables=True):
+    """
+    Compile the database into the index and its shard files.
+
+    Returns:
+        (index, files): the index dict and {relative path: bytes} of every shard
+    """
+    index = {"version": DATA_VERSION, "source": {"hash": source_hash}, "languages": {}}
+    files = {}
+
+    for lang_code, lang_data in all_data.items():
+        entry = {key: value for key, value in lang_data.items() if key != "types"}
+        types = {}
+        table = build_word_table(lang_data)
+        words_per_type = [0] * len(table["types"])
+        for _, _, type_indices in table["words"]:
+            for i in type_indices:
+                words_per_type[i] += 1
+
+        for type_index, (type_name, type_data) in enumerate(lang_data.get("types", {}).items()):
+            data = encode_json({"language": lang_code, "type": type_name, "data": type_data})
+            path = f"{lang_code}/{slugify(type_name)}.{content_hash(data)}.json"
+            files[path] = data
+            types[type_name] = {
+                "path": path,
+                "pairs": len(type_data.get("pairs", [])),
+                "words": words_per_type[type_index],
+            }
+
+        entry["types"] = types
+        entry["pairCount"] = sum(type_info["pairs"] for type_info in types.values())
+        entry["wordCount"] = len(table["words"])
+        if word_tables:
+            data = encode_json({"language": lang_code, **table})
+            path = f"{lang_code}/words.{content_hash(data)}.json"
+            files[path] = data
+            entry["wordTable"] = path
+        index["languages"][lang_code] = entry
+
+    return index, files
+
+
+def write_data(index, files, output_dir, prune=True):
+    """
+    Write the shards, then the index, each atomically; shards that already
+    exist are left alone (their name is their content).
+
+    Returns:
+        (written, pruned): the number of shard files written and of old shard
+        files removed because the new index no longer references them
+    """
+    output_dir = Path(output_dir)
+    written = 0
+    for path, data in files.items():
+        target = output_dir / path
+        if target.exists():
+            continue
+        _write_atomic(target, data)
+        written += 1
+    _write_atomic(output_dir / INDEX_FILENAME, encode_json(index))
+
+    pruned = 0
+    if prune:
+        referenced = {output_dir / path for path in files}
+        for path in output_dir.glob("*/*.json"):
+            if path not in referenced:
+                path.unlink()
+                pruned += 1
+    return written, pruned
+
+
+def _write_atomic(path, data):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    try:
+        tmp_path.write_bytes(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+
+def load_word_tables(output_dir=DEFAULT_OUTPUT_DIR, source_path=DEFAULT_DATA_PATH):
+    """
+    Load every language's word table from a build_data.py build.
+
+    Returns None (so callers fall back to walking the full database) if there
+    is no build, it has no word tables, or ``source_path`` has changed since
+    it was built.
+
+    Returns:
+        {language_code: {"languageName", "audioBasePath",
+                         "words": {transliteration: (text, transliteration)},
+                         "categories": {transliteration: [type, ...]}}}
+    """
+    output_dir = Path(output_dir)
+    try:
+        with open(output_dir / INDEX_FILENAME, "r", encoding="utf-8") as f:
+            index = json.load(f)
+        source_hash = content_hash(Path(source_path).read_bytes())
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+    if index.get("version") != DATA_VERSION or index["source"]["hash"] != source_hash:
+        return None
+
+    languages = {}
+    for lang_code, entry in index["languages"].items():
+        if "wordTable" not in entry:
+            return None
+        try:
+            with open(output_dir / entry["wordTable"], "r", encoding="utf-8") as f:
+                table = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        languages[lang_code] = _language_words(entry, table)
+    return languages
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compile minimal_pairs_db.json into an index and per-type shards")
+    parser.add_argument(
+        "--data",
+        default=str(DEFAULT_DATA_PATH),
+        help=f"Minimal pairs database (default: {DEFAULT_DATA_PATH})",
+    )
+    parser.add_argument(
+        "--output-dir",
+        default=str(DEFAULT_OUTPUT_DIR),
+        help=f"Directory for index.json and the shards (default: {DEFAULT_OUTPUT_DIR})",
+    )
+    parser.add_argument(
+        "--no-word-tables",
+        action="store_true",
+        help="Don't write the per-language word tables used by the generator scripts",
+    )
+    parser.add_argument(
+        "--no-prune",
+        action="store_true",
+        help="Keep shard files the new index no longer references",
+    )
+    args = parser.parse_args()
+
+    source = Path(args.data).read_bytes()
+    all_data = json.loads(source)
+    index, files = build_data(all_data, content_hash(source), word_tables=not args.no_word_tables)
+    written, pruned = write_data(index, files, args.output_dir, prune=not args.no_prune)
+
+    for lang_code, entry in index["languages"].items():
+        console.print(
+            f"[bold]{lang_code}[/bold]: {len(entry['types'])} types, {entry['pairCount']} pairs, {entry['wordCount']} words"
+        )
+    console.print(
+        f"[green]Wrote {Path(args.output_dir) / INDEX_FILENAME}: {len(files)} shards "
+        f"({written} new, {pruned} removed)[/green]"
+    )
+
+
+if __name__ == "__main__":
+    main()
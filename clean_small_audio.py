@@ -1,120 +1,416 @@
 #!/usr/bin/env python3
 """
-Script to identify and delete audio files that are significantly smaller than their peers.
-This helps clean up failed recordings that only contain headers or very brief audio.
+Script to identify and delete bad audio recordings.
+
+Every file is decoded once in a process pool and reduced to a small feature
+vector: duration, RMS, peak, clipped fraction, leading/trailing silence,
+number of spoken segments, longest internal pause and a spectral-centroid
+summary. Features that describe the word (duration, silence, segments) are
+compared with the other voices of the same word, and features that describe
+the voice (loudness, timbre) with the other words of the same voice, using
+robust z-scores. This catches clips that are the right size but wrong:
+clipping, a second word left over from a failed split, long trailing silence
+or a different voice than the one requested. Files much smaller than the
+other recordings of the same word are flagged too.
+
+Only the source WAV recordings of public/audio/<lang>/<word>/ are checked
+(every language by default, or those given with --languages); encoded copies
+are rebuilt from them by encode_audio.py. Words and voices are compared
+within their own language.
+
+Features are kept in the shared audio_features cache, so only new or
+changed files are decoded on a rerun.
+
+Flagged recordings can be recorded in the make_tree_audio.py job state
+(--mark, or --delete), so the next run re-synthesizes them with a fresh TTS
+request instead of reusing the cached response.
 """
 
-import json
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 import statistics
 
-def analyze_and_clean_audio_files(data_file=None, dry_run=True, min_threshold=0.3):
+import numpy as np
+
+from audio_features import AudioFeatureCache, DEFAULT_FEATURE_CACHE_PATH, feature_key
+from job_state import JobStateDB, DEFAULT_STATE_PATH, FLAGGED_STATUS
+
+FEATURE_NAMES = (
+    "duration",
+    "rms",
+    "peak",
+    "clipped_fraction",
+    "leading_silence",
+    "trailing_silence",
+    "segments",
+    "longest_gap",
+    "centroid_mean",
+    "centroid_std",
+)
+
+# Features compared across the voices of one word, and across the words of one voice
+WORD_FEATURES = ("duration", "leading_silence", "trailing_silence", "segments", "longest_gap")
+VOICE_FEATURES = ("rms", "peak", "centroid_mean", "centroid_std")
+
+# Smallest spread assumed per feature, so near-identical peers don't turn tiny
+# differences into huge scores
+FEATURE_SCALE_FLOORS = {
+    "duration": 0.05,
+    "rms": 0.005,
+    "peak": 0.02,
+    "clipped_fraction": 0.001,
+    "leading_silence": 0.05,
+    "trailing_silence": 0.05,
+    "segments": 0.5,
+    "longest_gap": 0.05,
+    "centroid_mean": 50.0,
+    "centroid_std": 50.0,
+}
+
+# Groups smaller than this have no meaningful median
+MIN_GROUP_SIZE = 4
+
+# Samples at or above this level (full scale = 1.0) count as clipped
+CLIP_LEVEL = 0.999
+MAX_CLIPPED_FRACTION = 0.001
+
+# Silence detection for the segment features
+SILENCE_TOP_DB = 40
+FRAME_LENGTH = 2048
+HOP_LENGTH = 512
+# Pauses shorter than this are part of one word (stops, gemination)
+MIN_GAP_SECONDS = 0.2
+
+
+def extract_features(file_path):
+    """
+    Decode one recording and compute its feature vector.
+
+    Runs in a worker process.
+
+    Returns:
+        (features, error): a dict of FEATURE_NAMES (plus sample_rate) to
+        values, or None and the reason the file could not be read
+    """
+    import soundfile as sf
+    from numpy.lib.stride_tricks import sliding_window_view
+    from audio_trim import split_on_silence
+
+    try:
+        y, sample_rate = sf.read(str(file_path), dtype="float32", always_2d=True)
+    except Exception as e:
+        return None, str(e)
+    y = y.mean(axis=1)
+    n_samples = len(y)
+    if n_samples == 0:
+        return None, "no samples"
+
+    duration = n_samples / sample_rate
+    rms = float(np.sqrt(np.mean(np.square(y, dtype=np.float64))))
+    abs_y = np.abs(y)
+    peak = float(abs_y.max())
+    clipped_fraction = float(np.count_nonzero(abs_y >= CLIP_LEVEL)) / n_samples
+
+    intervals = split_on_silence(y, top_db=SILENCE_TOP_DB, frame_length=FRAME_LENGTH, hop_length=HOP_LENGTH)
+    if len(intervals):
+        leading_silence = intervals[0, 0] / sample_rate
+        trailing_silence = (n_samples - intervals[-1, 1]) / sample_rate
+        # Pad by half the minimum gap so shorter pauses merge into one segment
+        keep = int(MIN_GAP_SECONDS * sample_rate / 2)
+        merged = split_on_silence(
+            y, top_db=SILENCE_TOP_DB, frame_length=FRAME_LENGTH, hop_length=HOP_LENGTH, keep_silence=keep
+        )
+        segments = len(merged)
+        gaps = merged[1:, 0] - merged[:-1, 1] + 2 * keep
+        longest_gap = gaps.max() / sample_rate if len(gaps) else 0.0
+    else:
+        leading_silence = trailing_silence = duration
+        segments = 0
+        longest_gap = 0.0
+
+    # Spectral centroid of the voiced frames
+    centroid_mean = centroid_std = 0.0
+    if n_samples >= FRAME_LENGTH:
+        frames = sliding_window_view(y, FRAME_LENGTH)[::HOP_LENGTH]
+        frame_rms = np.sqrt(np.mean(np.square(frames), axis=1))
+        voiced = frames[frame_rms > frame_rms.max() * 10 ** (-SILENCE_TOP_DB / 20)]
+        if len(voiced):
+            magnitudes = np.abs(np.fft.rfft(voiced * np.hanning(FRAME_LENGTH), axis=1))
+            freqs = np.fft.rfftfreq(FRAME_LENGTH, 1 / sample_rate)
+            centroids = magnitudes @ freqs / np.maximum(magnitudes.sum(axis=1), 1e-12)
+            centroid_mean = float(centroids.mean())
+            centroid_std = float(centroids.std())
+
+    values = (
+        duration, rms, peak, clipped_fraction, leading_silence, trailing_silence,
+        segments, longest_gap, centroid_mean, centroid_std,
+    )
+    return {"sample_rate": sample_rate, **dict(zip(FEATURE_NAMES, map(float, values)))}, None
+
+
+def robust_z_scores(values, groups, floors):
+    """
+    Score every row of ``values`` against the other rows of its group.
+
+    Args:
+        values: (n_files, n_features) array
+        groups: (n_files,) array of group labels
+        floors: (n_features,) smallest scale used per feature
+
+    Returns:
+        (n_files, n_features) array of (x - median) / (1.4826 * MAD) per group
+        and feature; rows in groups smaller than MIN_GROUP_SIZE score 0
+    """
+    scores = np.zeros_like(values)
+    _, group_ids = np.unique(groups, return_inverse=True)
+    order = np.argsort(group_ids, kind="stable")
+    boundaries = np.flatnonzero(np.diff(group_ids[order])) + 1
+    for rows in np.split(order, boundaries):
+        if len(rows) < MIN_GROUP_SIZE:
+            continue
+        block = values[rows]
+        median = np.median(block, axis=0)
+        mad = np.median(np.abs(block - median), axis=0)
+        scores[rows] = (block - median) / np.maximum(1.4826 * mad, floors)
+    return scores
+
+
+def score_recordings(features, words, voices, z_threshold=3.5):
     """
-    Analyze audio files and delete those significantly smaller than peers.
+    Flag outlying recordings.
+
+    Args:
+        features: (n_files, len(FEATURE_NAMES)) array from extract_features
+        words: (n_files,) labels of the per-word groups (language and word)
+        voices: (n_files,) labels of the per-voice groups (language and voice)
+        z_threshold: Robust z-score above which a feature is an outlier
+
+    Returns:
+        list with one list of reasons per file (empty if the file looks fine)
+    """
+    scores = np.zeros_like(features)
+    for names, groups in ((WORD_FEATURES, words), (VOICE_FEATURES, voices)):
+        columns = [FEATURE_NAMES.index(name) for name in names]
+        floors = np.array([FEATURE_SCALE_FLOORS[name] for name in names])
+        scores[:, columns] = robust_z_scores(features[:, columns], groups, floors)
+
+    outliers = np.abs(scores) > z_threshold
+    clipped_column = FEATURE_NAMES.index("clipped_fraction")
+    clipped = features[:, clipped_column] > MAX_CLIPPED_FRACTION
+
+    # Some words are just quiet: a low peak is only reported alongside another problem
+    peak_column = FEATURE_NAMES.index("peak")
+    low_peak = outliers[:, peak_column] & (scores[:, peak_column] < 0)
+    outliers[low_peak & (outliers.sum(axis=1) == 1) & ~clipped, peak_column] = False
+
+    reasons = []
+    for row in range(len(features)):
+        row_reasons = [
+            f"{FEATURE_NAMES[col]} {features[row, col]:.3g} (z={scores[row, col]:+.1f})"
+            for col in np.flatnonzero(outliers[row])
+        ]
+        if clipped[row]:
+            row_reasons.append(f"clipped ({features[row, clipped_column]:.2%} of samples)")
+        reasons.append(row_reasons)
+    return reasons
+
+
+def find_recordings(audio_root, languages=None):
+    """
+    Return (path, language, word, voice) for every source WAV below ``audio_root``.
+
+    Args:
+        audio_root: Root of the <lang>/<word>/ recordings
+        languages: Language directories to search (default: all of them)
+    """
+    audio_root = Path(audio_root)
+    if languages is None:
+        languages = sorted(
+            entry.name for entry in audio_root.iterdir() if entry.is_dir() and not entry.name.startswith('_')
+        )
+    recordings = []
+    for language in languages:
+        lang_dir = audio_root / language
+        if not lang_dir.is_dir():
+            continue
+        for word_dir in sorted(lang_dir.iterdir()):
+            if not word_dir.is_dir() or word_dir.name.startswith('_'):
+                continue
+            prefix = f"{word_dir.name}_"
+            for audio_file in sorted(word_dir.glob("*.wav")):
+                voice = audio_file.stem[len(prefix):] if audio_file.stem.startswith(prefix) else audio_file.stem
+                recordings.append((audio_file, language, word_dir.name, voice))
+    return recordings
+
+
+def analyze_and_clean_audio_files(audio_root=None, languages=None, dry_run=True, min_threshold=0.3, z_threshold=3.5,
+                                  mark=False, state_db=DEFAULT_STATE_PATH, workers=None,
+                                  feature_cache=DEFAULT_FEATURE_CACHE_PATH):
+    """
+    Analyze audio files and delete (or mark) those that are too small or anomalous.
     
     Args:
-        data_file: Path to the minimal pairs JSON data
+        audio_root: Root of the <lang>/<word>/ recordings (default: public/audio)
+        languages: Language directories to check (default: all of them)
         dry_run: If True, only report what would be deleted without actually deleting
         min_threshold: Files smaller than this ratio of the median size will be deleted
+        z_threshold: Robust z-score above which a feature makes a file an outlier
+        mark: Record flagged files in the job state so make_tree_audio.py
+            regenerates them (always done when deleting)
+        state_db: Job state database shared with make_tree_audio.py, or None
+        workers: Feature extraction processes (default: CPU count)
+        feature_cache: Shared AudioFeatureCache file, or None to measure every file
     """
     # Use relative path from script location
-    if data_file is None:
-        data_file = Path(__file__).parent / "public" / "minimal_pairs_db.json"
-    else:
-        data_file = Path(__file__).parent / data_file
-    
-    # Load data
-    with open(data_file, 'r', encoding='utf-8') as f:
-        data = json.load(f)
+    project_root = Path(__file__).parent
+    audio_root = project_root / (audio_root if audio_root is not None else Path('public', 'audio'))
     
-    # Get Bengali data
-    lang_data = data.get('bn-IN', {})
-    audio_base_path = Path(__file__).parent / 'public' / lang_data.get('audioBasePath', 'audio/bn-IN')
+    action = 'deleted' if not dry_run else 'marked for regeneration' if mark else 'marked for deletion'
+    print(f"Analyzing WAV recordings in: {audio_root} ({', '.join(languages) if languages else 'all languages'})")
+    print(f"Threshold: Files < {min_threshold:.1%} of median size or with |z| > {z_threshold} will be {action}")
+    print()
     
-    print(f"Analyzing audio files in: {audio_base_path}")
-    print(f"Threshold: Files < {min_threshold:.1%} of median size will be {'marked for deletion' if dry_run else 'deleted'}")
+    recordings = find_recordings(audio_root, languages)
+
+    if not recordings:
+        print("No audio files found")
+        return
+
+    # Reuse the cached features of unchanged files; decode and measure the rest in parallel
+    stats = [r[0].stat() for r in recordings]
+    keys = [feature_key(r[0].relative_to(project_root)) for r in recordings]
+    cache = AudioFeatureCache(feature_cache)
+    to_extract = []
+    for i, (key, st) in enumerate(zip(keys, stats)):
+        row = cache.get(key, st.st_size, st.st_mtime_ns)
+        if row is None or any(np.isnan(row[name]) for name in FEATURE_NAMES):
+            to_extract.append(i)
+    print(f"Measuring {len(to_extract)} new or changed files ({len(recordings) - len(to_extract)} cached)")
     print()
+
+    unreadable = {}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        extracted = pool.map(extract_features, [recordings[i][0] for i in to_extract], chunksize=16)
+        for i, (values, error) in zip(to_extract, extracted):
+            if values is None:
+                unreadable[i] = error
+            else:
+                cache.update(keys[i], stats[i].st_size, stats[i].st_mtime_ns, **values)
+    cache.save()
+
+    # One columnar read of the whole corpus
+    columns = cache.columns(keys)
+    row_of = {key: row for row, key in enumerate(columns["path"].tolist())}
+    readable = np.array([i for i in range(len(recordings)) if i not in unreadable and keys[i] in row_of], dtype=int)
+    features = np.full((len(recordings), len(FEATURE_NAMES)), np.nan)
+    features[readable] = np.column_stack([columns[name] for name in FEATURE_NAMES])[[row_of[keys[i]] for i in readable]]
+    words = np.array([f"{language}/{word}" for _, language, word, _ in recordings])
+    voices = np.array([f"{language}/{voice}" for _, language, _, voice in recordings])
+
+    reasons = [[] for _ in recordings]
+    for i, row_reasons in zip(readable, score_recordings(features[readable], words[readable], voices[readable], z_threshold)):
+        reasons[i] = row_reasons
+    for i, error in unreadable.items():
+        reasons[i] = [f"unreadable: {error}"]
+
+    # Size check against the other recordings of the same word
+    sizes = np.array([st.st_size for st in stats])
+    word_rows = {}
+    for i, (_, language, word_name, _) in enumerate(recordings):
+        word_rows.setdefault((language, word_name), []).append(i)
+    for rows in word_rows.values():
+        if len(rows) < 2:
+            continue  # Need at least 2 files to compare
+        median_size = statistics.median(sizes[rows])
+        for i in rows:
+            if sizes[i] < median_size * min_threshold:
+                reasons[i].insert(0, f"size {sizes[i]:,} bytes ({sizes[i] / median_size:.1%} of median)")
+
+    state = JobStateDB(state_db) if state_db is not None and (mark or not dry_run) else None
     
-    total_analyzed = 0
-    total_small_files = 0
+    total_flagged = 0
     total_deleted = 0
     
-    # Analyze each word directory
-    for word_dir in audio_base_path.iterdir():
-        if not word_dir.is_dir():
-            continue
-            
-        word_name = word_dir.name
-        audio_files = list(word_dir.glob("*.wav")) + list(word_dir.glob("*.mp3"))
-        
-        if len(audio_files) < 2:
-            continue  # Need at least 2 files to compare
-            
-        # Get file sizes
-        file_sizes = []
-        file_info = []
-        
-        for audio_file in audio_files:
-            size = audio_file.stat().st_size
-            file_sizes.append(size)
-            file_info.append({'path': audio_file, 'size': size})
-            total_analyzed += 1
-        
-        if len(file_sizes) < 2:
+    for (language, word_name), rows in word_rows.items():
+        flagged_rows = [i for i in rows if reasons[i]]
+        if not flagged_rows:
             continue
-            
-        # Calculate statistics
-        median_size = statistics.median(file_sizes)
-        mean_size = statistics.mean(file_sizes)
-        min_size = min(file_sizes)
-        max_size = max(file_sizes)
-        
-        # Find small files (those significantly smaller than median)
-        threshold_size = median_size * min_threshold
-        small_files = [f for f in file_info if f['size'] < threshold_size]
-        
-        if small_files:
-            print(f"📁 {word_name}:")
-            print(f"   Files: {len(audio_files)}, Median: {median_size:,} bytes, Range: {min_size:,} - {max_size:,}")
-            print(f"   Threshold: {threshold_size:,.0f} bytes")
-            
-            for small_file in small_files:
-                size_ratio = small_file['size'] / median_size
-                print(f"   {'❌ WOULD DELETE' if dry_run else '🗑️  DELETING'}: {small_file['path'].name}")
-                print(f"      Size: {small_file['size']:,} bytes ({size_ratio:.1%} of median)")
-                
-                total_small_files += 1
-                
-                if not dry_run:
-                    try:
-                        small_file['path'].unlink()
-                        total_deleted += 1
-                        print(f"      ✅ Deleted successfully")
-                    except Exception as e:
-                        print(f"      ❌ Failed to delete: {e}")
-            print()
+        print(f"📁 {language}/{word_name}:")
+        print(f"   Files: {len(rows)}, Median: {statistics.median(sizes[rows]):,.0f} bytes")
+        for i in flagged_rows:
+            audio_file, _, _, voice = recordings[i]
+            verb = '🗑️  DELETING' if not dry_run else '🔁 MARKING' if mark else '❌ WOULD DELETE'
+            print(f"   {verb}: {audio_file.name}")
+            for reason in reasons[i]:
+                print(f"      {reason}")
+            total_flagged += 1
+
+            if state is not None:
+                # Keyed like make_tree_audio.py's output paths (relative to the project root)
+                state_path = audio_file.relative_to(project_root)
+                record = state.get(state_path)
+                state.record_result(
+                    state_path, word_name, record["voice"] if record else voice, FLAGGED_STATUS, False,
+                    reason="; ".join(reasons[i]), duration=None if np.isnan(features[i, 0]) else float(features[i, 0])
+                )
+
+            if not dry_run:
+                try:
+                    audio_file.unlink()
+                    total_deleted += 1
+                    print(f"      ✅ Deleted successfully")
+                except Exception as e:
+                    print(f"      ❌ Failed to delete: {e}")
+        print()
+
+    if state is not None:
+        state.close()
     
     print(f"Summary:")
-    print(f"  Total files analyzed: {total_analyzed}")
-    print(f"  Small files found: {total_small_files}")
+    print(f"  Total files analyzed: {len(recordings)}")
+    print(f"  Flagged files found: {total_flagged}")
     if not dry_run:
         print(f"  Files deleted: {total_deleted}")
+        print(f"\nRun make_tree_audio.py to regenerate them")
+    elif mark:
+        print(f"  Files marked for regeneration: {total_flagged}")
+        print(f"\nRun make_tree_audio.py to regenerate them")
     else:
-        print(f"  Files that would be deleted: {total_small_files}")
-        print(f"\nTo actually delete files, run with --delete flag")
+        print(f"  Files that would be deleted: {total_flagged}")
+        print(f"\nTo actually delete files, run with --delete flag (or --mark to regenerate them in place)")
 
 if __name__ == "__main__":
     import argparse
     
-    parser = argparse.ArgumentParser(description="Clean up small audio files")
+    parser = argparse.ArgumentParser(description="Clean up small and anomalous audio files")
     parser.add_argument("--delete", action="store_true", help="Actually delete files (default: dry run)")
+    parser.add_argument("--mark", action="store_true",
+                        help="Keep the files but mark them in the job state so make_tree_audio.py regenerates them")
     parser.add_argument("--threshold", type=float, default=0.3, help="Size threshold ratio (default: 0.3)")
-    parser.add_argument("--data-file", default=None, help="Path to data file (relative to script location)")
+    parser.add_argument("--z-threshold", type=float, default=3.5,
+                        help="Robust z-score above which a feature is an outlier (default: 3.5)")
+    parser.add_argument("--audio-root", default="public/audio",
+                        help="Root of the <lang>/<word>/ recordings, relative to the script location (default: public/audio)")
+    parser.add_argument("--languages", nargs="+", default=None,
+                        help="Only check these language directories (default: all)")
+    parser.add_argument("--state-db", default=str(DEFAULT_STATE_PATH),
+                        help=f"Job state shared with make_tree_audio.py (default: {DEFAULT_STATE_PATH})")
+    parser.add_argument("--no-state", action="store_true", help="Don't record flagged files in the job state")
+    parser.add_argument("--workers", type=int, default=None, help="Feature extraction processes (default: CPU count)")
+    parser.add_argument("--feature-cache", default=str(DEFAULT_FEATURE_CACHE_PATH),
+                        help=f"Per-file feature cache shared with the other audio tools (default: {DEFAULT_FEATURE_CACHE_PATH})")
+    parser.add_argument("--no-feature-cache", action="store_true", help="Measure every file instead of using the cache")
     
     args = parser.parse_args()
     
     analyze_and_clean_audio_files(
-        data_file=args.data_file,
+        audio_root=args.audio_root,
+        languages=args.languages,
         dry_run=not args.delete,
-        min_threshold=args.threshold
-    )
\ No newline at end of file
+        min_threshold=args.threshold,
+        z_threshold=args.z_threshold,
+        mark=args.mark,
+        state_db=None if args.no_state else Path(__file__).parent / args.state_db,
+        workers=args.workers,
+        feature_cache=None if args.no_feature_cache else Path(__file__).parent / args.feature_cache,
+    )
@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+# /// script
+# requires-python = ">=3.12"
+# dependencies = [
+# "numpy",
+# "scipy",
+# "soundfile",
+# "rich"
+# ]
+# ///
+
+"""
+Script to encode the generated WAV recordings into compressed delivery formats.
+
+Every public/audio/<lang>/<word>/<word>_<voice>.wav gets a sibling file per
+requested format (e.g. <word>_<voice>.opus), optionally resampled first. Files
+whose encoded output is already newer than the source WAV are skipped, so
+reruns only encode what changed. Run generate_audio_manifest.py afterwards so
+the frontend learns which formats exist.
+"""
+
+import argparse
+import os
+import shutil
+import subprocess
+import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from rich.console import Console
+from rich.progress import Progress, SpinnerColumn, TextColumn, BarColumn, TimeRemainingColumn
+
+console = Console()
+
+# Delivery formats: file extension, libsndfile format/subtype (None = encoded with ffmpeg)
+DELIVERY_FORMATS = {
+    "opus": {"extension": "opus", "format": "OGG", "subtype": "OPUS"},
+    "mp3": {"extension": "mp3", "format": "MP3", "subtype": "MPEG_LAYER_III"},
+    "aac": {"extension": "m4a", "format": None, "subtype": None},
+}
+
+# Sample rates the Opus encoder accepts
+OPUS_SAMPLE_RATES = (8000, 12000, 16000, 24000, 48000)
+
+
+def find_source_files(audio_root):
+    """
+    Return every WAV recording below ``audio_root`` (any language, any word).
+
+    Generated directories starting with "_" (e.g. the _hashed copies published
+    by generate_audio_manifest.py) are skipped.
+    """
+    audio_root = Path(audio_root)
+    return sorted(
+        path for path in audio_root.rglob("*.wav")
+        if not any(part.startswith("_") for part in path.relative_to(audio_root).parts[:-1])
+    )
+
+
+def output_path_for(source_file, format_name):
+    """Return the encoded sibling of ``source_file`` for ``format_name``."""
+    return source_file.with_suffix(f".{DELIVERY_FORMATS[format_name]['extension']}")
+
+
+def is_up_to_date(source_file, output_file):
+    """True if ``output_file`` exists and is at least as new as ``source_file``."""
+    try:
+        return output_file.stat().st_mtime_ns >= source_file.stat().st_mtime_ns
+    except FileNotFoundError:
+        return False
+
+
+def encode_file(source_file, format_name, target_rate=None, compression_level=None):
+    """
+    Encode one WAV file into ``format_name``, resampling to ``target_rate`` if given.
+
+    Runs in a worker process. The output is written under a temporary name and
+    renamed into place so a partial encode is never served.
+
+    Returns:
+        dict with "source", "output", "status" ("encoded" or "failed"), sizes and reason
+    """
+    import numpy as np
+    import soundfile as sf
+
+    spec = DELIVERY_FORMATS[format_name]
+    source_file = Path(source_file)
+    output_file = output_path_for(source_file, format_name)
+    tmp_file = output_file.with_name(f".{output_file.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+
+    try:
+        data, sample_rate = sf.read(str(source_file), dtype="float32")
+
+        if target_rate and target_rate != sample_rate:
+            from math import gcd
+            from scipy.signal import resample_poly
+
+            g = gcd(target_rate, sample_rate)
+            data = resample_poly(data, target_rate // g, sample_rate // g, axis=0).astype(np.float32)
+            sample_rate = target_rate
+
+        if format_name == "opus" and sample_rate not in OPUS_SAMPLE_RATES:
+            raise ValueError(f"Opus needs one of {OPUS_SAMPLE_RATES} Hz, got {sample_rate}")
+
+        if spec["format"] is not None:
+            sf.write(
+                str(tmp_file), data, sample_rate,
+                format=spec["format"], subtype=spec["subtype"], compression_level=compression_level,
+            )
+        else:
+            _encode_with_ffmpeg(data, sample_rate, tmp_file, format_name)
+
+        os.replace(tmp_file, output_file)
+        return {
+            "source": source_file,
+            "output": output_file,
+            "status": "encoded",
+            "source_size": source_file.stat().st_size,
+            "output_size": output_file.stat().st_size,
+        }
+    except Exception as e:
+        tmp_file.unlink(missing_ok=True)
+        return {"source": source_file, "output": output_file, "status": "failed", "reason": str(e)}
+
+
+def _encode_with_ffmpeg(data, sample_rate, output_file, format_name):
+    """Encode float32 samples with ffmpeg for formats libsndfile can't write (AAC)."""
+    import io
+    import soundfile as sf
+
+    ffmpeg = shutil.which("ffmpeg")
+    if ffmpeg is None:
+        raise RuntimeError(f"ffmpeg is required to encode {format_name}")
+
+    wav_buffer = io.BytesIO()
+    sf.write(wav_buffer, data, sample_rate, format="WAV", subtype="PCM_16")
+    codec_args = {"aac": ["-c:a", "aac", "-b:a", "64k", "-f", "ipod"]}[format_name]
+    subprocess.run(
+        [ffmpeg, "-y", "-loglevel", "error", "-f", "wav", "-i", "pipe:0", *codec_args, str(output_file)],
+        input=wav_buffer.getvalue(),
+        check=True,
+        capture_output=True,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Encode WAV recordings into compressed delivery formats")
+    parser.add_argument(
+        "--audio-root",
+        default="public/audio",
+        help="Directory to search for WAV recordings (default: public/audio)",
+    )
+    parser.add_argument(
+        "--formats",
+        nargs="+",
+        choices=sorted(DELIVERY_FORMATS),
+        default=["opus", "mp3"],
+        help="Formats to produce (default: opus mp3)",
+    )
+    parser.add_argument(
+        "--sample-rate",
+        type=int,
+        default=None,
+        help="Resample to this rate before encoding (default: keep the source rate)",
+    )
+    parser.add_argument(
+        "--compression-level",
+        type=float,
+        default=None,
+        help="libsndfile compression level from 0 (best quality) to 1 (smallest)",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Encoder processes (default: CPU count)",
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Re-encode even if the output is newer than the source (needed after changing "
+             "--sample-rate or --compression-level)",
+    )
+    args = parser.parse_args()
+
+    console.print("[bold blue]Audio Delivery Encoder[/bold blue]")
+
+    audio_root = Path(args.audio_root)
+    if not audio_root.exists():
+        console.print(f"[red]Error: Audio directory not found at {audio_root}[/red]")
+        return
+
+    sources = find_source_files(audio_root)
+    tasks = [
+        (source, format_name)
+        for source in sources
+        for format_name in args.formats
+        if args.force or not is_up_to_date(source, output_path_for(source, format_name))
+    ]
+    skipped = len(sources) * len(args.formats) - len(tasks)
+    console.print(f"[green]{len(sources)} WAV files, {len(tasks)} encodes to run, {skipped} up to date[/green]")
+
+    encoded = 0
+    failed = []
+    size_totals = {format_name: [0, 0] for format_name in args.formats}  # format -> [source bytes, output bytes]
+
+    with Progress(
+        SpinnerColumn(),
+        TextColumn("[progress.description]{task.description}"),
+        BarColumn(),
+        TextColumn("[progress.percentage]{task.percentage:>3.0f}%"),
+        TimeRemainingColumn(),
+        console=console
+    ) as progress, ProcessPoolExecutor(max_workers=args.workers) as pool:
+
+        task = progress.add_task("Encoding...", total=len(tasks))
+        futures = {
+            pool.submit(encode_file, source, format_name, args.sample_rate, args.compression_level): format_name
+            for source, format_name in tasks
+        }
+        for future in as_completed(futures):
+            format_name = futures[future]
+            result = future.result()
+            if result["status"] == "encoded":
+                encoded += 1
+                size_totals[format_name][0] += result["source_size"]
+                size_totals[format_name][1] += result["output_size"]
+            else:
+                failed.append(result)
+            progress.update(task, advance=1, description=f"Encoded {result['output'].name}")
+
+    console.print(f"\n[bold green]✓ Encoded {encoded} files[/bold green] ({skipped} already up to date)")
+    for format_name, (source_bytes, output_bytes) in size_totals.items():
+        if source_bytes:
+            console.print(f"[cyan]{format_name}:[/cyan] {output_bytes / source_bytes:.1%} of WAV size")
+    for result in failed[:10]:
+        console.print(f"[red]✗ {result['source']} → {result['output'].suffix}: {result['reason']}[/red]")
+    if len(failed) > 10:
+        console.print(f"[red]  ... and {len(failed) - 10} more failures[/red]")
+    if failed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""
+Offline stand-in for the Google TextToSpeechClient.
+
+FakeTTSClient answers synthesize_speech() requests with deterministic,
+speech-like LINEAR16 audio (harmonic syllables with envelopes, surrounded by
+low noise) after a configurable delay, so the recording pipeline
+can be exercised and benchmarked without network access or API quota. The same
+text and voice always produce the same bytes. SSML requests get the audio for
+each <mark> segment and, like the v1beta1 API with SSML_MARK time pointing,
+a timepoint per mark. list_voices() answers with a fixed voice catalog.
+
+Use it with make_tree_audio.set_tts_client_factory(), e.g.
+    set_tts_client_factory(lambda beta: FakeTTSClient(latency=0.05))
+"""
+
+import hashlib
+import random
+import re
+import threading
+import time
+from types import SimpleNamespace
+from xml.sax.saxutils import unescape as xml_unescape
+
+from voice_catalog import FALLBACK_VOICES
+from wav_io import pcm16_header
+
+FAKE_SAMPLE_RATE = 24000
+
+# Seconds of speech per character of input text, and the clamp applied to it
+SECONDS_PER_CHAR = 0.12
+MIN_SPEECH_SECONDS = 0.5
+MAX_SPEECH_SECONDS = 2.5
+
+_MARK_RE = re.compile(r'<mark\s+name="([^"]*)"\s*/>')
+_BREAK_RE = re.compile(r'<break\s+time="(\d+)ms"\s*/>')
+_TAG_RE = re.compile(r"<[^>]+>")
+
+
+def _rng(*parts):
+    """A random generator seeded from ``parts``, so output only depends on the request."""
+    import numpy as np
+
+    digest = hashlib.blake2b("\0".join(parts).encode("utf-8"), digest_size=8).digest()
+    return np.random.default_rng(int.from_bytes(digest, "little"))
+
+
+def synthesize_speech_like(text, voice_name, sample_rate=FAKE_SAMPLE_RATE, pad=True):
+    """
+    Return int16 samples that sound roughly like ``voice_name`` saying ``text``.
+
+    Longer text gives longer audio; each voice has its own pitch. With ``pad``
+    the speech is surrounded by leading and trailing silence (as real TTS
+    responses are), otherwise only the syllables are returned.
+    """
+    import numpy as np
+
+    text = text.strip()
+    if not text:
+        return np.zeros(0, dtype=np.int16)
+
+    voice_rng = _rng("voice", voice_name)
+    f0 = voice_rng.uniform(95, 250)
+    brightness = voice_rng.uniform(0.4, 0.9)
+    rng = _rng("text", voice_name, text)
+
+    speech_seconds = min(max(len(text) * SECONDS_PER_CHAR, MIN_SPEECH_SECONDS), MAX_SPEECH_SECONDS)
+    n_syllables = max(1, round(speech_seconds / 0.2))
+    syllables = []
+    for _ in range(n_syllables):
+        # Syllables dip in loudness between each other but, as in real words, never go silent
+        n = int(speech_seconds / n_syllables * rng.uniform(0.8, 1.0) * sample_rate)
+        t = np.arange(n) / sample_rate
+        pitch = f0 * rng.uniform(0.9, 1.1)
+        voiced = sum(brightness ** k * np.sin(2 * np.pi * pitch * (k + 1) * t) for k in range(5))
+        syllables.append(rng.uniform(4000, 9000) * voiced * (0.3 + 0.7 * np.hanning(n)))
+    speech = np.concatenate(syllables)
+    fade = min(int(0.03 * sample_rate), len(speech) // 2)
+    speech[:fade] *= np.linspace(0, 1, fade)
+    speech[len(speech) - fade:] *= np.linspace(1, 0, fade)
+
+    parts = [speech]
+    if pad:
+        parts = [rng.normal(0, 8, int(rng.uniform(0.1, 0.3) * sample_rate)), speech,
+                 rng.normal(0, 8, int(rng.uniform(0.2, 0.4) * sample_rate))]
+    return np.clip(np.concatenate(parts), -32768, 32767).astype(np.int16)
+
+
+def linear16_wav(samples, sample_rate=FAKE_SAMPLE_RATE):
+    """Return mono int16 ``samples`` as WAV bytes, the way the API returns LINEAR16."""
+    return pcm16_header(sample_rate, 1, len(samples)) + samples.astype("<i2").tobytes()
+
+
+def synthesize_ssml_like(ssml, voice_name, sample_rate=FAKE_SAMPLE_RATE):
+    """
+    Render an SSML document made of text, <mark/> and <break time="Nms"/> tags.
+
+    Returns:
+        (samples, timepoints): int16 samples and [(mark_name, seconds), ...]
+    """
+    import numpy as np
+
+    parts = [_rng("lead", voice_name, ssml).normal(0, 8, int(0.2 * sample_rate))]
+    position = len(parts[0])
+    timepoints = []
+    for token in re.split(r"(<[^>]+>)", ssml):
+        mark = _MARK_RE.fullmatch(token)
+        pause = _BREAK_RE.fullmatch(token)
+        if mark:
+            timepoints.append((mark.group(1), position / sample_rate))
+            continue
+        if pause:
+            chunk = np.zeros(int(int(pause.group(1)) / 1000 * sample_rate))
+        else:
+            chunk = synthesize_speech_like(xml_unescape(_TAG_RE.sub("", token)), voice_name, sample_rate, pad=False)
+        parts.append(chunk)
+        position += len(chunk)
+    parts.append(np.zeros(int(0.3 * sample_rate)))
+    samples = np.clip(np.concatenate(parts), -32768, 32767).astype(np.int16)
+    return samples, timepoints
+
+
+class FakeTTSClient:
+    """
+    Drop-in replacement for texttospeech.TextToSpeechClient.synthesize_speech.
+
+    Args:
+        latency: Seconds each request takes
+        jitter: Extra uniformly random delay of up to this many seconds
+        sample_rate: Sample rate of the returned audio
+        voices: {language_code: [voice name, ...]} returned by list_voices()
+            (default: voice_catalog.FALLBACK_VOICES)
+    """
+
+    def __init__(self, latency=0.0, jitter=0.0, sample_rate=FAKE_SAMPLE_RATE, voices=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.sample_rate = sample_rate
+        self.voices = FALLBACK_VOICES if voices is None else voices
+        self.transport = SimpleNamespace(close=lambda: None)
+        self._random = random.Random()
+        self._lock = threading.Lock()
+        self.requests = 0
+
+    def list_voices(self, request=None, **kwargs):
+        language_code = dict(request or {}, **kwargs).get("language_code")
+        return SimpleNamespace(voices=[
+            SimpleNamespace(name=name, language_codes=[code], natural_sample_rate_hertz=self.sample_rate)
+            for code, names in self.voices.items() if not language_code or code == language_code
+            for name in names
+        ])
+
+    def synthesize_speech(self, request=None, **kwargs):
+        request = dict(request or {}, **kwargs)
+        synthesis_input = request["input"]
+        voice_name = request["voice"].name
+        with self._lock:
+            self.requests += 1
+            delay = self.latency + self._random.uniform(0, self.jitter)
+        if delay > 0:
+            time.sleep(delay)
+
+        if getattr(synthesis_input, "ssml", ""):
+            samples, marks = synthesize_ssml_like(synthesis_input.ssml, voice_name, self.sample_rate)
+        else:
+            samples, marks = synthesize_speech_like(synthesis_input.text, voice_name, self.sample_rate), []
+        return SimpleNamespace(
+            audio_content=linear16_wav(samples, self.sample_rate),
+            timepoints=[SimpleNamespace(mark_name=name, time_seconds=seconds) for name, seconds in marks],
+        )
@@ -0,0 +1,397 @@
+#!/usr/bin/env python3
+# /// script
+# requires-python = ">=3.12"
+# dependencies = [
+# "numpy",
+# "rich"
+# ]
+# ///
+
+"""
+Local stand-in for the Cloud Text-to-Speech REST API, for load-testing the generator.
+
+Implements the part of the API make_tree_audio.py uses: POST
+/v1/text:synthesize (text input, LINEAR16), /v1beta1/text:synthesize (SSML
+with <mark> timepoints) and GET /v1/voices (voice_catalog.FALLBACK_VOICES). Audio comes from fake_tts, so it is deterministic and
+speech-like. To tune concurrency and retries without spending quota, requests
+can be slowed down and made to fail the way the real service does:
+
+    latency        fixed, uniform, exponential or lognormal delay per request
+    errors         RESOURCE_EXHAUSTED (HTTP 429) and UNAVAILABLE (HTTP 503) at given rates
+    quota          requests above --quota-per-second get RESOURCE_EXHAUSTED
+    broken voices  every request for a --broken-voice fails with INTERNAL (HTTP 500)
+    bad audio      truncated responses (the header promises more data than is
+                   sent) and silent responses, which validation must reject
+
+Point the generator at it with:
+    python fake_tts_server.py --port 8080 --latency-ms 300 --unavailable-rate 0.01
+    python make_tree_audio.py --tts-endpoint http://localhost:8080
+
+GET /stats returns the request counters as JSON; they are also printed on exit.
+"""
+
+import argparse
+import base64
+import json
+import math
+import random
+import signal
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+from rich.console import Console
+from rich.table import Table
+from rich import box
+
+from fake_tts import FAKE_SAMPLE_RATE, synthesize_speech_like, synthesize_ssml_like, linear16_wav
+from voice_catalog import FALLBACK_VOICES
+from wav_io import PCM16_HEADER_SIZE
+
+console = Console()
+
+LATENCY_DISTRIBUTIONS = ("fixed", "uniform", "exponential", "lognormal")
+
+SYNTHESIZE_PATHS = {"/v1/text:synthesize": "v1", "/v1beta1/text:synthesize": "v1beta1"}
+LIST_VOICES_PATHS = ("/v1/voices", "/v1beta1/voices")
+
+# AudioEncoding.LINEAR16, as a name or as the integer the REST clients send
+LINEAR16_ENCODINGS = ("LINEAR16", 1)
+
+# TimepointType.SSML_MARK
+SSML_MARK_TIMEPOINTS = ("SSML_MARK", 1)
+
+# Google error status name for each HTTP status the backend returns
+ERROR_STATUSES = {400: "INVALID_ARGUMENT", 429: "RESOURCE_EXHAUSTED", 500: "INTERNAL", 503: "UNAVAILABLE"}
+
+
+class FakeTTSBackend:
+    """
+    Request handling of the stand-in server, independent of HTTP.
+
+    Args:
+        latency_ms: Mean delay of a successful request
+        latency_dist: One of LATENCY_DISTRIBUTIONS
+        latency_spread: Width of the uniform distribution (in ms) or sigma of
+            the lognormal one; ignored otherwise
+        resource_exhausted_rate: Fraction of requests failed with RESOURCE_EXHAUSTED
+        unavailable_rate: Fraction of requests failed with UNAVAILABLE
+        truncated_rate: Fraction of responses cut short after the WAV header
+        silent_rate: Fraction of responses containing only silence
+        quota_per_second: Requests accepted per second (None = unlimited)
+        broken_voices: Voice names whose every request fails with INTERNAL
+        seed: Seed for latency and fault injection
+    """
+
+    def __init__(
+        self,
+        latency_ms=0.0,
+        latency_dist="fixed",
+        latency_spread=0.0,
+        resource_exhausted_rate=0.0,
+        unavailable_rate=0.0,
+        truncated_rate=0.0,
+        silent_rate=0.0,
+        quota_per_second=None,
+        broken_voices=(),
+        seed=None,
+    ):
+        if latency_dist not in LATENCY_DISTRIBUTIONS:
+            raise ValueError(f"Unknown latency distribution: {latency_dist}")
+        self.latency_ms = latency_ms
+        self.latency_dist = latency_dist
+        self.latency_spread = latency_spread
+        self.resource_exhausted_rate = resource_exhausted_rate
+        self.unavailable_rate = unavailable_rate
+        self.truncated_rate = truncated_rate
+        self.silent_rate = silent_rate
+        self.quota_per_second = quota_per_second
+        self.broken_voices = set(broken_voices)
+
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._quota_window = None
+        self._quota_used = 0
+        self.stats = {
+            "requests": 0,
+            "ok": 0,
+            "quota_exceeded": 0,
+            "resource_exhausted": 0,
+            "unavailable": 0,
+            "invalid": 0,
+            "broken_voice": 0,
+            "truncated": 0,
+            "silent": 0,
+            "latency_seconds": 0.0,
+        }
+        self.started = time.monotonic()
+
+    def sample_latency(self):
+        """Return the delay for one request, in seconds."""
+        mean = self.latency_ms / 1000
+        with self._lock:
+            if self.latency_dist == "fixed" or mean <= 0:
+                return max(mean, 0.0)
+            if self.latency_dist == "uniform":
+                spread = self.latency_spread / 1000
+                return max(self._random.uniform(mean - spread / 2, mean + spread / 2), 0.0)
+            if self.latency_dist == "exponential":
+                return self._random.expovariate(1 / mean)
+            # Lognormal with the requested mean: long tails like a loaded backend
+            sigma = self.latency_spread
+            return self._random.lognormvariate(math.log(mean) - sigma ** 2 / 2, sigma)
+
+    def _count(self, key, amount=1):
+        with self._lock:
+            self.stats[key] += amount
+
+    def _admit(self):
+        """
+        Decide whether a request is rejected before synthesis.
+
+        Returns:
+            (http_status, message) for a rejected request, or None
+        """
+        with self._lock:
+            self.stats["requests"] += 1
+            if self.quota_per_second is not None:
+                window = int(time.monotonic())
+                if window != self._quota_window:
+                    self._quota_window, self._quota_used = window, 0
+                if self._quota_used >= self.quota_per_second:
+                    self.stats["quota_exceeded"] += 1
+                    return 429, "Quota exceeded for quota metric 'Requests' and limit 'Requests per second'."
+                self._quota_used += 1
+            roll = self._random.random()
+        if roll < self.resource_exhausted_rate:
+            self._count("resource_exhausted")
+            return 429, "Resource has been exhausted (injected)."
+        if roll < self.resource_exhausted_rate + self.unavailable_rate:
+            self._count("unavailable")
+            return 503, "The service is currently unavailable (injected)."
+        return None
+
+    def synthesize(self, api_version, body):
+        """
+        Handle one text:synthesize request body (decoded JSON).
+
+        Returns:
+            (http_status, response dict)
+        """
+        rejected = self._admit()
+        if rejected is not None:
+            return error_response(*rejected)
+
+        synthesis_input = body.get("input", {})
+        voice_name = body.get("voice", {}).get("name", "")
+        encoding = body.get("audioConfig", {}).get("audioEncoding", "LINEAR16")
+        if encoding not in LINEAR16_ENCODINGS:
+            self._count("invalid")
+            return error_response(400, f"Only LINEAR16 is supported by the stand-in server, got {encoding}.")
+        if not synthesis_input.get("text") and not synthesis_input.get("ssml"):
+            self._count("invalid")
+            return error_response(400, "Either `input.text` or `input.ssml` is required.")
+        if voice_name in self.broken_voices:
+            self._count("broken_voice")
+            return error_response(500, f"Internal error synthesizing with {voice_name} (injected).")
+
+        delay = self.sample_latency()
+        time.sleep(delay)
+        self._count("latency_seconds", delay)
+
+        if synthesis_input.get("ssml"):
+            samples, marks = synthesize_ssml_like(synthesis_input["ssml"], voice_name)
+        else:
+            samples, marks = synthesize_speech_like(synthesis_input["text"], voice_name), []
+
+        with self._lock:
+            roll = self._random.random()
+            cut = self._random.uniform(0.05, 0.5)
+        if roll < self.silent_rate:
+            self._count("silent")
+            samples = samples * 0
+        audio = linear16_wav(samples, FAKE_SAMPLE_RATE)
+        if self.silent_rate <= roll < self.silent_rate + self.truncated_rate:
+            # Keep the header (which still describes the full length) and part of the data
+            self._count("truncated")
+            audio = audio[:PCM16_HEADER_SIZE + int((len(audio) - PCM16_HEADER_SIZE) * cut) // 2 * 2]
+
+        response = {
+            "audioContent": base64.b64encode(audio).decode("ascii"),
+            "audioConfig": {"audioEncoding": "LINEAR16", "sampleRateHertz": FAKE_SAMPLE_RATE},
+        }
+        if api_version == "v1beta1" and any(kind in SSML_MARK_TIMEPOINTS for kind in body.get("enableTimePointing", [])):
+            response["timepoints"] = [{"markName": name, "timeSeconds": seconds} for name, seconds in marks]
+        self._count("ok")
+        return 200, response
+
+    def snapshot(self):
+        """Return the counters, with the mean latency and request rate so far."""
+        with self._lock:
+            stats = dict(self.stats)
+        elapsed = time.monotonic() - self.started
+        stats["mean_latency_ms"] = 1000 * stats["latency_seconds"] / stats["ok"] if stats["ok"] else 0.0
+        stats["requests_per_second"] = stats["requests"] / elapsed if elapsed else 0.0
+        return stats
+
+
+def error_response(http_status, message):
+    """Return (http_status, body) in the error format of Google REST APIs."""
+    return http_status, {"error": {"code": http_status, "message": message, "status": ERROR_STATUSES[http_status]}}
+
+
+def make_handler(backend):
+    """Return a request handler class serving ``backend``."""
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _send_json(self, http_status, payload):
+            data = json.dumps(payload).encode("utf-8")
+            self.send_response(http_status)
+            self.send_header("Content-Type", "application/json; charset=UTF-8")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_POST(self):
+            api_version = SYNTHESIZE_PATHS.get(urlsplit(self.path).path)
+            length = int(self.headers.get("Content-Length", 0))
+            raw = self.rfile.read(length)
+            if api_version is None:
+                self._send_json(404, {"error": {"code": 404, "message": f"Unknown method {self.path}", "status": "NOT_FOUND"}})
+                return
+            try:
+                body = json.loads(raw or b"{}")
+            except ValueError:
+                self._send_json(*error_response(400, "Request body is not valid JSON."))
+                return
+            self._send_json(*backend.synthesize(api_version, body))
+
+        def do_GET(self):
+            url = urlsplit(self.path)
+            if url.path == "/stats":
+                self._send_json(200, backend.snapshot())
+            elif url.path in LIST_VOICES_PATHS:
+                language_code = parse_qs(url.query).get("languageCode", [""])[0]
+                self._send_json(200, {"voices": [
+                    {"languageCodes": [code], "name": name, "naturalSampleRateHertz": FAKE_SAMPLE_RATE}
+                    for code, names in FALLBACK_VOICES.items() if not language_code or code == language_code
+                    for name in names
+                ]})
+            else:
+                self._send_json(404, {"error": {"code": 404, "message": "Not found", "status": "NOT_FOUND"}})
+
+        def log_message(self, format, *args):
+            pass  # one line per request would drown the console at load-test rates
+
+    return Handler
+
+
+def print_stats(stats):
+    table = Table(title="Stand-in TTS Server", box=box.ROUNDED)
+    table.add_column("Metric", style="cyan")
+    table.add_column("Value", style="green", justify="right")
+    for key in (
+        "requests", "ok", "quota_exceeded", "resource_exhausted", "unavailable", "invalid", "broken_voice",
+        "truncated", "silent",
+    ):
+        table.add_row(key.replace("_", " ").capitalize(), str(stats[key]))
+    table.add_row("Mean latency", f"{stats['mean_latency_ms']:.0f} ms")
+    table.add_row("Requests/s", f"{stats['requests_per_second']:.1f}")
+    console.print(table)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in for the Cloud Text-to-Speech REST API")
+    parser.add_argument("--host", default="127.0.0.1", help="Address to listen on (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8080, help="Port to listen on (default: 8080)")
+    parser.add_argument(
+        "--latency-ms",
+        type=float,
+        default=0.0,
+        help="Mean latency of a successful request in ms (default: 0)",
+    )
+    parser.add_argument(
+        "--latency-dist",
+        choices=LATENCY_DISTRIBUTIONS,
+        default="fixed",
+        help="Latency distribution (default: fixed)",
+    )
+    parser.add_argument(
+        "--latency-spread",
+        type=float,
+        default=0.5,
+        help="Width in ms of the uniform distribution, or sigma of the lognormal one (default: 0.5)",
+    )
+    parser.add_argument(
+        "--resource-exhausted-rate",
+        type=float,
+        default=0.0,
+        help="Fraction of requests answered with RESOURCE_EXHAUSTED / HTTP 429 (default: 0)",
+    )
+    parser.add_argument(
+        "--unavailable-rate",
+        type=float,
+        default=0.0,
+        help="Fraction of requests answered with UNAVAILABLE / HTTP 503 (default: 0)",
+    )
+    parser.add_argument(
+        "--truncated-rate",
+        type=float,
+        default=0.0,
+        help="Fraction of responses cut short after the WAV header (default: 0)",
+    )
+    parser.add_argument(
+        "--silent-rate",
+        type=float,
+        default=0.0,
+        help="Fraction of responses that contain only silence (default: 0)",
+    )
+    parser.add_argument(
+        "--quota-per-second",
+        type=int,
+        default=None,
+        help="Requests accepted per second; the rest get RESOURCE_EXHAUSTED (default: unlimited)",
+    )
+    parser.add_argument(
+        "--broken-voice",
+        action="append",
+        default=[],
+        help="Voice whose requests all fail with INTERNAL / HTTP 500 (repeatable)",
+    )
+    parser.add_argument("--seed", type=int, default=None, help="Seed for latency and fault injection")
+    args = parser.parse_args()
+
+    backend = FakeTTSBackend(
+        latency_ms=args.latency_ms,
+        latency_dist=args.latency_dist,
+        latency_spread=args.latency_spread,
+        resource_exhausted_rate=args.resource_exhausted_rate,
+        unavailable_rate=args.unavailable_rate,
+        truncated_rate=args.truncated_rate,
+        silent_rate=args.silent_rate,
+        quota_per_second=args.quota_per_second,
+        broken_voices=args.broken_voice,
+        seed=args.seed,
+    )
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(backend))
+    server.daemon_threads = True
+
+    console.print("[bold blue]Stand-in TTS Server[/bold blue]")
+    console.print(f"[green]Listening on http://{args.host}:{server.server_port}[/green]")
+    console.print(f"Use: python make_tree_audio.py --tts-endpoint http://{args.host}:{server.server_port}")
+    # Print the stats when stopped with kill as well as with Ctrl+C
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        console.print()
+        print_stats(backend.snapshot())
+
+
+if __name__ == "__main__":
+    main()
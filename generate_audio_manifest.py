@@ -2,36 +2,268 @@
 # /// script
 # requires-python = ">=3.12"
 # dependencies = [
+# "numpy",
+# "soundfile",
 # "rich"
 # ]
 # ///
 
 """
-Script to generate an audio manifest JSON file that lists all available audio files.
+Script to generate the audio manifest JSON files that list all available audio files.
 This replaces the need for the frontend to make hundreds of HEAD requests to discover files.
+
+Every language directory under public/audio gets its own
+<lang>/audio_manifest.json, which the frontend loads for the language being
+practised; --languages limits a run to some of them.
+
+Each word directory is read in a single os.scandir pass. The result of every
+scan is kept in a small cache file together with the directory mtime, so a
+rerun only rescans the directories that gained, lost or replaced files (all
+the audio tools write by renaming into place, which updates the mtime).
+
+Every file is listed with its size, header duration, sample rate and a
+BLAKE2b hash, so clients can tell a regenerated recording from a cached copy
+without downloading it. Files in a rescanned directory whose size and mtime
+are unchanged keep their previous hash, and hashes other tools stored in the
+shared audio_features cache are reused too.
+
+With --publish, every file is also placed under <lang>/_hashed/ with its hash
+as the name and the manifest lists that URL, so the worker can serve audio as
+immutable and only regenerated clips get new URLs. The published copies are
+hard links, but copying public/ into dist/ breaks them; npm run audio2dist
+runs --link-dist afterwards to link them again, so dist/ holds the audio once.
+
+When the recordings are generated on several machines with
+make_tree_audio.py --shard i/N, each shard writes a partial manifest of the
+files it owns to <lang>/_shards/. --merge combines those (and, with
+--merge-state, the shards' job state databases) into one manifest without
+rescanning the tree.
 """
 
+import argparse
+import hashlib
 import json
+import math
 import os
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from rich.console import Console
 from rich.progress import Progress, SpinnerColumn, TextColumn, BarColumn
+from audio_features import AudioFeatureCache, DEFAULT_FEATURE_CACHE_PATH
+from job_state import JobStateDB, DEFAULT_STATE_PATH
+from wav_io import parse_wav_header
 
 console = Console()
 
-def scan_audio_directory(audio_base_path):
+# Source recordings plus the delivery formats written by encode_audio.py
+AUDIO_EXTENSIONS = ['wav', 'mp3', 'opus', 'm4a']
+
+DEFAULT_AUDIO_ROOT = Path("public", "audio")
+
+# Written to each language's word tree and fetched by the frontend
+MANIFEST_FILENAME = "audio_manifest.json"
+
+# Per-directory scan results from the previous run (kept out of public/)
+DEFAULT_SCAN_CACHE_PATH = Path(".audio_manifest_cache.json")
+SCAN_CACHE_VERSION = 3
+
+# Directories modified this recently may still change within the same mtime
+# tick, so their scan is not cached
+RACY_MTIME_WINDOW_NS = 2_000_000_000
+
+HASH_CHUNK_SIZE = 1 << 20
+HASH_DIGEST_SIZE = 16
+
+# Content-addressed copies made by --publish, served with immutable caching
+PUBLISHED_DIRNAME = "_hashed"
+
+# Partial manifests written by make_tree_audio.py --shard, merged by --merge
+SHARD_MANIFEST_DIRNAME = "_shards"
+SHARD_MANIFEST_VERSION = 1
+
+def scan_word_directory(word_dir_path, transliteration):
+    """
+    List the recordings of one word directory in a single pass.
+
+    Returns:
+        {extension: {voice: [size, mtime_ns]}}
+    """
+    prefix = f"{transliteration}_"
+    stamps = {}
+
+    with os.scandir(word_dir_path) as entries:
+        for dir_entry in entries:
+            # Extract voice name from filename: transliteration_voicename.ext
+            stem, dot, ext = dir_entry.name.rpartition('.')
+            if not dot or ext not in AUDIO_EXTENSIONS or not stem.startswith(prefix):
+                continue
+            if not dir_entry.is_file():
+                continue
+            st = dir_entry.stat()
+            stamps.setdefault(ext, {})[stem[len(prefix):]] = [st.st_size, st.st_mtime_ns]
+
+    return stamps
+
+def describe_audio_file(file_path, ext):
+    """
+    Hash one recording and read its duration and sample rate from the header.
+
+    Returns:
+        dict with "duration" (seconds, None if unknown), "sample_rate" (None if
+        unknown) and "hash" (BLAKE2b-128 of the file contents, hex)
+    """
+    hasher = hashlib.blake2b(digest_size=HASH_DIGEST_SIZE)
+    with open(file_path, 'rb') as f:
+        head = f.read(HASH_CHUNK_SIZE)
+        hasher.update(head)
+        while chunk := f.read(HASH_CHUNK_SIZE):
+            hasher.update(chunk)
+
+    duration = sample_rate = None
+    try:
+        if ext == 'wav':
+            header = parse_wav_header(head)
+            duration, sample_rate = header["duration"], header["sample_rate"]
+        elif ext != 'm4a':  # libsndfile has no AAC/MP4 reader
+            import soundfile as sf
+            info = sf.info(str(file_path))
+            duration, sample_rate = info.duration, info.samplerate
+    except Exception:
+        pass  # Unreadable header: still listed, hashed and sized
+
+    return {
+        "duration": None if duration is None else round(duration, 3),
+        "sample_rate": sample_rate,
+        "hash": hasher.hexdigest(),
+    }
+
+def cached_file_info(features, file_path, stamp):
+    """
+    Return the describe_audio_file result stored in the feature cache for an
+    unchanged file, or None if ``features`` is None or has no hash for it.
+    """
+    row = features.get(file_path, *stamp) if features is not None else None
+    if row is None or not row["hash"]:
+        return None
+    return {
+        "duration": None if math.isnan(row["duration"]) else round(row["duration"], 3),
+        "sample_rate": None if math.isnan(row["sample_rate"]) else int(row["sample_rate"]),
+        "hash": row["hash"],
+    }
+
+def build_word_entry(stamps, file_info):
+    """
+    Build the manifest entry for one word.
+
+    Args:
+        stamps: {extension: {voice: [size, mtime_ns]}} from scan_word_directory
+        file_info: {extension: {voice: describe_audio_file result}}
+
+    Returns:
+        The entry dict, or None if the word has no recordings
+    """
+    if not stamps:
+        return None
+
+    voices = sorted(set().union(*stamps.values()))
+
+    # Use the first extension found (prefer wav over mp3)
+    extension = 'wav' if 'wav' in stamps else 'mp3' if 'mp3' in stamps else next(iter(stamps))
+
+    # Formats available for every voice, smallest first, so the client
+    # can pick the first one it can play
+    formats = sorted(
+        (ext for ext, files in stamps.items() if len(files) == len(voices)),
+        key=lambda ext: (sum(size for size, _ in stamps[ext].values()), AUDIO_EXTENSIONS.index(ext)),
+    )
+
+    files = {
+        ext: {
+            voice: {"size": stamps[ext][voice][0], **file_info[ext][voice]}
+            for voice in sorted(stamps[ext])
+        }
+        for ext in AUDIO_EXTENSIONS if ext in stamps
+    }
+
+    return {
+        "voices": voices,
+        "extension": extension,
+        "formats": formats,
+        "files": files
+    }
+
+def find_languages(audio_root, languages=None):
+    """Return the language directories below ``audio_root`` (or those of ``languages`` that exist)."""
+    audio_root = Path(audio_root)
+    if languages is None:
+        languages = (entry.name for entry in audio_root.iterdir() if entry.is_dir() and not entry.name.startswith('_'))
+    return sorted(language for language in languages if (audio_root / language).is_dir())
+
+def load_scan_cache(cache_path):
+    """Return the cached per-directory scans, {resolved word tree path: dirs}, or {} if there are none."""
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            cache = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+    if cache.get("version") != SCAN_CACHE_VERSION:
+        return {}
+    return cache.get("trees", {})
+
+def save_scan_cache(cache_path, trees):
+    """Write the per-directory scans of ``trees`` atomically, keeping those of the other word trees."""
+    cache_path = Path(cache_path)
+    tmp_path = cache_path.with_name(f".{cache_path.name}.{os.getpid()}.tmp")
+    cache = {"version": SCAN_CACHE_VERSION, "trees": {**load_scan_cache(cache_path), **trees}}
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(json.dumps(cache, ensure_ascii=False, separators=(',', ':')))
+    os.replace(tmp_path, cache_path)
+
+def scanned_file_paths(audio_base_path, dirs):
+    """Yield the path of every recording listed in the per-directory scans."""
+    for transliteration, scan in dirs.items():
+        for ext, voices in scan["stamps"].items():
+            for voice in voices:
+                yield os.path.join(audio_base_path, transliteration, f"{transliteration}_{voice}.{ext}")
+
+def scan_audio_directory(audio_base_path, cached_dirs=None, workers=1, features=None):
     """
     Scan the audio directory and create a manifest of available files.
-    
+
+    Args:
+        audio_base_path: Word tree to scan (e.g. public/audio/bn-IN)
+        cached_dirs: This tree's per-directory scans from load_scan_cache;
+            directories whose mtime is unchanged are taken from here instead
+            of being rescanned
+        workers: Threads used to scan the changed directories
+        features: Optional AudioFeatureCache shared with the other audio tools;
+            files it already has a hash for are not read again
+
     Returns:
-        dict: Manifest with structure:
+        (manifest, dirs, rescanned): the manifest, the per-directory scans to
+        pass to save_scan_cache, and the number of directories actually read.
+        The manifest has the structure:
         {
             "words": {
                 "transliteration": {
                     "voices": ["voice1", "voice2", ...],
-                    "extension": "wav|mp3"
+                    "extension": "wav|mp3",
+                    "formats": ["opus", "mp3", "wav"],  # complete formats, smallest first
+                    "files": {
+                        "wav": {
+                            "voice1": {"size": int, "duration": float|null, "sample_rate": int|null, "hash": "blake2b-128 hex",
+                                       "url": "audio/<lang>/_hashed/..."}  # url only with --publish
+                        }
+                    }
                 }
             },
+            "sprites": {  # only if pack_audio_sprites.py has been run
+                "format": "opus",
+                "packs": {"name": {"url": "audio/...pack", "size": int}},
+                "words": {"transliteration": {"pack": "name", "voices": {"voice": {"offset": int, "length": int, ...}}}}
+            },
             "generated_at": "ISO timestamp",
             "total_words": int,
             "total_files": int
@@ -43,109 +275,584 @@ def scan_audio_directory(audio_base_path):
         "total_words": 0,
         "total_files": 0
     }
+    cached_dirs = cached_dirs or {}
     
     audio_path = Path(audio_base_path)
     if not audio_path.exists():
         console.print(f"[red]Audio directory not found: {audio_path}[/red]")
-        return manifest
-    
-    # Find all word directories
-    word_dirs = [d for d in audio_path.iterdir() if d.is_dir()]
-    
-    total_files = 0
+        return manifest, {}, 0
     
+    # Find all word directories and their mtimes
+    with os.scandir(audio_path) as entries:
+        word_dirs = sorted(
+            (dir_entry.name, dir_entry.path, dir_entry.stat().st_mtime_ns)
+            for dir_entry in entries
+            if dir_entry.is_dir() and not dir_entry.name.startswith('_')
+        )
+
+    dirs = {}
+    to_scan = []
+    for transliteration, path, mtime_ns in word_dirs:
+        cached = cached_dirs.get(transliteration)
+        if cached is not None and cached["mtime_ns"] == mtime_ns:
+            dirs[transliteration] = cached
+        else:
+            to_scan.append((transliteration, path, mtime_ns))
+
+    racy_before = time.time_ns() - RACY_MTIME_WINDOW_NS
+
     with Progress(
         SpinnerColumn(),
         TextColumn("[progress.description]{task.description}"),
         BarColumn(),
         TextColumn("[progress.percentage]{task.percentage:>3.0f}%"),
-        console=console
-    ) as progress:
+        console=console,
+        transient=not to_scan
+    ) as progress, ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
         
-        task = progress.add_task("Scanning audio files...", total=len(word_dirs))
+        task = progress.add_task("Scanning audio files...", total=len(to_scan))
         
-        for word_dir in word_dirs:
-            transliteration = word_dir.name
-            
-            # Find all audio files in this word's directory
-            audio_files = []
-            extensions_found = set()
-            
-            # Look for both wav and mp3 files
-            for ext in ['wav', 'mp3']:
-                pattern = f"{transliteration}_*.{ext}"
-                files = list(word_dir.glob(pattern))
-                if files:
-                    extensions_found.add(ext)
-                    for file_path in files:
-                        # Extract voice name from filename: transliteration_voicename.ext
-                        filename = file_path.stem  # Remove extension
-                        if filename.startswith(f"{transliteration}_"):
-                            voice_name = filename[len(f"{transliteration}_"):]
-                            audio_files.append(voice_name)
-                            total_files += 1
-            
-            if audio_files:
-                # Use the first extension found (prefer wav over mp3)
-                extension = 'wav' if 'wav' in extensions_found else 'mp3'
-                
-                manifest["words"][transliteration] = {
-                    "voices": sorted(list(set(audio_files))),  # Remove duplicates and sort
-                    "extension": extension
-                }
-            
+        listings = {}
+        scans = pool.map(lambda job: scan_word_directory(job[1], job[0]), to_scan)
+        for (transliteration, _, _), stamps in zip(to_scan, scans):
+            listings[transliteration] = stamps
             progress.update(task, advance=1, description=f"Scanned {transliteration}")
+
+        # Reuse the metadata of files whose size and mtime are unchanged; hash the rest
+        file_info = {}
+        to_describe = []
+        for transliteration, path, _ in to_scan:
+            cached = cached_dirs.get(transliteration) or {}
+            old_stamps = cached.get("stamps", {})
+            old_files = (cached.get("entry") or {}).get("files", {})
+            for ext, voices in listings[transliteration].items():
+                for voice, stamp in voices.items():
+                    if old_stamps.get(ext, {}).get(voice) == stamp:
+                        info = dict(old_files[ext][voice])
+                        del info["size"]
+                        file_info.setdefault(transliteration, {}).setdefault(ext, {})[voice] = info
+                        continue
+                    file_path = os.path.join(path, f"{transliteration}_{voice}.{ext}")
+                    info = cached_file_info(features, file_path, stamp)
+                    if info is not None:
+                        file_info.setdefault(transliteration, {}).setdefault(ext, {})[voice] = info
+                    else:
+                        to_describe.append((transliteration, ext, voice, file_path))
+
+        task = progress.add_task("Hashing audio files...", total=len(to_describe))
+        described = pool.map(lambda job: describe_audio_file(job[3], job[1]), to_describe)
+        for (transliteration, ext, voice, file_path), info in zip(to_describe, described):
+            file_info.setdefault(transliteration, {}).setdefault(ext, {})[voice] = info
+            if features is not None:
+                features.update(file_path, *listings[transliteration][ext][voice], **info)
+            progress.update(task, advance=1, description=f"Hashed {os.path.basename(file_path)}")
+
+    for transliteration, _, mtime_ns in to_scan:
+        stamps = listings[transliteration]
+        dirs[transliteration] = {
+            # A racy mtime never matches, so the directory is rescanned next time
+            "mtime_ns": mtime_ns if mtime_ns < racy_before else -1,
+            "stamps": stamps,
+            "entry": build_word_entry(stamps, file_info.get(transliteration, {})),
+        }
     
+    total_files = 0
+    for transliteration, _, _ in word_dirs:
+        if dirs[transliteration]["entry"] is not None:
+            manifest["words"][transliteration] = dirs[transliteration]["entry"]
+            total_files += sum(len(voices) for voices in dirs[transliteration]["stamps"].values())
+
+    # Publish the sprite pack index written by pack_audio_sprites.py, if any
+    sprites = load_sprite_index(audio_path)
+    if sprites:
+        manifest["sprites"] = sprites
+
     # Update totals
     manifest["total_words"] = len(manifest["words"])
     manifest["total_files"] = total_files
     manifest["generated_at"] = __import__('datetime').datetime.now().isoformat()
     
-    return manifest
+    return manifest, dirs, len(to_scan)
+
+def build_shard_manifest(audio_base_path, recordings, shard, shard_count, features=None, workers=1):
+    """
+    Describe the files of the recordings one shard owns, for merge_shard_manifests.
+
+    Only the word directories of ``recordings`` are read (one os.scandir pass
+    each), and only files of owned voices are listed and hashed.
+
+    Args:
+        audio_base_path: Word tree the shard wrote to (e.g. public/audio/bn-IN)
+        recordings: Iterable of (transliteration, minimal voice name) owned by the shard
+        shard: Shard number, 1..shard_count
+        shard_count: Total number of shards
+        features: Optional AudioFeatureCache; files it has a hash for are not read again
+        workers: Threads used to scan and hash
+
+    Returns:
+        {"version", "shard", "shard_count", "generated_at",
+         "words": {transliteration: {extension: {voice: {"size", "mtime_ns", "duration", "sample_rate", "hash"}}}}}
+    """
+    audio_path = Path(audio_base_path)
+    owned = {}
+    for transliteration, voice in recordings:
+        owned.setdefault(transliteration, set()).add(voice)
+
+    def scan(transliteration):
+        try:
+            return scan_word_directory(audio_path / transliteration, transliteration)
+        except FileNotFoundError:
+            return {}
+
+    words = {}
+    to_describe = []
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        for transliteration, stamps in zip(owned, pool.map(scan, owned)):
+            for ext, voices in stamps.items():
+                for voice, stamp in voices.items():
+                    if voice not in owned[transliteration]:
+                        continue
+                    file_path = str(audio_path / transliteration / f"{transliteration}_{voice}.{ext}")
+                    info = cached_file_info(features, file_path, stamp)
+                    if info is None:
+                        to_describe.append((transliteration, ext, voice, file_path, stamp))
+                        continue
+                    words.setdefault(transliteration, {}).setdefault(ext, {})[voice] = {
+                        "size": stamp[0], "mtime_ns": stamp[1], **info
+                    }
+
+        described = pool.map(lambda job: describe_audio_file(job[3], job[1]), to_describe)
+        for (transliteration, ext, voice, file_path, stamp), info in zip(to_describe, described):
+            words.setdefault(transliteration, {}).setdefault(ext, {})[voice] = {
+                "size": stamp[0], "mtime_ns": stamp[1], **info
+            }
+            if features is not None:
+                features.update(file_path, *stamp, **info)
+
+    return {
+        "version": SHARD_MANIFEST_VERSION,
+        "shard": shard,
+        "shard_count": shard_count,
+        "generated_at": __import__('datetime').datetime.now().isoformat(),
+        "words": dict(sorted(words.items())),
+    }
+
+def shard_manifest_path(audio_base_path, shard, shard_count):
+    """Default location of a shard's partial manifest: <audio dir>/_shards/shard-<i>-of-<N>.json."""
+    return Path(audio_base_path) / SHARD_MANIFEST_DIRNAME / f"shard-{shard}-of-{shard_count}.json"
+
+def load_shard_manifests(paths):
+    """Load partial manifests, oldest first; raises ValueError for unknown versions."""
+    partials = []
+    for path in paths:
+        with open(path, 'r', encoding='utf-8') as f:
+            partial = json.load(f)
+        if partial.get("version") != SHARD_MANIFEST_VERSION:
+            raise ValueError(f"{path}: unsupported shard manifest version {partial.get('version')!r}")
+        partials.append(partial)
+    return sorted(partials, key=lambda partial: partial["generated_at"])
+
+def merge_shard_manifests(partials, audio_base_path):
+    """
+    Combine the partial manifests of a sharded run into one manifest.
+
+    No audio is read: entries are built from the sizes, durations and hashes
+    the shards recorded. If a recording is listed by more than one partial
+    (a shard was rerun), the most recently generated one wins.
+
+    Args:
+        partials: Partial manifests from load_shard_manifests
+        audio_base_path: Word tree the shards wrote to, for the sprite index
+
+    Returns:
+        (manifest, missing): the manifest (same structure as
+        scan_audio_directory's) and the sorted shard numbers with no partial
+
+    Raises:
+        ValueError: if the partials disagree on the number of shards
+    """
+    shard_counts = {partial["shard_count"] for partial in partials}
+    if len(shard_counts) > 1:
+        raise ValueError(f"Partial manifests come from runs with different shard counts: {sorted(shard_counts)}")
+    shard_count = shard_counts.pop() if shard_counts else 0
+    missing = sorted(set(range(1, shard_count + 1)) - {partial["shard"] for partial in partials})
+
+    stamps = {}
+    file_info = {}
+    for partial in partials:
+        for transliteration, extensions in partial["words"].items():
+            for ext, voices in extensions.items():
+                for voice, info in voices.items():
+                    info = dict(info)
+                    stamp = [info.pop("size"), info.pop("mtime_ns")]
+                    stamps.setdefault(transliteration, {}).setdefault(ext, {})[voice] = stamp
+                    file_info.setdefault(transliteration, {}).setdefault(ext, {})[voice] = info
+
+    manifest = {"words": {}, "generated_at": "", "total_words": 0, "total_files": 0}
+    total_files = 0
+    for transliteration in sorted(stamps):
+        entry = build_word_entry(stamps[transliteration], file_info[transliteration])
+        if entry is not None:
+            manifest["words"][transliteration] = entry
+            total_files += sum(len(voices) for voices in stamps[transliteration].values())
+
+    sprites = load_sprite_index(audio_base_path)
+    if sprites:
+        manifest["sprites"] = sprites
+
+    manifest["total_words"] = len(manifest["words"])
+    manifest["total_files"] = total_files
+    manifest["generated_at"] = __import__('datetime').datetime.now().isoformat()
+    return manifest, missing
+
+def write_manifest(manifest, path):
+    """Write ``manifest`` to ``path`` atomically as compact JSON."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    # Compact, and encoded in one call (json.dump streams through the pure-Python encoder)
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(json.dumps(manifest, ensure_ascii=False, separators=(',', ':')))
+    os.replace(tmp_path, path)
+
+def load_sprite_index(audio_path):
+    """
+    Load _packs/sprites.json and reshape it for the client.
+
+    Returns:
+        dict with the pack "format", "packs" (name -> url and size) and "words"
+        (transliteration -> pack name and per-voice byte/sample offsets), or None
+    """
+    index_path = Path(audio_path) / "_packs" / "sprites.json"
+    if not index_path.exists():
+        return None
+
+    with open(index_path, 'r', encoding='utf-8') as f:
+        index = json.load(f)
+
+    sprites = {"format": index["format"], "by": index["by"], "packs": {}, "words": {}}
+    for pack_name, pack in index["packs"].items():
+        sprites["packs"][pack_name] = {"url": pack["url"], "size": pack["size"]}
+        if "hash" in pack:
+            sprites["packs"][pack_name]["hash"] = pack["hash"]
+        for transliteration, voices in pack["words"].items():
+            sprites["words"][transliteration] = {"pack": pack_name, "voices": voices}
+    return sprites
+
+def hash_file(file_path):
+    """Return the BLAKE2b hash used in the manifest for the file at ``file_path``."""
+    hasher = hashlib.blake2b(digest_size=HASH_DIGEST_SIZE)
+    with open(file_path, 'rb') as f:
+        while chunk := f.read(HASH_CHUNK_SIZE):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+def publish_file(source, published_dir, file_hash, suffix):
+    """
+    Place a content-addressed copy of ``source`` at _hashed/<h[:2]>/<hash><suffix>.
+
+    The copy is a hard link where the filesystem allows it. Because the audio
+    tools replace files by renaming, a link keeps the old contents after the
+    source is regenerated, exactly as an immutable URL requires.
+
+    Returns:
+        (path, created)
+    """
+    target = published_dir / file_hash[:2] / f"{file_hash}{suffix}"
+    if target.exists():
+        return target, False
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = target.with_name(f".{target.name}.{os.getpid()}.tmp")
+    try:
+        os.link(source, tmp_path)
+    except OSError:
+        shutil.copyfile(source, tmp_path)
+    os.replace(tmp_path, target)
+    return target, True
+
+def publish_hashed_files(manifest, dirs, audio_base_path, prune=True):
+    """
+    Publish every recording (and sprite pack) under a content-hashed name.
+
+    Args:
+        manifest: Manifest from scan_audio_directory
+        dirs: Per-directory scans from scan_audio_directory, used to make sure
+            a file has not changed since it was hashed
+        audio_base_path: Word tree the manifest was built from
+        prune: Remove published files no longer referenced by the manifest
+
+    Returns:
+        (manifest, created, pruned, skipped): a copy of the manifest with a
+        "url" on every published file and pack, and the number of files
+        published, removed and skipped because they changed after scanning
+    """
+    audio_path = Path(audio_base_path)
+    public_root = audio_path.parent.parent
+    published_dir = audio_path / PUBLISHED_DIRNAME
+    referenced = set()
+    created = skipped = 0
+
+    published = {**manifest, "words": {}}
+    for transliteration, entry in manifest["words"].items():
+        stamps = dirs[transliteration]["stamps"]
+        files = {}
+        for ext, voices in entry["files"].items():
+            files[ext] = {}
+            for voice, info in voices.items():
+                source = audio_path / transliteration / f"{transliteration}_{voice}.{ext}"
+                try:
+                    st = source.stat()
+                except FileNotFoundError:
+                    st = None
+                if st is None or [st.st_size, st.st_mtime_ns] != stamps[ext][voice]:
+                    skipped += 1
+                    files[ext][voice] = info
+                    continue
+                target, was_created = publish_file(source, published_dir, info["hash"], f".{ext}")
+                created += was_created
+                referenced.add(target)
+                files[ext][voice] = {**info, "url": target.relative_to(public_root).as_posix()}
+        published["words"][transliteration] = {**entry, "files": files}
+
+    if "sprites" in manifest:
+        packs = {}
+        for pack_name, pack in manifest["sprites"]["packs"].items():
+            source = public_root / pack["url"]
+            pack_hash = pack.get("hash") or hash_file(source)
+            target, was_created = publish_file(source, published_dir, pack_hash, ".pack")
+            created += was_created
+            referenced.add(target)
+            packs[pack_name] = {**pack, "url": target.relative_to(public_root).as_posix()}
+        published["sprites"] = {**manifest["sprites"], "packs": packs}
+
+    pruned = 0
+    if prune and published_dir.exists():
+        for path in published_dir.glob("*/*"):
+            if path not in referenced and not path.name.startswith('.'):
+                path.unlink()
+                pruned += 1
+
+    return published, created, pruned, skipped
+
+def link_published_copies(manifest, public_root, sprites=None):
+    """
+    Hard-link the recordings in a copy of public/ to their published copies.
+
+    Copying public/ (e.g. into dist/ at build time) turns the hard links made by
+    publish_file into separate files, storing every published recording twice.
+    The plain path is kept, as the client falls back to it for files without a
+    "url", but becomes a link to the _hashed/ file again.
+
+    Args:
+        manifest: Manifest written with --publish, as found in the copy
+        public_root: Root of the copy the manifest's URLs are relative to
+        sprites: load_sprite_index of the copied language tree, to link the
+            sprite packs too
+
+    Returns:
+        (linked, missing): files relinked and published files not in the copy
+    """
+    public_root = Path(public_root)
+    pairs = []
+    for transliteration, entry in manifest["words"].items():
+        for ext, voices in entry["files"].items():
+            for voice, info in voices.items():
+                if "url" in info:
+                    hashed = public_root / info["url"]
+                    # URLs are <lang>/_hashed/<h[:2]>/<hash>.<ext>, the plain file is <lang>/<word>/
+                    plain = hashed.parents[2] / transliteration / f"{transliteration}_{voice}.{ext}"
+                    pairs.append((hashed, plain))
+    if sprites and "sprites" in manifest:
+        for pack_name, pack in manifest["sprites"]["packs"].items():
+            if pack_name in sprites["packs"]:
+                pairs.append((public_root / pack["url"], public_root / sprites["packs"][pack_name]["url"]))
+
+    linked = missing = 0
+    for hashed, plain in pairs:
+        try:
+            hashed_st, plain_st = hashed.stat(), plain.stat()
+        except FileNotFoundError:
+            missing += 1
+            continue
+        if os.path.samestat(hashed_st, plain_st) or hashed_st.st_size != plain_st.st_size:
+            continue
+        tmp_path = plain.with_name(f".{plain.name}.{os.getpid()}.tmp")
+        os.link(hashed, tmp_path)
+        os.replace(tmp_path, plain)
+        linked += 1
+    return linked, missing
 
 def main():
+    parser = argparse.ArgumentParser(description="Generate the audio manifest used by the frontend")
+    parser.add_argument(
+        "--audio-root",
+        default=str(DEFAULT_AUDIO_ROOT),
+        help=f"Root of the <lang>/<word>/ recordings; each language gets its own <lang>/{MANIFEST_FILENAME} "
+             f"(default: {DEFAULT_AUDIO_ROOT})",
+    )
+    parser.add_argument(
+        "--languages",
+        nargs="+",
+        default=None,
+        help="Only generate the manifests of these language directories (default: all)",
+    )
+    parser.add_argument(
+        "--cache-file",
+        default=str(DEFAULT_SCAN_CACHE_PATH),
+        help=f"Per-directory scan cache (default: {DEFAULT_SCAN_CACHE_PATH})",
+    )
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help="Ignore the scan cache and rescan every directory",
+    )
+    parser.add_argument(
+        "--feature-cache",
+        default=str(DEFAULT_FEATURE_CACHE_PATH),
+        help=f"Per-file feature cache shared with the other audio tools (default: {DEFAULT_FEATURE_CACHE_PATH})",
+    )
+    parser.add_argument(
+        "--no-feature-cache",
+        action="store_true",
+        help="Hash every changed file instead of reusing hashes from the feature cache",
+    )
+    parser.add_argument(
+        "--publish",
+        action="store_true",
+        help=f"Also publish content-hashed copies under <lang>/{PUBLISHED_DIRNAME}/ and list their URLs, "
+             "so they can be cached as immutable",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=8,
+        help="Threads used to scan changed directories (default: 8)",
+    )
+    parser.add_argument(
+        "--merge",
+        nargs="*",
+        default=None,
+        metavar="PARTIAL",
+        help="Build the manifest from the partial manifests written by make_tree_audio.py --shard instead of "
+             f"scanning the tree (default: every file in <lang>/{SHARD_MANIFEST_DIRNAME}/ of each language)",
+    )
+    parser.add_argument(
+        "--merge-state",
+        nargs="+",
+        default=None,
+        metavar="DB",
+        help="Job state databases of the shards to merge into --state-db (newest record per file wins)",
+    )
+    parser.add_argument(
+        "--state-db",
+        default=str(DEFAULT_STATE_PATH),
+        help=f"Job state database --merge-state merges into (default: {DEFAULT_STATE_PATH})",
+    )
+    parser.add_argument(
+        "--link-dist",
+        default=None,
+        metavar="DIR",
+        help="Instead of scanning, hard-link the recordings in DIR, a built copy of public/ such as dist, "
+             f"to their {PUBLISHED_DIRNAME}/ copies so the audio is stored once",
+    )
+    args = parser.parse_args()
+    if args.merge is not None and args.publish:
+        parser.error("--publish needs the files' local mtimes; run it on the merged tree without --merge")
+
     console.print("[bold blue]Audio Manifest Generator[/bold blue]")
+
+    if args.link_dist:
+        dist_root = Path(args.link_dist)
+        for manifest_path in sorted(dist_root.glob(f"audio/**/{MANIFEST_FILENAME}")):
+            with open(manifest_path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+            sprites = None
+            if "sprites" in manifest:
+                # The sprite index sits in _packs/ of the language tree the packs were published in
+                first_pack = next(iter(manifest["sprites"]["packs"].values()), None)
+                if first_pack:
+                    sprites = load_sprite_index((dist_root / first_pack["url"]).parents[2])
+            linked, missing = link_published_copies(manifest, dist_root, sprites)
+            console.print(f"[green]{manifest_path}: linked {linked} files to their published copies[/green]")
+            if missing:
+                console.print(f"[yellow]{missing} published files are missing from {dist_root}[/yellow]")
+        return
     
-    # Determine audio directory path
-    audio_base_path = Path("public/audio/bn-IN")
-    
-    if not audio_base_path.exists():
-        console.print(f"[red]Error: Audio directory not found at {audio_base_path}[/red]")
+    audio_root = Path(args.audio_root)
+    if not audio_root.exists():
+        console.print(f"[red]Error: Audio directory not found at {audio_root}[/red]")
         console.print("Make sure you're running this script from the project root directory.")
         return
-    
-    console.print(f"[green]Scanning audio directory: {audio_base_path}[/green]")
-    
-    # Generate manifest
-    manifest = scan_audio_directory(audio_base_path)
-    
-    if manifest["total_words"] == 0:
+    languages = find_languages(audio_root, args.languages)
+    if args.merge and len(languages) > 1:
+        parser.error("partial manifests given to --merge belong to one language; pass it with --languages")
+
+    if args.merge_state:
+        with JobStateDB(args.state_db) as state:
+            for db_path in args.merge_state:
+                taken = state.merge(db_path)
+                console.print(f"[green]Merged {taken} job records from {db_path} into {args.state_db}[/green]")
+
+    features = None if args.no_feature_cache or args.merge is not None else AudioFeatureCache(args.feature_cache)
+    cached_trees = {} if args.full or args.merge is not None else load_scan_cache(args.cache_file)
+    scanned_trees = {}
+    written = []
+
+    for language in languages:
+        audio_base_path = audio_root / language
+        start_time = time.perf_counter()
+        if args.merge is not None:
+            # Combine the shards' partial manifests; nothing in the tree is read
+            partial_paths = args.merge or sorted((audio_base_path / SHARD_MANIFEST_DIRNAME).glob("*.json"))
+            try:
+                manifest, missing = merge_shard_manifests(load_shard_manifests(partial_paths), audio_base_path)
+            except ValueError as e:
+                console.print(f"[red]Error: {language}: {e}[/red]")
+                raise SystemExit(1)
+            if missing:
+                console.print(f"[red]Error: {language}: no partial manifest for shards {', '.join(map(str, missing))}[/red]")
+                raise SystemExit(1)
+            source = f"merged {len(partial_paths)} partial manifests"
+        else:
+            # Rescan only the directories that changed since the last run
+            tree_key = str(audio_base_path.resolve())
+            cached_dirs = cached_trees.get(tree_key, {})
+            manifest, dirs, rescanned = scan_audio_directory(audio_base_path, cached_dirs, args.workers, features)
+            if features is not None:
+                # Forget the features of recordings that were deleted or renamed
+                features.prune(scanned_file_paths(audio_base_path, dirs), root=audio_base_path)
+            if rescanned or dirs.keys() != cached_dirs.keys():
+                scanned_trees[tree_key] = dirs
+            source = f"scanned {rescanned} of {len(dirs)} directories"
+        scan_ms = (time.perf_counter() - start_time) * 1000
+
+        if manifest["total_words"] == 0:
+            console.print(f"[yellow]{language}: no audio files found[/yellow]")
+            continue
+
+        if args.publish:
+            manifest, created, pruned, skipped = publish_hashed_files(manifest, dirs, audio_base_path)
+            console.print(f"[green]{language}: published {created} new hashed files, removed {pruned} unreferenced[/green]")
+            if skipped:
+                console.print(f"[yellow]{language}: {skipped} files changed while scanning and were not published; rerun to publish them[/yellow]")
+
+        manifest_path = audio_base_path / MANIFEST_FILENAME
+        write_manifest(manifest, manifest_path)
+        written.append(manifest_path)
+        console.print(
+            f"[cyan]{language}:[/cyan] {manifest['total_words']} words, {manifest['total_files']} files "
+            f"({source} in {scan_ms:.0f} ms) → {manifest_path}"
+        )
+
+    if features is not None:
+        features.save()
+    if scanned_trees:
+        save_scan_cache(args.cache_file, scanned_trees)
+
+    if written:
+        console.print(f"\n[bold green]✓ Generated {len(written)} audio manifests[/bold green]")
+    else:
         console.print("[yellow]No audio files found![/yellow]")
-        return
-    
-    # Write manifest file
-    manifest_path = Path("public/audio/audio_manifest.json")
-    manifest_path.parent.mkdir(parents=True, exist_ok=True)
-    
-    with open(manifest_path, 'w', encoding='utf-8') as f:
-        json.dump(manifest, f, indent=2, ensure_ascii=False)
-    
-    console.print(f"\n[bold green]✓ Audio manifest generated successfully![/bold green]")
-    console.print(f"[cyan]Location:[/cyan] {manifest_path}")
-    console.print(f"[cyan]Words:[/cyan] {manifest['total_words']}")
-    console.print(f"[cyan]Total files:[/cyan] {manifest['total_files']}")
-    console.print(f"[cyan]Generated at:[/cyan] {manifest['generated_at']}")
-    
-    # Show sample of what was found
-    if manifest["words"]:
-        console.print(f"\n[bold]Sample words found:[/bold]")
-        sample_words = list(manifest["words"].items())[:5]
-        for word, data in sample_words:
-            voice_count = len(data["voices"])
-            console.print(f"  {word}: {voice_count} voices ({data['extension']})")
-        
-        if len(manifest["words"]) > 5:
-            console.print(f"  ... and {len(manifest['words']) - 5} more words")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,201 @@
+"""
+Persistent state for (word, voice) recording jobs.
+
+Each job's last known status, output size, modification time, duration and
+validation result is kept in a small SQLite database. On a rerun, files whose
+size and mtime still match a valid entry can be trusted without decoding them
+again, and jobs that were in progress when a run was interrupted are picked up
+again because they never reached a final status.
+"""
+
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+DEFAULT_STATE_PATH = Path(".audio_job_state.sqlite")
+
+# Status set by clean_small_audio.py for recordings that should be re-synthesized
+FLAGGED_STATUS = "flagged"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    path TEXT PRIMARY KEY,
+    transliteration TEXT NOT NULL,
+    voice TEXT NOT NULL,
+    status TEXT NOT NULL,
+    file_size INTEGER,
+    mtime_ns INTEGER,
+    duration REAL,
+    valid INTEGER,
+    reason TEXT,
+    updated_at REAL NOT NULL
+)
+"""
+
+_COLUMNS = ("path", "transliteration", "voice", "status", "file_size", "mtime_ns", "duration", "valid", "reason", "updated_at")
+
+
+def _is_done(record):
+    return bool(record["valid"]) and record["status"] != "in_progress"
+
+
+def _merge_wins(theirs, ours):
+    """
+    True if record ``theirs`` should replace ``ours`` (same path) in a merge.
+
+    A flag stands until a finished record updated after it, or one for a
+    different file (size or mtime), shows the recording was replaced. Otherwise
+    a finished record beats a failed or in-progress one. Timestamps come from
+    the clocks of different machines, so they only decide between records of
+    the same kind.
+    """
+    their_flag, our_flag = theirs["status"] == FLAGGED_STATUS, ours["status"] == FLAGGED_STATUS
+    if their_flag != our_flag:
+        flag, other = (theirs, ours) if their_flag else (ours, theirs)
+        replaced = _is_done(other) and (
+            other["updated_at"] > flag["updated_at"]
+            or (other["file_size"], other["mtime_ns"]) != (flag["file_size"], flag["mtime_ns"])
+        )
+        return their_flag != replaced
+    if _is_done(theirs) != _is_done(ours):
+        return _is_done(theirs)
+    return theirs["updated_at"] > ours["updated_at"]
+
+
+class JobStateDB:
+    """
+    Thread-safe SQLite store of recording job state, keyed by output path.
+
+    Every update is committed immediately (in WAL mode) so the database stays
+    consistent if a run is killed part-way through.
+
+    Args:
+        db_path: Location of the SQLite database file
+    """
+
+    def __init__(self, db_path=DEFAULT_STATE_PATH):
+        self.db_path = Path(db_path)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(_SCHEMA)
+        self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def get(self, path):
+        """Return the stored record for ``path`` as a dict, or None."""
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {', '.join(_COLUMNS)} FROM jobs WHERE path = ?", (str(path),)
+            ).fetchone()
+        return dict(zip(_COLUMNS, row)) if row else None
+
+    def all_records(self):
+        """Return every stored record as a list of dicts."""
+        with self._lock:
+            rows = self._conn.execute(f"SELECT {', '.join(_COLUMNS)} FROM jobs").fetchall()
+        return [dict(zip(_COLUMNS, row)) for row in rows]
+
+    def get_fresh(self, path, min_file_size=0, min_duration=0.0):
+        """
+        Return the record for ``path`` if it can be trusted without re-validating.
+
+        A record is trusted when it was valid, the file on disk still has the
+        recorded size and mtime, and it still meets the given thresholds.
+        """
+        record = self.get(path)
+        if record is None or not record["valid"] or record["status"] == "in_progress":
+            return None
+        try:
+            st = Path(path).stat()
+        except FileNotFoundError:
+            return None
+        if st.st_size != record["file_size"] or st.st_mtime_ns != record["mtime_ns"]:
+            return None
+        if record["file_size"] < min_file_size or (record["duration"] or 0) < min_duration:
+            return None
+        return record
+
+    def get_flagged(self, path):
+        """
+        Return the record for ``path`` if it was flagged for regeneration.
+
+        The flag applies while the flagged file is unchanged or has been
+        deleted; a file rewritten since then is judged on its own again.
+        """
+        record = self.get(path)
+        if record is None or record["status"] != FLAGGED_STATUS:
+            return None
+        try:
+            st = Path(path).stat()
+        except FileNotFoundError:
+            return record
+        if st.st_size != record["file_size"] or st.st_mtime_ns != record["mtime_ns"]:
+            return None
+        return record
+
+    def mark_in_progress(self, path, transliteration, voice):
+        """Record that a job has started; it stays untrusted until it finishes."""
+        self._upsert(path, transliteration, voice, "in_progress", None, None, None, None, None)
+
+    def record_result(self, path, transliteration, voice, status, valid, reason=None, duration=None):
+        """Record the final outcome of a job, capturing the file's current size and mtime."""
+        try:
+            st = Path(path).stat()
+            file_size, mtime_ns = st.st_size, st.st_mtime_ns
+        except FileNotFoundError:
+            file_size, mtime_ns = 0, None
+        self._upsert(path, transliteration, voice, status, file_size, mtime_ns, duration, int(bool(valid)), reason)
+
+    def merge(self, other_path):
+        """
+        Copy in the records of another job state database, e.g. one written by
+        a different shard of make_tree_audio.py --shard.
+
+        See _merge_wins for which record is kept when both databases have
+        one for the same path. Returns the number of records taken.
+        """
+        if not Path(other_path).exists():
+            raise FileNotFoundError(f"Job state database not found: {other_path}")
+        columns = ", ".join(f"theirs.{column}" for column in _COLUMNS)
+        our_columns = ", ".join(f"ours.{column}" for column in _COLUMNS)
+        with self._lock:
+            self._conn.execute("ATTACH DATABASE ? AS other", (str(other_path),))
+            try:
+                rows = self._conn.execute(
+                    f"SELECT {columns}, {our_columns} FROM other.jobs AS theirs "
+                    "LEFT JOIN main.jobs AS ours ON ours.path = theirs.path"
+                ).fetchall()
+            finally:
+                self._conn.execute("DETACH DATABASE other")
+
+            taken = []
+            for row in rows:
+                theirs = dict(zip(_COLUMNS, row[:len(_COLUMNS)]))
+                ours = dict(zip(_COLUMNS, row[len(_COLUMNS):])) if row[len(_COLUMNS)] is not None else None
+                if ours is None or _merge_wins(theirs, ours):
+                    taken.append(row[:len(_COLUMNS)])
+            self._conn.executemany(
+                f"INSERT OR REPLACE INTO jobs ({', '.join(_COLUMNS)}) VALUES ({', '.join('?' * len(_COLUMNS))})", taken
+            )
+            self._conn.commit()
+            return len(taken)
+
+    def _upsert(self, path, transliteration, voice, status, file_size, mtime_ns, duration, valid, reason):
+        with self._lock:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO jobs ({', '.join(_COLUMNS)}) VALUES ({', '.join('?' * len(_COLUMNS))})",
+                (str(path), transliteration, voice, status, file_size, mtime_ns, duration, valid, reason, time.time()),
+            )
+            self._conn.commit()
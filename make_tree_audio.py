@@ -2,24 +2,41 @@
 # requires-python = ">=3.12"
 # dependencies = [
 # "google-cloud-texttospeech",
-# "scipy",
-# "librosa",
+# "numpy",
 # "rich",
 # "soundfile"
 # ]
 # ///
 
 import time
-import io
 import json
+import hashlib
+import math
 import random
 import argparse
 import os
+import threading
+import queue
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 from pathlib import Path
-from google.cloud import texttospeech
-from scipy.io import wavfile
-import librosa
-import soundfile as sf
+from xml.sax.saxutils import escape as xml_escape
+# google-cloud-texttospeech, numpy, soundfile and audio_trim are imported
+# where they are first used, so --help and --plan start instantly.
+from wav_io import (
+    read_wav_header, iter_pcm16_blocks, pcm16_from_bytes, write_pcm16_atomic, WAVE_FORMAT_PCM, PCM16_HEADER_SIZE
+)
+from job_state import JobStateDB, DEFAULT_STATE_PATH, FLAGGED_STATUS
+from audio_features import AudioFeatureCache, DEFAULT_FEATURE_CACHE_PATH
+from tts_cache import TTSResponseCache, make_cache_key, DEFAULT_CACHE_DIR
+from generate_audio_manifest import build_shard_manifest, shard_manifest_path, write_manifest
+from build_data import load_word_tables, word_tables_from_data, DEFAULT_OUTPUT_DIR as DEFAULT_DATA_BUILD_DIR
+from voice_catalog import (
+    VoiceCatalog, fetch_voice_catalog, split_voice_name, FALLBACK_VOICES, DEFAULT_CATALOG_PATH, DEFAULT_CATALOG_TTL
+)
+from rate_control import RateController, CircuitOpenError, rate_limited, classify_error
+from pipeline_metrics import (
+    PipelineMetrics, RunProfiler, profiled_call, timed, api_call, DEFAULT_METRICS_PATH, DEFAULT_PROFILE_PATH
+)
 from rich.console import Console
 from rich.progress import Progress, SpinnerColumn, BarColumn, TextColumn, TimeRemainingColumn
 from rich.table import Table
@@ -29,31 +46,73 @@ from rich import box
 
 console = Console()
 
+# Voice families whose SSML support includes <mark> timepoints, so several
+# words can be synthesized in one request and cut apart afterwards
+SSML_MARK_VOICE_TYPES = ("Wavenet",)
+
+# Pause between words in a batched request
+BATCH_BREAK_MS = 700
+
+# Full stop appended to each word so it is spoken as a complete utterance,
+# by primary language subtag; other languages use "."
+SENTENCE_STOPS = {
+    "bn": "।", "hi": "।", "mr": "।", "ne": "।", "pa": "।", "sa": "।",
+    "ur": "۔", "am": "።", "my": "။", "hy": "։",
+    "ja": "。", "zh": "。", "cmn": "。", "yue": "。",
+    "th": "", "lo": "", "km": "",
+}
+
+# Regenerate reason for recordings flagged by clean_small_audio.py; these are
+# re-synthesized without the TTS cache, which holds the flagged response
+FLAGGED_REASON_PREFIX = "flagged: "
+
+# Recordings with a lower RMS (in full-scale units) are treated as silent
+SILENCE_RMS_THRESHOLD = 1e-6
+
+# One TextToSpeechClient per worker thread, reused for the whole process
+_tts_clients = threading.local()
+
+# Called as factory(beta) instead of constructing a google TextToSpeechClient
+# when set (see set_tts_client_factory)
+_tts_client_factory = None
+
 
 def get_minimal_voice_name(full_voice_name):
     """Extract minimal voice name from full name (e.g., 'bn-IN-Chirp3-HD-Aoede' -> 'chirp3-hd-aoede')."""
-    # Remove language code prefix and convert to lowercase
-    parts = full_voice_name.split('-')
-    if len(parts) >= 3 and parts[0] == 'bn' and parts[1] == 'IN':
-        return '-'.join(parts[2:]).lower()
-    return full_voice_name.lower()
+    # Remove the language code prefix (each language has its own tree) and convert to lowercase
+    _, name = split_voice_name(full_voice_name)
+    return name.lower()
+
 
+def sentence_stop(language_code):
+    """Return the full stop appended to words in ``language_code`` (e.g. '।' for bn-IN)."""
+    return SENTENCE_STOPS.get(language_code.split("-")[0], ".")
 
-def validate_audio_file(file_path, min_file_size=5000, min_duration=0.3):
+
+def validate_audio_file(file_path, min_file_size=5000, min_duration=0.3, full_decode=False, features=None):
     """
     Validate that an audio file contains actual audio content.
+
+    By default the duration and format come from the header alone and the
+    silence check streams the samples in int16 blocks, stopping as soon as
+    enough signal has been seen. Truncated or header-only WAV files are caught
+    from the header without decoding anything.
     
     Args:
         file_path: Path to the audio file
         min_file_size: Minimum file size in bytes (default: 5KB)
         min_duration: Minimum duration in seconds (default: 0.3s)
+        full_decode: Decode the whole file with soundfile instead (slower)
+        features: Optional AudioFeatureCache; a cached duration and RMS for the
+            unchanged file are used instead of reading it, and new values are stored
     
     Returns:
         dict with validation results: {"valid": bool, "reason": str, "file_size": int, "duration": float}
     """
     try:
         # Check file size first (quick check)
-        file_size = file_path.stat().st_size
+        st = file_path.stat()
+        file_size = st.st_size
         if file_size < min_file_size:
             return {
                 "valid": False, 
@@ -61,10 +120,25 @@ def validate_audio_file(file_path, min_file_size=5000, min_duration=0.3):
                 "file_size": file_size,
                 "duration": 0
             }
-        
-        # Check audio duration and content
-        data, sample_rate = sf.read(str(file_path))
-        duration = len(data) / sample_rate
+
+        cached = features.get(file_path, file_size, st.st_mtime_ns) if features is not None else None
+        if cached is not None and not math.isnan(cached["duration"]) and not math.isnan(cached["rms"]):
+            duration, rms = cached["duration"], cached["rms"]
+        elif full_decode:
+            duration, rms = _decode_duration_and_rms(file_path)
+        else:
+            duration, rms, problem = _stream_duration_and_rms(file_path, file_size, min_duration)
+            if problem is not None:
+                return {
+                    "valid": False,
+                    "reason": problem,
+                    "file_size": file_size,
+                    "duration": duration
+                }
+
+        if features is not None and cached is None:
+            # An RMS of None means the streamed scan stopped early; only the duration is exact
+            features.update(file_path, file_size, st.st_mtime_ns, duration=duration, rms=rms)
         
         if duration < min_duration:
             return {
@@ -75,16 +149,13 @@ def validate_audio_file(file_path, min_file_size=5000, min_duration=0.3):
             }
         
         # Check if audio contains actual content (not just silence)
-        if len(data) > 0:
-            # Calculate RMS to detect if there's actual audio content
-            rms = (data ** 2).mean() ** 0.5
-            if rms < 1e-6:  # Very quiet audio might indicate a problem
-                return {
-                    "valid": False,
-                    "reason": f"Audio appears to be silent (RMS: {rms:.2e})",
-                    "file_size": file_size,
-                    "duration": duration
-                }
+        if rms is not None and rms < SILENCE_RMS_THRESHOLD:  # Very quiet audio might indicate a problem
+            return {
+                "valid": False,
+                "reason": f"Audio appears to be silent (RMS: {rms:.2e})",
+                "file_size": file_size,
+                "duration": duration
+            }
         
         return {
             "valid": True,
@@ -102,15 +173,225 @@ def validate_audio_file(file_path, min_file_size=5000, min_duration=0.3):
         }
 
 
+def _decode_duration_and_rms(file_path):
+    """Decode the whole file as float64 and return (duration, rms)."""
+    import soundfile as sf
+
+    data, sample_rate = sf.read(str(file_path))
+    duration = len(data) / sample_rate
+    # Calculate RMS to detect if there's actual audio content
+    rms = (data ** 2).mean() ** 0.5 if len(data) > 0 else None
+    return duration, rms
+
+
+def _stream_duration_and_rms(file_path, file_size, min_duration, block_frames=65536):
+    """
+    Get the duration from the header and compute the RMS block by block.
+
+    Returns:
+        (duration, rms, problem): ``rms`` is None when the scan stopped early
+        because the audio is clearly not silent; ``problem`` is a reason string
+        if the header shows the file is unusable, else None.
+    """
+    import numpy as np
+    import soundfile as sf
+
+    header = None
+    if file_path.suffix.lower() == ".wav":
+        try:
+            header = read_wav_header(file_path)
+        except ValueError:
+            header = None
+
+    if header is not None and header["format_tag"] == WAVE_FORMAT_PCM and header["bits_per_sample"] == 16:
+        duration = header["duration"]
+        expected_size = header["data_offset"] + header["data_size"]
+        if header["frames"] == 0:
+            return duration, None, "Header-only file (no audio frames)"
+        if file_size < expected_size:
+            return duration, None, (
+                f"File truncated ({file_size} bytes, header declares {expected_size})"
+            )
+        if duration < min_duration:
+            return duration, None, None
+
+        # Compare the sum of squares against the silence threshold in int16 units,
+        # so we can stop at the first block that pushes the total over it.
+        total_samples = header["frames"] * header["channels"]
+        threshold = (SILENCE_RMS_THRESHOLD * 32768) ** 2 * total_samples
+        sum_squares = 0
+        for block in iter_pcm16_blocks(file_path, header, block_frames):
+            sum_squares += int(np.square(block, dtype=np.int64).sum())
+            if sum_squares >= threshold:
+                return duration, None, None
+        return duration, (sum_squares / total_samples) ** 0.5 / 32768, None
+
+    # Other formats: header via libsndfile, then float32 blocks
+    info = sf.info(str(file_path))
+    duration = info.frames / info.samplerate if info.samplerate else 0
+    if info.frames == 0:
+        return duration, None, "Header-only file (no audio frames)"
+    if duration < min_duration:
+        return duration, None, None
+    sum_squares = 0.0
+    count = 0
+    for block in sf.blocks(str(file_path), blocksize=block_frames, dtype="float32"):
+        sum_squares += float(np.square(block, dtype=np.float64).sum())
+        count += block.size
+    rms = (sum_squares / count) ** 0.5 if count else None
+    return duration, rms, None
+
+
+def get_tts_client(beta=False):
+    """
+    Return the calling thread's TextToSpeechClient, creating it on first use.
+
+    With ``beta=True`` the v1beta1 client is returned instead; it is needed for
+    SSML mark timepoints.
+    """
+    attr = "beta_client" if beta else "client"
+    client = getattr(_tts_clients, attr, None)
+    if client is None and _tts_client_factory is not None:
+        client = _tts_client_factory(beta)
+        setattr(_tts_clients, attr, client)
+    elif client is None:
+        if beta:
+            from google.cloud import texttospeech_v1beta1 as texttospeech
+        else:
+            from google.cloud import texttospeech
+        client = texttospeech.TextToSpeechClient()
+        setattr(_tts_clients, attr, client)
+    return client
+
+
+def set_tts_client_factory(factory):
+    """
+    Create TTS clients with ``factory(beta)`` instead of google.cloud.texttospeech.
+
+    Used to run the pipeline against an offline backend such as
+    fake_tts.FakeTTSClient. Pass None to go back to the real clients. Threads
+    that already hold a client keep it until reset_tts_client() is called.
+    """
+    global _tts_client_factory
+    _tts_client_factory = factory
+
+
+def use_tts_endpoint(endpoint):
+    """
+    Send TTS requests to ``endpoint`` instead of texttospeech.googleapis.com.
+
+    An http:// URL (e.g. fake_tts_server.py on localhost) is used over REST
+    without credentials; an https:// URL over REST and a bare host[:port] over
+    gRPC, both with the default credentials.
+    """
+    def create_client(beta):
+        from google.api_core.client_options import ClientOptions
+
+        if beta:
+            from google.cloud import texttospeech_v1beta1 as texttospeech
+        else:
+            from google.cloud import texttospeech
+
+        options = ClientOptions(api_endpoint=endpoint)
+        if endpoint.startswith("http://"):
+            from google.auth.credentials import AnonymousCredentials
+
+            return texttospeech.TextToSpeechClient(
+                transport="rest", client_options=options, credentials=AnonymousCredentials()
+            )
+        if endpoint.startswith("https://"):
+            return texttospeech.TextToSpeechClient(transport="rest", client_options=options)
+        return texttospeech.TextToSpeechClient(client_options=options)
+
+    set_tts_client_factory(create_client)
+
+
+def reset_tts_client():
+    """Close the calling thread's clients so the next call opens a fresh channel."""
+    for attr in ("client", "beta_client"):
+        client = getattr(_tts_clients, attr, None)
+        setattr(_tts_clients, attr, None)
+        if client is not None:
+            try:
+                client.transport.close()
+            except Exception:
+                pass
+
+
 def synthesize_raw_audio(
     text,
     volume_gain_db=0.0,
     effects_profile_id="headphone-class-device",
     voice_name="bn-IN-Chirp3-HD-Aoede",
     language_code="bn-IN",
+    client=None,
+    cache=None,
+    use_cached=True,
 ):
     """Synthesizes speech from Google TTS and returns audio data."""
-    client = texttospeech.TextToSpeechClient()
+    audio_content = fetch_audio_content(
+        text,
+        volume_gain_db=volume_gain_db,
+        effects_profile_id=effects_profile_id,
+        voice_name=voice_name,
+        language_code=language_code,
+        client=client,
+        cache=cache,
+        use_cached=use_cached,
+    )
+
+    # View the response as audio samples
+    return pcm16_from_bytes(audio_content)
+
+
+def fetch_audio_content(
+    text,
+    volume_gain_db=0.0,
+    effects_profile_id="headphone-class-device",
+    voice_name="bn-IN-Chirp3-HD-Aoede",
+    language_code="bn-IN",
+    client=None,
+    cache=None,
+    use_cached=True,
+    metrics=None,
+    rate_controller=None,
+):
+    """
+    Return the raw LINEAR16 (WAV) bytes for ``text`` from Google TTS.
+
+    If ``cache`` (a TTSResponseCache) is given, the raw response is looked up
+    there first (unless ``use_cached`` is False) and stored after a successful
+    API call. API calls (not cache hits) are paced by ``rate_controller`` and
+    timed into ``metrics`` if given.
+    """
+    if cache is None:
+        with rate_limited(rate_controller, voice_name), api_call(metrics, voice_name):
+            return _request_audio_content(
+                text, volume_gain_db, effects_profile_id, voice_name, language_code, client
+            )
+
+    cache_key = make_cache_key(text, voice_name, volume_gain_db, effects_profile_id, language_code)
+
+    def fetch():
+        audio_content = cache.get(cache_key) if use_cached else None
+        if audio_content is None:
+            with rate_limited(rate_controller, voice_name), api_call(metrics, voice_name):
+                audio_content = _request_audio_content(
+                    text, volume_gain_db, effects_profile_id, voice_name, language_code, client
+                )
+            cache.put(cache_key, audio_content)
+        return audio_content
+
+    # Callers that bypass the cache never share the result of one that read it
+    return cache.fetch_once((cache_key, use_cached), fetch)
+
+
+def _request_audio_content(text, volume_gain_db, effects_profile_id, voice_name, language_code, client=None):
+    """Call the TTS API and return the raw LINEAR16 (WAV) response bytes."""
+    from google.cloud import texttospeech
+
+    if client is None:
+        client = get_tts_client()
 
     # Use text input (not SSML)
     input_text = texttospeech.SynthesisInput(text=text)
@@ -134,9 +415,13 @@ def synthesize_raw_audio(
         },
     )
 
-    # Convert response to audio samples
-    sample_rate, samples = wavfile.read(io.BytesIO(response.audio_content))
-    return sample_rate, samples
+    return response.audio_content
+
+
+def get_output_file(base_output_path, transliteration, voice_name):
+    """Return the tree-structured output path: word/word_voicename.wav."""
+    minimal_voice_name = get_minimal_voice_name(voice_name)
+    return Path(base_output_path) / transliteration / f"{transliteration}_{minimal_voice_name}.wav"
 
 
 def process_word_recording(
@@ -149,168 +434,942 @@ def process_word_recording(
     min_file_size=5000,  # Minimum file size in bytes
     min_duration=0.3,    # Minimum duration in seconds
     max_retries=3,
+    cache=None,
+    state=None,
+    full_validate=False,
+    debug_raw_dir=None,
+    features=None,
+    metrics=None,
+    rate_controller=None,
 ):
-    """Process a single word recording and save to tree structure."""
-    # Add Bengali full stop for natural speech
-    text_with_stop = f"{word_text}।"
+    """
+    Process a single word recording and save to tree structure.
 
-    # Create word-specific directory
-    word_dir = Path(base_output_path) / transliteration
-    word_dir.mkdir(exist_ok=True, parents=True)
+    If ``state`` (a JobStateDB) is given, existing files whose size and mtime
+    match a previously validated entry are skipped without being decoded, and
+    every outcome is recorded for the next run.
 
-    # Get minimal voice name for filename
-    minimal_voice_name = get_minimal_voice_name(voice_config['voice_name'])
-    
-    # Create filename in tree structure: word/word_voicename.wav
-    output_filename = f"{transliteration}_{minimal_voice_name}.wav"
-    output_file = word_dir / output_filename
-
-    # Check if file already exists and skip if not overwriting
-    if output_file.exists() and not overwrite:
-        validation = validate_audio_file(output_file, min_file_size, min_duration)
-        if validation["valid"]:
-            return {
-                "status": "skipped", 
-                "file_size": validation["file_size"], 
-                "duration": validation["duration"],
-                "path": output_file
-            }
-        else:
-            return {
-                "status": "regenerate", 
-                "file_size": validation["file_size"],
-                "reason": validation["reason"],
-                "path": output_file
-            }
+    This runs every stage inline in the calling thread; run_recording_pipeline
+    runs the same stages with network and post-processing overlapped.
+    """
+    output_file = get_output_file(base_output_path, transliteration, voice_config["voice_name"])
+    voice_name = voice_config["voice_name"]
+
+    existing, regenerate_reason = check_existing_recording(
+        output_file, transliteration, voice_name, overwrite, min_file_size, min_duration, state, full_validate, features
+    )
+    if existing is not None:
+        return existing
+    bypass_cache = (regenerate_reason or "").startswith(FLAGGED_REASON_PREFIX)
+
+    # A flagged job keeps its flag until it is replaced (see finalize_recording_result)
+    if state is not None and not bypass_cache:
+        state.mark_in_progress(output_file, transliteration, voice_name)
 
     # Retry logic for failed recordings
+    result = {"status": "failed", "reason": f"Failed after {max_retries} attempts"}
     for attempt in range(max_retries):
+        started = time.perf_counter()
+        if attempt > 0 and metrics is not None:
+            metrics.count("retries", voice=voice_name)
         try:
-            # Generate audio
-            sample_rate, samples = synthesize_raw_audio(
-                text_with_stop,
-                volume_gain_db=voice_config["volume_gain_db"],
-                effects_profile_id=voice_config["effects_profile"],
-                voice_name=voice_config["voice_name"],
+            audio_content = fetch_word_audio(
+                word_text, voice_config, cache, use_cached=attempt == 0 and not bypass_cache,
+                metrics=metrics, rate_controller=rate_controller,
             )
+        except Exception as e:
+            # Recycle the connection in case the channel itself is broken
+            reset_tts_client()
+            result = {"status": "failed", "reason": str(e)}
+            record_attempt(metrics, voice_name, result, started)
+            if rate_controller is not None and attempt < max_retries - 1:
+                time.sleep(rate_controller.backoff(attempt + 1))
+            continue
+
+        result = postprocess_recording(
+            audio_content, output_file, min_file_size, min_duration, full_validate,
+            debug_raw_path(debug_raw_dir, output_file)
+        )
+        record_attempt(metrics, voice_name, result, started)
+        if rate_controller is not None:
+            rate_controller.record_result(voice_name, result["status"] == "success")
+        if result["status"] == "success":
+            result["voice"] = voice_name
+            break
+
+    return finalize_recording_result(
+        result, output_file, transliteration, voice_name, regenerate_reason, max_retries, state
+    )
+
+
+def check_existing_recording(
+    output_file, transliteration, voice_name, overwrite, min_file_size, min_duration, state=None, full_validate=False,
+    features=None,
+):
+    """
+    Decide whether an existing recording can be kept.
+
+    Returns:
+        (result, regenerate_reason): ``result`` is a "skipped" result dict if the
+        file is fine, else None; ``regenerate_reason`` explains why an existing
+        file needs replacing (None if there was no file to replace).
+    """
+    if overwrite:
+        return None, None
+
+    flagged = state.get_flagged(output_file) if state is not None else None
+    if flagged is not None:
+        return None, f"{FLAGGED_REASON_PREFIX}{flagged['reason']}"
+
+    record = state.get_fresh(output_file, min_file_size, min_duration) if state is not None else None
+    if record is not None:
+        return {
+            "status": "skipped",
+            "file_size": record["file_size"],
+            "duration": record["duration"],
+            "path": output_file
+        }, None
+
+    if not output_file.exists():
+        return None, None
+
+    validation = validate_audio_file(output_file, min_file_size, min_duration, full_decode=full_validate, features=features)
+    if not validation["valid"]:
+        return None, validation["reason"]
+
+    if state is not None:
+        state.record_result(output_file, transliteration, voice_name, "skipped", True, duration=validation["duration"])
+    return {
+        "status": "skipped", 
+        "file_size": validation["file_size"], 
+        "duration": validation["duration"],
+        "path": output_file
+    }, None
+
+
+def fetch_word_audio(word_text, voice_config, cache=None, use_cached=True, metrics=None, rate_controller=None):
+    """Network stage: return the raw TTS response bytes for one word and voice."""
+    # Add the language's full stop for natural speech
+    text_with_stop = f"{word_text}{sentence_stop(voice_config['language_code'])}"
+    return fetch_audio_content(
+        text_with_stop,
+        volume_gain_db=voice_config["volume_gain_db"],
+        effects_profile_id=voice_config["effects_profile"],
+        voice_name=voice_config["voice_name"],
+        language_code=voice_config["language_code"],
+        # Only the first attempt may come from the cache; retries must hit the API
+        cache=cache,
+        use_cached=use_cached,
+        metrics=metrics,
+        rate_controller=rate_controller,
+    )
+
+
+def validate_audio_samples(samples, sample_rate, min_file_size=5000, min_duration=0.3):
+    """
+    Validate int16 samples in memory, before they are written.
+
+    Applies the same checks as validate_audio_file, using the size the samples
+    will have once written as a 16-bit PCM WAV file.
+    """
+    import numpy as np
+
+    file_size = PCM16_HEADER_SIZE + samples.nbytes
+    duration = len(samples) / sample_rate
+    if file_size < min_file_size:
+        return {
+            "valid": False,
+            "reason": f"File too small ({file_size} bytes, minimum: {min_file_size})",
+            "file_size": file_size,
+            "duration": duration
+        }
+    if duration < min_duration:
+        return {
+            "valid": False,
+            "reason": f"Audio too short ({duration:.2f}s, minimum: {min_duration}s)",
+            "file_size": file_size,
+            "duration": duration
+        }
+    rms = (np.square(samples, dtype=np.float64).mean() ** 0.5) / 32768 if samples.size else 0.0
+    if rms < SILENCE_RMS_THRESHOLD:
+        return {
+            "valid": False,
+            "reason": f"Audio appears to be silent (RMS: {rms:.2e})",
+            "file_size": file_size,
+            "duration": duration
+        }
+    return {
+        "valid": True,
+        "reason": "Audio validation passed",
+        "file_size": file_size,
+        "duration": duration
+    }
+
+
+def debug_raw_path(debug_raw_dir, output_file, suffix=".raw.wav"):
+    """Return where to save the untrimmed response for ``output_file``, or None if disabled."""
+    if debug_raw_dir is None:
+        return None
+    return Path(debug_raw_dir) / f"{Path(output_file).stem}{suffix}"
+
+
+def supports_ssml_marks(voice_name):
+    """Return True if ``voice_name`` supports SSML <mark> timepoints (and so batching)."""
+    return any(f"-{voice_type}-" in voice_name for voice_type in SSML_MARK_VOICE_TYPES)
+
+
+def build_batch_ssml(word_texts, language_code="bn-IN"):
+    """Return SSML speaking each word after a <mark name="wN"/>, with a pause between words."""
+    stop = xml_escape(sentence_stop(language_code))
+    parts = ["<speak>"]
+    for i, word_text in enumerate(word_texts):
+        parts.append(f'<mark name="w{i}"/>{xml_escape(word_text)}{stop}<break time="{BATCH_BREAK_MS}ms"/>')
+    parts.append('<mark name="end"/></speak>')
+    return "".join(parts)
+
+
+def fetch_batch_audio(
+    word_texts, voice_config, cache=None, use_cached=True, client=None, language_code=None, metrics=None,
+    rate_controller=None,
+):
+    """
+    Network stage for batches: synthesize several words in one SSML request.
+
+    ``language_code`` defaults to the one in ``voice_config``.
+
+    Returns:
+        (audio_content, timepoints): raw LINEAR16 WAV bytes and a dict mapping
+        each mark name to its time in seconds
+    """
+    language_code = language_code or voice_config["language_code"]
+    ssml = build_batch_ssml(word_texts, language_code)
+    args = (ssml, voice_config["volume_gain_db"], voice_config["effects_profile"], voice_config["voice_name"], language_code)
+    voice_name = voice_config["voice_name"]
+    if cache is None:
+        with rate_limited(rate_controller, voice_name), api_call(metrics, voice_name):
+            return _request_batch_audio(*args, client=client)
+
+    cache_key = make_cache_key(
+        ssml, voice_config["voice_name"], voice_config["volume_gain_db"], voice_config["effects_profile"],
+        language_code, audio_encoding="LINEAR16+SSML_MARK",
+    )
+
+    def fetch():
+        entry = cache.get_with_meta(cache_key) if use_cached else None
+        if entry is not None and entry[1] is not None:
+            return entry
+        with rate_limited(rate_controller, voice_name), api_call(metrics, voice_name):
+            audio_content, timepoints = _request_batch_audio(*args, client=client)
+        cache.put(cache_key, audio_content, meta=timepoints)
+        return audio_content, timepoints
+
+    return cache.fetch_once((cache_key, use_cached), fetch)
+
+
+def _request_batch_audio(ssml, volume_gain_db, effects_profile_id, voice_name, language_code, client=None):
+    """Call the v1beta1 TTS API with SSML mark timepointing enabled."""
+    from google.cloud import texttospeech_v1beta1 as texttospeech
+
+    if client is None:
+        client = get_tts_client(beta=True)
+
+    response = client.synthesize_speech(
+        request={
+            "input": texttospeech.SynthesisInput(ssml=ssml),
+            "voice": texttospeech.VoiceSelectionParams(language_code=language_code, name=voice_name),
+            "audio_config": texttospeech.AudioConfig(
+                audio_encoding=texttospeech.AudioEncoding.LINEAR16,
+                volume_gain_db=volume_gain_db,
+                effects_profile_id=[effects_profile_id] if effects_profile_id else [],
+            ),
+            "enable_time_pointing": [texttospeech.SynthesizeSpeechRequest.TimepointType.SSML_MARK],
+        },
+    )
+    timepoints = {timepoint.mark_name: timepoint.time_seconds for timepoint in response.timepoints}
+    return response.audio_content, timepoints
+
+
+def postprocess_recording(
+    audio_content, output_file, min_file_size=5000, min_duration=0.3, full_validate=False, debug_raw_path=None
+):
+    """
+    CPU stage: trim, validate and write one synthesized recording.
+
+    The PCM samples are viewed directly from the response bytes, the trimmed
+    slice is validated in memory, and only a valid slice is written, once and
+    atomically. Runs in a worker process, so it takes and returns only
+    picklable values.
+
+    Args:
+        audio_content: Raw LINEAR16 WAV bytes from the TTS API
+        output_file: Destination path for the trimmed recording
+        full_validate: Also decode the written file and validate it from disk
+        debug_raw_path: If given, save the untrimmed response there for debugging
+
+    Returns:
+        dict with "status" of "success" or "invalid" plus size, duration and
+        reason, and "timings" (seconds spent in decode, trim, validate and write)
+    """
+    from audio_trim import split_on_silence
+
+    output_file = Path(output_file)
+    output_file.parent.mkdir(exist_ok=True, parents=True)
+
+    if debug_raw_path is not None:
+        Path(debug_raw_path).parent.mkdir(exist_ok=True, parents=True)
+        Path(debug_raw_path).write_bytes(audio_content)
+
+    timings = {}
+    start = time.perf_counter()
+    sample_rate, samples = pcm16_from_bytes(audio_content)
+    timings["decode"] = time.perf_counter() - start
+
+    # Split audio to remove silence
+    start = time.perf_counter()
+    splits = split_on_silence(samples, top_db=40)
+    timings["trim"] = time.perf_counter() - start
+    if splits.shape[0] < 1:
+        return {"status": "invalid", "reason": "No audio splits found", "timings": timings}
+
+    trimmed = samples[splits[0][0] : splits[0][1]]
+    return write_validated_recording(
+        trimmed, sample_rate, output_file, min_file_size, min_duration, full_validate, timings
+    )
+
+
+def write_validated_recording(
+    trimmed, sample_rate, output_file, min_file_size=5000, min_duration=0.3, full_validate=False, timings=None
+):
+    """
+    Validate trimmed samples in memory and write them only if they pass.
+
+    The time spent validating and writing is added to ``timings`` (stage ->
+    seconds), which is returned in the result.
+    """
+    timings = {} if timings is None else timings
+    start = time.perf_counter()
+    validation = validate_audio_samples(trimmed, sample_rate, min_file_size, min_duration)
+    timings["validate"] = time.perf_counter() - start
+    if validation["valid"]:
+        # Save processed audio file
+        start = time.perf_counter()
+        write_pcm16_atomic(output_file, trimmed, sample_rate)
+        timings["write"] = time.perf_counter() - start
+        if full_validate:
+            start = time.perf_counter()
+            validation = validate_audio_file(output_file, min_file_size, min_duration, full_decode=True)
+            timings["validate"] += time.perf_counter() - start
+            if not validation["valid"]:
+                output_file.unlink(missing_ok=True)
+
+    if not validation["valid"]:
+        return {
+            "status": "invalid",
+            "reason": f"Audio validation failed: {validation['reason']}",
+            "file_size": validation.get("file_size", 0),
+            "duration": validation.get("duration", 0),
+            "timings": timings,
+        }
+
+    return {
+        "status": "success", 
+        "file_size": validation["file_size"], 
+        "duration": validation["duration"],
+        "path": output_file,
+        "timings": timings,
+    }
+
+
+def postprocess_batch(
+    audio_content, timepoints, output_files, min_file_size=5000, min_duration=0.3, full_validate=False,
+    debug_raw_path=None
+):
+    """
+    CPU stage for batches: cut a multi-word response at its <mark> timepoints.
+
+    Each word runs from its own mark to the next one; the silence splitter only
+    refines the edges of that cut. Every cut is validated and written like a
+    single recording.
+
+    Args:
+        audio_content: Raw LINEAR16 WAV bytes of the batched response
+        timepoints: {mark_name: seconds} as returned by fetch_batch_audio
+        output_files: Destination path for each word, in SSML order
+
+    Returns:
+        list of result dicts, one per output file, in the same order; the
+        response decode time is included in the timings of the first one
+    """
+    from audio_trim import split_on_silence
+
+    if debug_raw_path is not None:
+        Path(debug_raw_path).parent.mkdir(exist_ok=True, parents=True)
+        Path(debug_raw_path).write_bytes(audio_content)
+
+    start = time.perf_counter()
+    sample_rate, samples = pcm16_from_bytes(audio_content)
+    decode_seconds = time.perf_counter() - start
+    total_seconds = len(samples) / sample_rate
+    marks = [timepoints.get(f"w{i}") for i in range(len(output_files))] + [timepoints.get("end", total_seconds)]
+
+    results = []
+    for i, output_file in enumerate(output_files):
+        timings = {"decode": decode_seconds} if i == 0 else {}
+        start = marks[i]
+        end = next((mark for mark in marks[i + 1:] if mark is not None), total_seconds)
+        if start is None or end <= start:
+            results.append({
+                "status": "invalid", "reason": f"Missing or out-of-order timepoint for mark w{i}", "timings": timings
+            })
+            continue
+
+        cut = samples[int(start * sample_rate) : int(end * sample_rate)]
+        trim_start = time.perf_counter()
+        splits = split_on_silence(cut, top_db=40)
+        timings["trim"] = time.perf_counter() - trim_start
+        if splits.shape[0] < 1:
+            results.append({"status": "invalid", "reason": "No audio splits found", "timings": timings})
+            continue
+
+        output_file = Path(output_file)
+        output_file.parent.mkdir(exist_ok=True, parents=True)
+        trimmed = cut[splits[0][0] : splits[-1][1]]
+        results.append(
+            write_validated_recording(
+                trimmed, sample_rate, output_file, min_file_size, min_duration, full_validate, timings
+            )
+        )
+    return results
+
+
+def record_attempt(metrics, voice_name, result, started, cpu_submitted=None):
+    """
+    Move the CPU stage timings out of ``result`` and into ``metrics``.
+
+    The time since ``started`` (a perf_counter value) of an attempt that did not
+    succeed is observed as the "retry" stage. If ``cpu_submitted`` is given,
+    the CPU stage time not spent in its own stages is observed as "cpu_wait"
+    (time queued for a worker process, plus transfer).
+    """
+    timings = result.pop("timings", {})
+    if metrics is None:
+        return
+    now = time.perf_counter()
+    metrics.observe_stages(timings)
+    if cpu_submitted is not None:
+        metrics.observe("stage", max(now - cpu_submitted - sum(timings.values()), 0.0), stage="cpu_wait")
+    if result["status"] != "success":
+        metrics.observe("stage", now - started, stage="retry")
+
+
+def finalize_recording_result(result, output_file, transliteration, voice_name, regenerate_reason, max_retries, state=None):
+    """Turn the last attempt's outcome into the job's final result and record it."""
+    if result["status"] == "invalid":
+        result = {**result, "status": "failed", "reason": f"{result['reason']} (after {max_retries} attempts)"}
+
+    # An invalid existing file that was successfully replaced
+    if regenerate_reason is not None and result["status"] == "success":
+        result["status"] = "regenerate"
+        result["reason"] = regenerate_reason
+
+    if state is not None and result["status"] == "failed" and (regenerate_reason or "").startswith(FLAGGED_REASON_PREFIX):
+        # Keep the flag: the bad file is still on disk and would pass validation on the next run
+        state.record_result(
+            output_file, transliteration, voice_name, FLAGGED_STATUS, False,
+            reason=regenerate_reason[len(FLAGGED_REASON_PREFIX):],
+        )
+    elif state is not None:
+        state.record_result(
+            output_file,
+            transliteration,
+            voice_name,
+            result["status"],
+            result["status"] != "failed",
+            reason=result.get("reason"),
+            duration=result.get("duration"),
+        )
+    return result
+
 
-            # Save raw output for debugging
-            sf.write("out.wav", samples, sample_rate)
-
-            # Split audio to remove silence
-            splits = librosa.effects.split(samples, top_db=40)
-
-            if splits.shape[0] >= 1:
-                # Save processed audio file
-                sf.write(str(output_file), samples[splits[0][0] : splits[0][1]], sample_rate)
-                
-                # Validate the generated audio file thoroughly
-                validation = validate_audio_file(output_file, min_file_size, min_duration)
-                
-                if validation["valid"]:
-                    return {
-                        "status": "success", 
-                        "file_size": validation["file_size"], 
-                        "duration": validation["duration"],
-                        "path": output_file, 
-                        "voice": voice_config['voice_name']
-                    }
+def run_recording_pipeline(
+    jobs,
+    base_output_path,
+    on_result=None,
+    network_workers=8,
+    cpu_workers=None,
+    max_pending=None,
+    overwrite=False,
+    min_file_size=5000,
+    min_duration=0.3,
+    max_retries=3,
+    cache=None,
+    state=None,
+    full_validate=False,
+    debug_raw_dir=None,
+    features=None,
+    metrics=None,
+    profiler=None,
+    rate_controller=None,
+):
+    """
+    Run recording jobs through a two-stage pipeline.
+
+    Network threads check existing files and fetch raw audio, then hand the raw
+    bytes to a process pool that trims, writes and validates them, so neither
+    stage waits on the other. Recordings that fail validation go back to the
+    network stage until ``max_retries`` is used up. Batch jobs (see
+    group_batch_jobs) synthesize several words in one SSML request and are cut at
+    their <mark> timepoints; any word whose cut fails is synthesized on its own.
+    At most ``max_pending`` recordings are in flight at once, which bounds the number of raw buffers held in
+    memory. ``on_result(job, result)`` is called from the calling thread as each
+    job finishes, so callers can update statistics and progress displays
+    without locking.
+
+    Args:
+        jobs: Iterable of job dicts (see build_recording_jobs and group_batch_jobs)
+        base_output_path: Root of the word/voice output tree, for jobs that
+            don't carry their own "base_output_path"
+        on_result: Optional callback invoked with (job, result) for every job
+        network_workers: Threads calling the TTS API (default: 8)
+        cpu_workers: Post-processing processes (default: CPU count)
+        max_pending: Jobs in flight at once (default: 2 * network_workers)
+        metrics: Optional PipelineMetrics receiving stage timings, per-voice
+            API latency, retries and results
+        profiler: Optional RunProfiler; network threads and CPU stage calls are profiled
+        rate_controller: Optional RateController pacing the API calls; failed
+            API calls are then retried after a jittered exponential backoff
+    """
+    if max_pending is None:
+        max_pending = 2 * network_workers
+    results = queue.Queue()
+
+    thread_initializer = profiler.profile_thread if profiler is not None else None
+    with ThreadPoolExecutor(max_workers=network_workers, initializer=thread_initializer) as network_pool, \
+            ProcessPoolExecutor(max_workers=cpu_workers) as cpu_pool:
+
+        def submit_cpu(fn, *args):
+            if profiler is not None:
+                return cpu_pool.submit(profiled_call, fn, *args)
+            return cpu_pool.submit(fn, *args)
+
+        def cpu_result(future):
+            if profiler is None:
+                return future.result()
+            result, stats = future.result()
+            profiler.add_stats(stats)
+            return result
+
+        def finish(job, result):
+            output_file = job["output_file"]
+            voice_name = job["voice_config"]["voice_name"]
+            result = finalize_recording_result(
+                result, output_file, job["transliteration"], voice_name,
+                job.get("regenerate_reason"), max_retries, state
+            )
+            if metrics is not None:
+                metrics.count("recordings", status=result["status"])
+                if result["status"] == "failed":
+                    metrics.count("failed", voice=voice_name)
+            results.put((job, result))
+
+        def prepare(job):
+            """Check the job's existing file; returns True if it still needs synthesizing."""
+            job["prepared"] = True
+            job["output_file"] = get_output_file(
+                job.get("base_output_path", base_output_path), job["transliteration"], job["voice_config"]["voice_name"]
+            )
+            with timed(metrics, "check"):
+                existing, job["regenerate_reason"] = check_existing_recording(
+                    job["output_file"], job["transliteration"], job["voice_config"]["voice_name"],
+                    overwrite, min_file_size, min_duration, state, full_validate, features
+                )
+            job["bypass_cache"] = (job["regenerate_reason"] or "").startswith(FLAGGED_REASON_PREFIX)
+            if existing is not None:
+                results.put((job, existing))
+                return False
+            if state is not None and not job["bypass_cache"]:
+                state.mark_in_progress(job["output_file"], job["transliteration"], job["voice_config"]["voice_name"])
+            return True
+
+        def network_stage(job, attempt):
+            try:
+                if not job.get("prepared") and not prepare(job):
+                    return
+
+                job["attempt_started"] = time.perf_counter()
+                if attempt > 0 and metrics is not None:
+                    metrics.count("retries", voice=job["voice_config"]["voice_name"])
+                try:
+                    audio_content = fetch_word_audio(
+                        job["word_text"], job["voice_config"], cache,
+                        use_cached=attempt == 0 and not job["bypass_cache"],
+                        metrics=metrics, rate_controller=rate_controller,
+                    )
+                except Exception as e:
+                    if not isinstance(e, CircuitOpenError):
+                        # Recycle the connection in case the channel itself is broken
+                        reset_tts_client()
+                    result = {"status": "failed", "reason": str(e)}
+                    record_attempt(metrics, job["voice_config"]["voice_name"], result, job["attempt_started"])
+                    if metrics is not None and classify_error(e) == "throttled":
+                        metrics.count("throttled", voice=job["voice_config"]["voice_name"])
+                    retry_or_finish(job, attempt, result, backoff=True)
+                    return
+
+                cpu_submitted = time.perf_counter()
+                future = submit_cpu(
+                    postprocess_recording, audio_content, job["output_file"], min_file_size, min_duration,
+                    full_validate, debug_raw_path(debug_raw_dir, job["output_file"])
+                )
+                future.add_done_callback(lambda f: cpu_stage_done(job, attempt, f, cpu_submitted))
+            except Exception as e:
+                finish(job, {"status": "failed", "reason": str(e)})
+
+        def batch_network_stage(batch_job):
+            members = []
+            for job in batch_job["batch"]:
+                try:
+                    if prepare(job):
+                        members.append(job)
+                except Exception as e:
+                    finish(job, {"status": "failed", "reason": str(e)})
+
+            # Flagged recordings must not come from a cached batch response
+            for job in [job for job in members if job["bypass_cache"]]:
+                members.remove(job)
+                network_pool.submit(network_stage, job, 0)
+
+            if len(members) < 2:
+                for job in members:
+                    network_stage(job, 0)
+                return
+
+            started = time.perf_counter()
+            try:
+                audio_content, timepoints = fetch_batch_audio(
+                    [job["word_text"] for job in members], batch_job["voice_config"], cache,
+                    metrics=metrics, rate_controller=rate_controller,
+                )
+                cpu_submitted = time.perf_counter()
+                future = submit_cpu(
+                    postprocess_batch, audio_content, timepoints, [job["output_file"] for job in members],
+                    min_file_size, min_duration, full_validate,
+                    debug_raw_path(debug_raw_dir, members[0]["output_file"], suffix=".batch.raw.wav")
+                )
+            except Exception:
+                # Recycle the connection, then fall back to one request per word
+                # (after a backoff, so a throttled batch doesn't turn into a burst)
+                reset_tts_client()
+                for job in members:
+                    submit_network(job, 0, rate_controller.backoff(1) if rate_controller is not None else 0.0)
+                return
+            future.add_done_callback(lambda f: batch_cpu_stage_done(members, f, started, cpu_submitted))
+
+        def batch_cpu_stage_done(members, future, started, cpu_submitted):
+            try:
+                batch_results = cpu_result(future)
+            except Exception:
+                batch_results = [{"status": "invalid"} for _ in members]
+            if rate_controller is not None:
+                # One response, one result for the voice's breaker; members cut badly
+                # report their own outcome when they are re-synthesized alone
+                rate_controller.record_result(
+                    members[0]["voice_config"]["voice_name"],
+                    any(result["status"] == "success" for result in batch_results),
+                )
+            for i, (job, result) in enumerate(zip(members, batch_results)):
+                # The batch waited for a worker once
+                record_attempt(
+                    metrics, job["voice_config"]["voice_name"], result, started, cpu_submitted if i == 0 else None
+                )
+                if result["status"] == "success":
+                    result["voice"] = job["voice_config"]["voice_name"]
+                    finish(job, result)
                 else:
-                    # File failed validation, delete it and retry if possible
-                    if output_file.exists():
-                        output_file.unlink()  # Delete the invalid file
-                    
-                    if attempt < max_retries - 1:
-                        continue  # Retry with same voice
-                    else:
-                        return {
-                            "status": "failed", 
-                            "reason": f"Audio validation failed after {max_retries} attempts: {validation['reason']}", 
-                            "file_size": validation.get("file_size", 0),
-                            "duration": validation.get("duration", 0)
-                        }
+                    # A bad cut is re-synthesized on its own
+                    network_pool.submit(network_stage, job, 0)
+
+        def cpu_stage_done(job, attempt, future, cpu_submitted):
+            try:
+                result = cpu_result(future)
+            except Exception as e:
+                result = {"status": "failed", "reason": str(e)}
+            record_attempt(metrics, job["voice_config"]["voice_name"], result, job["attempt_started"], cpu_submitted)
+            if rate_controller is not None:
+                rate_controller.record_result(job["voice_config"]["voice_name"], result["status"] == "success")
+            if result["status"] == "success":
+                result["voice"] = job["voice_config"]["voice_name"]
+                finish(job, result)
             else:
-                if attempt < max_retries - 1:
-                    continue
-                else:
-                    return {"status": "failed", "reason": "No audio splits found"}
-                    
-        except Exception as e:
-            if attempt < max_retries - 1:
-                continue
+                retry_or_finish(job, attempt, result)
+
+        def retry_or_finish(job, attempt, result, backoff=False):
+            if attempt >= max_retries - 1:
+                finish(job, result)
+            elif backoff and rate_controller is not None:
+                submit_network(job, attempt + 1, rate_controller.backoff(attempt + 1))
             else:
-                return {"status": "failed", "reason": str(e)}
-    
-    return {"status": "failed", "reason": f"Failed after {max_retries} attempts"}
+                network_pool.submit(network_stage, job, attempt + 1)
+
+        def submit_network(job, attempt, delay=0.0):
+            if delay <= 0:
+                network_pool.submit(network_stage, job, attempt)
+                return
+            # Wait off the network threads, so other jobs keep the API busy meanwhile
+            timer = threading.Timer(delay, network_pool.submit, (network_stage, job, attempt))
+            timer.daemon = True
+            timer.start()
+
+        in_flight = 0
+
+        def handle_next_result():
+            job, result = results.get()
+            if on_result is not None:
+                on_result(job, result)
+
+        for job in jobs:
+            # Backpressure: wait for a job to finish before starting another
+            while in_flight >= max_pending:
+                handle_next_result()
+                in_flight -= 1
+            if "batch" in job:
+                batch_job = {**job, "batch": [dict(member) for member in job["batch"]]}
+                network_pool.submit(batch_network_stage, batch_job)
+                in_flight += len(batch_job["batch"])
+            else:
+                network_pool.submit(network_stage, dict(job), 0)
+                in_flight += 1
+
+        while in_flight > 0:
+            handle_next_result()
+            in_flight -= 1
 
 
 def collect_all_unique_words(all_data):
-    """Collect all unique words from all categories to avoid duplication."""
-    unique_words = {}  # transliteration -> (bengali_text, transliteration)
+    """
+    Collect the unique words of every language, keeping a separate set per
+    language (transliterations of different languages may coincide).
 
-    for lang_code, lang_data in all_data.items():
-        if "types" not in lang_data:
+    Returns:
+        {language_code: {transliteration: (word_text, transliteration)}}
+    """
+    return {lang_code: lang_data["words"] for lang_code, lang_data in word_tables_from_data(all_data).items()}
+
+
+def group_batch_jobs(jobs, batch_size):
+    """
+    Group jobs for SSML-mark-capable voices into batch jobs of up to ``batch_size`` words.
+
+    A batch job is {"batch": [job, ...], "voice_config": ...}. Jobs for other
+    voices, and everything when ``batch_size`` is 1 or less, are passed through.
+    """
+    if batch_size <= 1:
+        return list(jobs)
+
+    grouped = []
+    pending = {}  # voice name -> jobs waiting to fill a batch
+    for job in jobs:
+        voice_name = job["voice_config"]["voice_name"]
+        if not supports_ssml_marks(voice_name):
+            grouped.append(job)
             continue
+        batch = pending.setdefault(voice_name, [])
+        batch.append(job)
+        if len(batch) == batch_size:
+            grouped.append({"batch": batch, "voice_config": job["voice_config"]})
+            pending[voice_name] = []
 
-        for category, category_data in lang_data["types"].items():
-            if "pairs" not in category_data:
-                continue
-
-            for pair in category_data["pairs"]:
-                for word in pair:
-                    bengali_text, transliteration = word[0], word[1]
-                    if transliteration not in unique_words:
-                        unique_words[transliteration] = (bengali_text, transliteration)
-
-    return unique_words
-
-
-def get_all_voice_names():
-    """Get all available voice names for Bengali."""
-    # Chirp3-HD voices (don't support prosody parameters)
-    chirp3_hd_voices = [
-        "bn-IN-Chirp3-HD-Achernar",
-        "bn-IN-Chirp3-HD-Achird",
-        "bn-IN-Chirp3-HD-Algenib",
-        "bn-IN-Chirp3-HD-Algieba",
-        "bn-IN-Chirp3-HD-Alnilam",
-        "bn-IN-Chirp3-HD-Aoede",
-        "bn-IN-Chirp3-HD-Autonoe",
-        "bn-IN-Chirp3-HD-Callirrhoe",
-        "bn-IN-Chirp3-HD-Charon",
-        "bn-IN-Chirp3-HD-Despina",
-        "bn-IN-Chirp3-HD-Enceladus",
-        "bn-IN-Chirp3-HD-Erinome",
-        "bn-IN-Chirp3-HD-Fenrir",
-        "bn-IN-Chirp3-HD-Gacrux",
-        "bn-IN-Chirp3-HD-Iapetus",
-        "bn-IN-Chirp3-HD-Kore",
-        "bn-IN-Chirp3-HD-Laomedeia",
-        "bn-IN-Chirp3-HD-Leda",
-        "bn-IN-Chirp3-HD-Orus",
-        "bn-IN-Chirp3-HD-Puck",
-        "bn-IN-Chirp3-HD-Pulcherrima",
-        "bn-IN-Chirp3-HD-Rasalgethi",
-        "bn-IN-Chirp3-HD-Sadachbia",
-        "bn-IN-Chirp3-HD-Sadaltager",
-        "bn-IN-Chirp3-HD-Schedar",
-        "bn-IN-Chirp3-HD-Sulafat",
-        "bn-IN-Chirp3-HD-Umbriel",
-    ]
-    
-    # Wavenet voices (support prosody parameters)
-    wavenet_voices = [
-        "bn-IN-Wavenet-A",
-        "bn-IN-Wavenet-B",
-        "bn-IN-Wavenet-C",
-        "bn-IN-Wavenet-D",
+    for batch in pending.values():
+        if len(batch) == 1:
+            grouped.append(batch[0])
+        elif batch:
+            grouped.append({"batch": batch, "voice_config": batch[0]["voice_config"]})
+    return grouped
+
+
+def collect_word_categories(all_data):
+    """Map each (language code, transliteration) to the sorted list of categories it appears in."""
+    return {
+        (lang_code, transliteration): categories
+        for lang_code, lang_data in word_tables_from_data(all_data).items()
+        for transliteration, categories in lang_data["categories"].items()
+    }
+
+
+def plan_recordings(jobs, base_output_path, state=None, min_file_size=5000, min_duration=0.3):
+    """
+    Classify every job as "valid", "stale" or "missing" without decoding audio.
+
+    A file is valid only if the job state has a validated entry whose size and
+    mtime still match; any other existing file is stale and would be checked
+    (and possibly re-synthesized) by a real run.
+
+    Returns:
+        list of (job, classification) tuples
+    """
+    plan = []
+    for job in jobs:
+        output_file = get_output_file(
+            job.get("base_output_path", base_output_path), job["transliteration"], job["voice_config"]["voice_name"]
+        )
+        if state is not None and state.get_fresh(output_file, min_file_size, min_duration) is not None:
+            plan.append((job, "valid"))
+        elif output_file.exists():
+            plan.append((job, "stale"))
+        else:
+            plan.append((job, "missing"))
+    return plan
+
+
+def print_plan(plan, word_categories):
+    """Print per-voice and per-category counts of valid, stale and missing recordings."""
+    by_voice = {}
+    by_category = {}
+    for job, classification in plan:
+        voice = get_minimal_voice_name(job["voice_config"]["voice_name"])
+        by_voice.setdefault(voice, {"valid": 0, "stale": 0, "missing": 0})[classification] += 1
+        for category in word_categories.get((job["voice_config"]["language_code"], job["transliteration"]), []):
+            by_category.setdefault(category, {"valid": 0, "stale": 0, "missing": 0})[classification] += 1
+
+    for title, label, counts in (("Plan by Voice", "Voice", by_voice), ("Plan by Category", "Category", by_category)):
+        table = Table(title=title, box=box.ROUNDED)
+        table.add_column(label, style="cyan")
+        table.add_column("Valid", style="green", justify="right")
+        table.add_column("Stale", style="yellow", justify="right")
+        table.add_column("Missing", style="red", justify="right")
+        for name, row in counts.items():
+            table.add_row(name, str(row["valid"]), str(row["stale"]), str(row["missing"]))
+        console.print(table)
+
+    totals = {"valid": 0, "stale": 0, "missing": 0}
+    for _, classification in plan:
+        totals[classification] += 1
+    console.print(
+        f"[bold]Total:[/bold] [green]{totals['valid']} valid[/green], "
+        f"[yellow]{totals['stale']} stale[/yellow], [red]{totals['missing']} missing[/red]"
+    )
+    return totals
+
+
+def build_recording_jobs(unique_words, voices_to_use, base_audio_config, base_output_path=None):
+    """
+    Expand one language's unique words and voices into a flat list of (word, voice) recording jobs.
+
+    ``base_audio_config`` holds the language_code; with ``base_output_path``
+    each job carries the language's output tree.
+    """
+    jobs = []
+    for transliteration, (word_text, _) in unique_words.items():
+        for voice_name in voices_to_use:
+            voice_config = base_audio_config.copy()
+            voice_config["voice_name"] = voice_name
+            job = {
+                "word_text": word_text,
+                "transliteration": transliteration,
+                "voice_config": voice_config,
+            }
+            if base_output_path is not None:
+                job["base_output_path"] = base_output_path
+            jobs.append(job)
+    return jobs
+
+
+def interleave_jobs(job_lists):
+    """
+    Merge per-language job lists round-robin, so every language makes progress
+    at the same time under the shared rate budget instead of running one after another.
+    """
+    iterators = [iter(jobs) for jobs in job_lists]
+    interleaved = []
+    while iterators:
+        remaining = []
+        for iterator in iterators:
+            job = next(iterator, None)
+            if job is not None:
+                interleaved.append(job)
+                remaining.append(iterator)
+        iterators = remaining
+    return interleaved
+
+
+def parse_shard(value):
+    """argparse type for --shard: "i/N" -> (i, N), with shards numbered 1..N."""
+    try:
+        shard, shard_count = (int(part) for part in value.split("/"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected i/N (e.g. 2/4), got {value!r}")
+    if not 1 <= shard <= shard_count:
+        raise argparse.ArgumentTypeError(f"shard {shard} is not between 1 and {shard_count}")
+    return shard, shard_count
+
+
+def job_shard(transliteration, voice_name, shard_count):
+    """
+    Return the shard (1..shard_count) that owns the recording of ``transliteration`` by ``voice_name``.
+
+    Derived from a BLAKE2b hash of the pair, so every machine assigns jobs the
+    same way whatever the word order, voice list or Python hash seed.
+    """
+    digest = hashlib.blake2b(f"{transliteration}\0{voice_name}".encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big") % shard_count + 1
+
+
+def select_shard(jobs, shard, shard_count):
+    """Keep the (word, voice) jobs owned by ``shard`` of ``shard_count``."""
+    return [
+        job for job in jobs
+        if job_shard(job["transliteration"], job["voice_config"]["voice_name"], shard_count) == shard
     ]
 
-    # Combine all voices
-    return chirp3_hd_voices + wavenet_voices
 
+def print_metrics(report, slowest_voices=5):
+    """Print the stage timings and the voices with the slowest API responses from a metrics report."""
+    if not report["stages"]:
+        return
+    table = Table(title="Stage Timings", box=box.ROUNDED)
+    table.add_column("Stage", style="cyan")
+    for column in ("Count", "Total", "Mean", "p90", "Max"):
+        table.add_column(column, justify="right", style="green")
+    for stage, summary in sorted(report["stages"].items(), key=lambda item: -item[1]["total"]):
+        table.add_row(
+            stage, str(summary["count"]), f"{summary['total']:.1f}s",
+            *(f"{summary[key] * 1000:.1f}ms" for key in ("mean", "p90", "max")),
+        )
+    console.print(table)
+
+    voices = [(voice, data) for voice, data in report["voices"].items() if "api" in data]
+    if voices:
+        table = Table(title="Slowest Voices (API p90)", box=box.ROUNDED)
+        table.add_column("Voice", style="cyan")
+        for column in ("Requests", "Mean", "p90", "Retries", "API Errors", "Failed"):
+            table.add_column(column, justify="right", style="green")
+        for voice, data in sorted(voices, key=lambda item: -item[1]["api"]["p90"])[:slowest_voices]:
+            table.add_row(
+                voice, str(data["api"]["count"]),
+                f"{data['api']['mean'] * 1000:.0f}ms", f"{data['api']['p90'] * 1000:.0f}ms",
+                str(data.get("retries", 0)), str(data.get("api_errors", 0)), str(data.get("failed", 0)),
+            )
+        console.print(table)
 
-if __name__ == "__main__":
+
+def get_all_voice_names(language_code="bn-IN", catalog=None):
+    """
+    Get the voices to record ``language_code`` with: the Chirp3-HD and Wavenet
+    voices of ``catalog`` (a loaded VoiceCatalog), or of the built-in fallback list.
+    """
+    if catalog is None:
+        catalog = VoiceCatalog()
+        catalog.voices = FALLBACK_VOICES
+    return catalog.voices_for(language_code)
+
+
+def main(argv=None):
+    """
+    Generate the recordings for every word and voice (see --help).
+
+    Returns:
+        The run statistics (counts per result status, elapsed seconds)
+    """
     # Parse command line arguments
     parser = argparse.ArgumentParser(description="Generate audio files for minimal pairs")
     parser.add_argument(
@@ -318,10 +1377,32 @@ if __name__ == "__main__":
         action="store_true",
         help="Overwrite existing audio files",
     )
+    parser.add_argument(
+        "--languages",
+        nargs="*",
+        help="Language codes in minimal_pairs_db.json to generate (default: every language)",
+    )
     parser.add_argument(
         "--voices",
         nargs="*",
-        help="Specific voices to use (default: all available voices)",
+        help="Specific voices to use; each is used for the language its name starts with "
+             "(default: the Chirp3-HD and Wavenet voices of each language in the voice catalog)",
+    )
+    parser.add_argument(
+        "--voice-catalog",
+        default=str(DEFAULT_CATALOG_PATH),
+        help=f"Cached list_voices() response (default: {DEFAULT_CATALOG_PATH})",
+    )
+    parser.add_argument(
+        "--voice-catalog-ttl",
+        type=float,
+        default=DEFAULT_CATALOG_TTL / 3600,
+        help=f"Hours before the cached voice catalog is refreshed from the API (default: {DEFAULT_CATALOG_TTL // 3600})",
+    )
+    parser.add_argument(
+        "--refresh-voices",
+        action="store_true",
+        help="Refresh the voice catalog from the API now, whatever its age (ignored by --plan, which never calls the API)",
     )
     parser.add_argument(
         "--min-file-size",
@@ -335,44 +1416,288 @@ if __name__ == "__main__":
         default=0.3,
         help="Minimum audio duration in seconds to consider a recording valid (default: 0.3)",
     )
-    args = parser.parse_args()
+    parser.add_argument(
+        "--plan",
+        action="store_true",
+        help="Only report missing, stale and valid recordings per voice and category, then exit "
+             "(exit status 1 if anything needs generating)",
+    )
+    parser.add_argument(
+        "--full-validate",
+        action="store_true",
+        help="Decode every file fully when validating instead of using the header and streamed RMS",
+    )
+    parser.add_argument(
+        "--debug-raw-dir",
+        default=None,
+        help="Also save each untrimmed TTS response in this directory for debugging",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        default=str(DEFAULT_CACHE_DIR),
+        help=f"Directory for cached raw TTS responses (default: {DEFAULT_CACHE_DIR})",
+    )
+    parser.add_argument(
+        "--cache-max-mb",
+        type=int,
+        default=2048,
+        help="Maximum size of the TTS response cache in MB (default: 2048)",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Always call the TTS API instead of reusing cached responses",
+    )
+    parser.add_argument(
+        "--state-db",
+        default=str(DEFAULT_STATE_PATH),
+        help=f"SQLite file tracking job state between runs (default: {DEFAULT_STATE_PATH})",
+    )
+    parser.add_argument(
+        "--no-state",
+        action="store_true",
+        help="Don't read or record job state; validate every existing file",
+    )
+    parser.add_argument(
+        "--feature-cache",
+        default=str(DEFAULT_FEATURE_CACHE_PATH),
+        help=f"Columnar per-file feature cache shared by the audio tools (default: {DEFAULT_FEATURE_CACHE_PATH})",
+    )
+    parser.add_argument(
+        "--no-feature-cache",
+        action="store_true",
+        help="Don't read or store cached per-file features",
+    )
+    parser.add_argument(
+        "--tts-endpoint",
+        default=None,
+        help="TTS API endpoint to use instead of texttospeech.googleapis.com, e.g. "
+             "http://localhost:8080 for fake_tts_server.py",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=8,
+        help="Number of recordings to synthesize in parallel (default: 8)",
+    )
+    parser.add_argument(
+        "--quota-per-minute",
+        type=int,
+        default=None,
+        help="TTS requests per minute allowed by the project quota; requests are paced to stay "
+             "under it (default: no limit)",
+    )
+    parser.add_argument(
+        "--min-concurrency",
+        type=int,
+        default=1,
+        help="Lowest concurrency the adaptive limit may drop to when the API throttles or slows down (default: 1)",
+    )
+    parser.add_argument(
+        "--latency-target",
+        type=float,
+        default=None,
+        help="API latency in seconds above which concurrency is reduced "
+             "(default: 3x the best latency seen, at least 0.25s)",
+    )
+    parser.add_argument(
+        "--max-retries",
+        type=int,
+        default=3,
+        help="Attempts per recording; failed API calls are retried with jittered exponential backoff (default: 3)",
+    )
+    parser.add_argument(
+        "--backoff-max",
+        type=float,
+        default=30.0,
+        help="Longest wait in seconds between retries (default: 30)",
+    )
+    parser.add_argument(
+        "--breaker-threshold",
+        type=int,
+        default=5,
+        help="Consecutive failures after which a voice is paused (default: 5)",
+    )
+    parser.add_argument(
+        "--breaker-cooldown",
+        type=float,
+        default=30.0,
+        help="Seconds a paused voice is skipped before it is tried again (default: 30)",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=1,
+        help="Words per SSML request for voices that support <mark> timepoints (Wavenet); "
+             "1 disables batching (default: 1)",
+    )
+    parser.add_argument(
+        "--cpu-workers",
+        type=int,
+        default=None,
+        help="Processes for trimming, writing and validating audio (default: CPU count)",
+    )
+    parser.add_argument(
+        "--max-pending",
+        type=int,
+        default=None,
+        help="Maximum recordings in flight across both stages (default: 2 x --concurrency)",
+    )
+    parser.add_argument(
+        "--shard",
+        type=parse_shard,
+        default=None,
+        metavar="I/N",
+        help="Only generate shard I of N (1-based); jobs are assigned by a stable hash of (word, voice), so "
+             "N machines running shards 1/N..N/N write disjoint parts of the tree",
+    )
+    parser.add_argument(
+        "--shard-manifest",
+        default=None,
+        help="Partial manifest written by a --shard run of a single language, merged with "
+             "generate_audio_manifest.py --merge (default: <audio dir>/_shards/shard-I-of-N.json for each language)",
+    )
+    parser.add_argument(
+        "--metrics-file",
+        default=str(DEFAULT_METRICS_PATH),
+        help=f"JSON report of per-stage timings, per-voice API latency and retries (default: {DEFAULT_METRICS_PATH})",
+    )
+    parser.add_argument(
+        "--prometheus-file",
+        default=None,
+        help="Also write the run's metrics to this file in the Prometheus text format",
+    )
+    parser.add_argument(
+        "--profile",
+        nargs="?",
+        const=str(DEFAULT_PROFILE_PATH),
+        default=None,
+        help=f"Profile the run with cProfile and write the pstats dump here (default: {DEFAULT_PROFILE_PATH})",
+    )
+    args = parser.parse_args(argv)
 
-    # Load data
+    # Load data: the word tables of build_data.py while they match the database, else the database itself
     json_filepath = Path("public", "minimal_pairs_db.json")
-    with open(json_filepath, "r", encoding="utf-8") as f:
-        all_data = json.load(f)
-
-    # Get base audio path for bn-IN
-    lang_data = all_data["bn-IN"]
-    base_output_path = Path(".") / "public" / lang_data["audioBasePath"]
+    word_data = load_word_tables(DEFAULT_DATA_BUILD_DIR, json_filepath)
+    if word_data is None:
+        with open(json_filepath, "r", encoding="utf-8") as f:
+            word_data = word_tables_from_data(json.load(f))
+    else:
+        console.print(f"[bold]Word data:[/bold] word tables in {DEFAULT_DATA_BUILD_DIR}")
 
-    console.print(f"[bold]Output base path:[/bold] {base_output_path}")
+    language_codes = args.languages or list(word_data)
+    unknown = [language_code for language_code in language_codes if language_code not in word_data]
+    if unknown:
+        parser.error(f"languages not in {json_filepath}: {', '.join(unknown)}")
+    if args.shard_manifest and len(language_codes) > 1:
+        parser.error("--shard-manifest needs a single language (see --languages)")
 
-    # Collect all unique words from all categories
-    unique_words = collect_all_unique_words(all_data)
-    console.print(f"[bold green]Found {len(unique_words)} unique words across all categories[/bold green]\n")
+    if args.tts_endpoint:
+        use_tts_endpoint(args.tts_endpoint)
+        console.print(f"[bold]TTS endpoint:[/bold] {args.tts_endpoint}")
 
-    # Base audio configuration
-    base_audio_config = {
-        "volume_gain_db": 0.0,
-        "effects_profile": "headphone-class-device",
-        "voice_name": "bn-IN-Chirp3-HD-Aoede",
-    }
+    # Voices per language: from --voices, else from the cached list_voices() catalog
+    # (--plan stays offline and only reads the cache or the fallback list)
+    catalog = None
+    if not args.voices:
+        fetch = None if args.plan else lambda: fetch_voice_catalog(get_tts_client())
+        catalog = VoiceCatalog(args.voice_catalog, ttl=args.voice_catalog_ttl * 3600).load(
+            fetch=fetch, refresh=args.refresh_voices
+        )
+        console.print(f"[bold]Voice catalog:[/bold] {args.voice_catalog} ({catalog.source})")
+        if catalog.error:
+            console.print(f"[yellow]Could not refresh the voice catalog: {catalog.error}[/yellow]")
 
-    # Get list of voices to use
+    # One word set, voice list and output tree per language
+    languages = []
+    for language_code in language_codes:
+        lang_data = word_data[language_code]
+        if args.voices:
+            voices_to_use = [voice for voice in args.voices if split_voice_name(voice)[0] == language_code]
+        else:
+            voices_to_use = get_all_voice_names(language_code, catalog)
+        unique_words = lang_data["words"]
+        base_output_path = Path(".") / "public" / lang_data["audioBasePath"]
+        console.print(
+            f"[bold]{language_code}[/bold] ({lang_data['languageName'] or language_code}): "
+            f"[green]{len(unique_words)} unique words[/green], [blue]{len(voices_to_use)} voices[/blue] -> {base_output_path}"
+        )
+        if not voices_to_use:
+            console.print(f"[yellow]No voices for {language_code}; skipping it[/yellow]")
+            continue
+        languages.append({
+            "language_code": language_code,
+            "unique_words": unique_words,
+            "voices": voices_to_use,
+            "base_output_path": base_output_path,
+        })
     if args.voices:
-        # Use specified voices
-        voices_to_use = args.voices
-    else:
-        # Use all available voices
-        voices_to_use = get_all_voice_names()
-    
-    console.print(f"[bold blue]Using {len(voices_to_use)} voice models[/bold blue]")
+        used = {voice for language in languages for voice in language["voices"]}
+        for voice in args.voices:
+            if voice not in used:
+                console.print(f"[yellow]Voice {voice} matches none of the languages; ignoring it[/yellow]")
+    console.print()
+
+    def build_language_jobs(language):
+        # Base audio configuration
+        base_audio_config = {
+            "volume_gain_db": 0.0,
+            "effects_profile": "headphone-class-device",
+            "language_code": language["language_code"],
+        }
+        jobs = build_recording_jobs(
+            language["unique_words"], language["voices"], base_audio_config, language["base_output_path"]
+        )
+        if args.shard:
+            jobs = select_shard(jobs, *args.shard)
+        return jobs
+
+    if args.plan:
+        # Dry run: report what a real run would do, using only stat() and the job state
+        state = JobStateDB(args.state_db) if not args.no_state and Path(args.state_db).exists() else None
+        jobs = [job for language in languages for job in build_language_jobs(language)]
+        plan = plan_recordings(jobs, None, state, args.min_file_size, args.min_duration)
+        word_categories = {
+            (language_code, transliteration): categories
+            for language_code, lang_data in word_data.items()
+            for transliteration, categories in lang_data["categories"].items()
+        }
+        totals = print_plan(plan, word_categories)
+        raise SystemExit(0 if totals["stale"] == 0 and totals["missing"] == 0 else 1)
+
+    # Cache of raw TTS responses so reprocessing doesn't call the API again
+    cache = None
+    if not args.no_cache:
+        cache = TTSResponseCache(args.cache_dir, max_bytes=args.cache_max_mb * 1024 * 1024)
+        console.print(f"[bold]TTS cache:[/bold] {args.cache_dir} ({len(cache)} entries, {cache.total_bytes / 1024 ** 2:.1f} MB)")
+
+    # Job state so reruns trust unchanged, already validated files
+    state = None if args.no_state else JobStateDB(args.state_db)
+
+    # Per-file features shared with clean_small_audio.py and generate_audio_manifest.py
+    features = None if args.no_feature_cache else AudioFeatureCache(args.feature_cache)
+
+    # Pacing of the API calls: quota, adaptive concurrency, backoff and per-voice breakers
+    rate_controller = RateController(
+        quota_per_minute=args.quota_per_minute,
+        concurrency=args.concurrency,
+        min_concurrency=args.min_concurrency,
+        latency_target=args.latency_target,
+        backoff_max=args.backoff_max,
+        breaker_threshold=args.breaker_threshold,
+        breaker_cooldown=args.breaker_cooldown,
+    )
+
+    metrics = PipelineMetrics()
+    profiler = RunProfiler() if args.profile else None
+    if profiler is not None:
+        profiler.start()
     
     # Statistics
     stats = {
-        "total_words": len(unique_words),
+        "total_words": sum(len(language["unique_words"]) for language in languages),
         "current_word": 0,
+        "completed_recordings": 0,
         "successful": 0,
         "failed": 0,
         "skipped": 0,
@@ -382,10 +1707,25 @@ if __name__ == "__main__":
         "start_time": time.time()
     }
     
-    # Process all unique words with a single progress display
-    total_recordings = len(unique_words) * len(voices_to_use)
-    current_recording = 0
-    
+    # Process all (word, voice) jobs of every language concurrently with a single
+    # progress display; languages are interleaved so they share the rate budget
+    for language in languages:
+        language["jobs"] = build_language_jobs(language)
+    recording_jobs = [job for language in languages for job in language["jobs"]]
+    if args.shard:
+        console.print(f"[bold]Shard {args.shard[0]}/{args.shard[1]}:[/bold] {len(recording_jobs)} recordings")
+    total_recordings = len(recording_jobs)
+    jobs = interleave_jobs([group_batch_jobs(language["jobs"], args.batch_size) for language in languages])
+
+    # Per-word statistics, reported once every voice for a word has finished
+    word_stats = {}
+    for job in recording_jobs:
+        current_word_stats = word_stats.setdefault(
+            (job["voice_config"]["language_code"], job["transliteration"]),
+            {"success": 0, "failed": 0, "skipped": 0, "remaining": 0},
+        )
+        current_word_stats["remaining"] += 1
+
     with Progress(
         SpinnerColumn(),
         TextColumn("[progress.description]{task.description}"),
@@ -401,90 +1741,160 @@ if __name__ == "__main__":
             f"[cyan]Processing audio files", 
             total=total_recordings
         )
-        
-        # Process all unique words
-        for i, (transliteration, (bengali_text, _)) in enumerate(unique_words.items()):
-            stats["current_word"] = i + 1
-            stats["current_word_name"] = f"{bengali_text} ({transliteration})"
-            
-            word_stats = {"success": 0, "failed": 0, "skipped": 0}
-            
-            # Generate one recording per voice for this word
-            for voice_idx, voice_name in enumerate(voices_to_use):
-                current_recording += 1
-                
-                # Create voice configuration
-                voice_config = base_audio_config.copy()
-                voice_config["voice_name"] = voice_name
-                
-                minimal_voice = get_minimal_voice_name(voice_name)
-                stats["current_voice"] = minimal_voice
-                
-                # Update progress description with current status
-                progress.update(
-                    overall_task,
-                    description=f"[cyan]({current_recording}/{total_recordings}) {bengali_text} - {minimal_voice}",
-                    completed=current_recording - 1
-                )
 
-                result = process_word_recording(
-                    word_text=bengali_text,
-                    transliteration=transliteration,
-                    base_output_path=base_output_path,
-                    voice_config=voice_config,
-                    base_audio_config=base_audio_config,
-                    overwrite=args.overwrite,
-                    min_file_size=args.min_file_size,
-                    min_duration=args.min_duration,
-                )
+        def on_result(job, result):
+            stats["completed_recordings"] += 1
 
-                # Update statistics based on result
-                if result["status"] == "success":
-                    stats["successful"] += 1
-                    word_stats["success"] += 1
-                elif result["status"] == "failed":
-                    stats["failed"] += 1
-                    word_stats["failed"] += 1
-                elif result["status"] == "skipped":
-                    stats["skipped"] += 1
-                    word_stats["skipped"] += 1
-                elif result["status"] == "regenerate":
-                    stats["regenerated"] += 1
-                    stats["successful"] += 1
-                    word_stats["success"] += 1
-                
-                # Advance progress
-                progress.update(overall_task, completed=current_recording)
-
-                # Small delay to be nice to the API
-                time.sleep(0.1)
-            
-            # Show word summary if there were failures
-            if word_stats["failed"] > 0:
-                console.print(
-                    f"[yellow]⚠ {bengali_text}:[/yellow] "
-                    f"✓ {word_stats['success']} | ✗ {word_stats['failed']} | → {word_stats['skipped']}"
-                )
+            word_text = job["word_text"]
+            minimal_voice = get_minimal_voice_name(job["voice_config"]["voice_name"])
+            stats["current_word_name"] = f"{word_text} ({job['transliteration']})"
+            stats["current_voice"] = minimal_voice
+
+            # Update statistics based on result
+            current_word_stats = word_stats[(job["voice_config"]["language_code"], job["transliteration"])]
+            if result["status"] == "success":
+                stats["successful"] += 1
+                current_word_stats["success"] += 1
+            elif result["status"] == "failed":
+                stats["failed"] += 1
+                current_word_stats["failed"] += 1
+            elif result["status"] == "skipped":
+                stats["skipped"] += 1
+                current_word_stats["skipped"] += 1
+            elif result["status"] == "regenerate":
+                stats["regenerated"] += 1
+                stats["successful"] += 1
+                current_word_stats["success"] += 1
+
+            # Advance progress
+            progress.update(
+                overall_task,
+                description=f"[cyan]({stats['completed_recordings']}/{total_recordings}) {word_text} - {minimal_voice}",
+                completed=stats["completed_recordings"]
+            )
+
+            # Show word summary once all voices are done, if there were failures
+            current_word_stats["remaining"] -= 1
+            if current_word_stats["remaining"] == 0:
+                stats["current_word"] += 1
+                if current_word_stats["failed"] > 0:
+                    console.print(
+                        f"[yellow]⚠ {word_text}:[/yellow] "
+                        f"✓ {current_word_stats['success']} | ✗ {current_word_stats['failed']} | → {current_word_stats['skipped']}"
+                    )
+
+        run_recording_pipeline(
+            jobs,
+            None,
+            on_result=on_result,
+            network_workers=args.concurrency,
+            cpu_workers=args.cpu_workers,
+            max_pending=args.max_pending,
+            max_retries=args.max_retries,
+            overwrite=args.overwrite,
+            min_file_size=args.min_file_size,
+            min_duration=args.min_duration,
+            cache=cache,
+            state=state,
+            full_validate=args.full_validate,
+            debug_raw_dir=args.debug_raw_dir,
+            features=features,
+            metrics=metrics,
+            profiler=profiler,
+            rate_controller=rate_controller,
+        )
+
+    if state is not None:
+        state.close()
+
+    shard_manifest_files = []
+    if args.shard:
+        # Describe this shard's files of each language for generate_audio_manifest.py --merge
+        for language in languages:
+            shard_manifest_file = Path(
+                args.shard_manifest or shard_manifest_path(language["base_output_path"], *args.shard)
+            )
+            shard_manifest = build_shard_manifest(
+                language["base_output_path"],
+                (
+                    (job["transliteration"], get_minimal_voice_name(job["voice_config"]["voice_name"]))
+                    for job in language["jobs"]
+                ),
+                *args.shard,
+                features=features,
+                workers=args.concurrency,
+            )
+            write_manifest(shard_manifest, shard_manifest_file)
+            shard_manifest_files.append(shard_manifest_file)
+
+    if features is not None:
+        features.save()
+
+    metrics.stop()
+    rate_stats = rate_controller.snapshot()
+    for key in ("requests", "throttled", "unavailable", "errors", "rejected"):
+        metrics.count("rate_control", rate_stats[key], event=key)
+    for voice, opened in rate_stats["breakers_opened"].items():
+        metrics.count("breaker_opened", opened, voice=voice)
+    if cache is not None:
+        metrics.count("tts_cache", cache.hits, result="hit")
+        metrics.count("tts_cache", cache.misses, result="miss")
+    metrics.write_json(args.metrics_file)
+    if args.prometheus_file:
+        metrics.write_prometheus(args.prometheus_file)
     
     # Final statistics
     elapsed_time = time.time() - stats["start_time"]
+    stats["elapsed"] = elapsed_time
     
     # Create final stats table
     table = Table(title="Audio Generation Complete", box=box.ROUNDED)
     table.add_column("Metric", style="cyan")
     table.add_column("Value", style="green")
     
+    table.add_row("Languages", ", ".join(language["language_code"] for language in languages))
     table.add_row("Total Words", str(stats["total_words"]))
-    table.add_row("Voices Used", str(len(voices_to_use)))
+    table.add_row("Voices Used", str(sum(len(language["voices"]) for language in languages)))
+    if args.shard:
+        table.add_row("Shard", f"{args.shard[0]}/{args.shard[1]} ({total_recordings} recordings)")
+    table.add_row("Concurrency", f"{args.concurrency} (adaptive limit now {rate_stats['concurrency_limit']:.0f}, "
+                                 f"lowest {rate_stats['lowest_concurrency_limit']:.0f})")
+    table.add_row("Batch Size", str(args.batch_size))
     table.add_row("Successful", str(stats["successful"]))
     table.add_row("Failed", str(stats["failed"]))
     table.add_row("Skipped", str(stats["skipped"]))
     table.add_row("Regenerated", str(stats["regenerated"]))
+    table.add_row("API Requests", f"{rate_stats['requests']} ({rate_stats['throttled']} throttled, "
+                                  f"{rate_stats['unavailable'] + rate_stats['errors']} errors)")
+    if args.quota_per_minute:
+        table.add_row("Quota Wait", f"{rate_stats['quota_wait']:.1f}s (summed over threads)")
+    if rate_stats["breakers_opened"]:
+        table.add_row("Paused Voices", ", ".join(get_minimal_voice_name(voice) for voice in rate_stats["breakers_opened"]))
+    if cache is not None:
+        table.add_row("Cache Hits", f"{cache.hits} ({cache.misses} misses)")
     table.add_row("Min File Size", f"{args.min_file_size} bytes")
     table.add_row("Min Duration", f"{args.min_duration}s")
     table.add_row("Total Time", f"{elapsed_time:.1f}s")
-    table.add_row("Output Path", str(base_output_path))
+    table.add_row("Output Path", ", ".join(str(language["base_output_path"]) for language in languages))
+    if shard_manifest_files:
+        table.add_row("Shard Manifest", ", ".join(map(str, shard_manifest_files)))
     
     console.print("\n")
     console.print(table)
-    console.print(f"\n[bold green]Audio files are organized in: {base_output_path}/[word]/[word]_[voicename].wav[/bold green]")
+    print_metrics(metrics.report())
+    console.print(f"[bold]Metrics:[/bold] {args.metrics_file}" + (f", {args.prometheus_file}" if args.prometheus_file else ""))
+    if profiler is not None:
+        profile_stats = profiler.stop(args.profile)
+        console.print(f"[bold]Profile:[/bold] {args.profile} (python -m pstats {args.profile}); top functions by cumulative time:")
+        profile_stats.sort_stats("cumulative").print_stats(15)
+    for language in languages:
+        console.print(
+            f"[bold green]{language['language_code']} audio files are organized in: "
+            f"{language['base_output_path']}/\\[word]/\\[word]_\\[voicename].wav[/bold green]"
+        )
+
+    return stats
+
+
+if __name__ == "__main__":
+    main()
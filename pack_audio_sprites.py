@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+# /// script
+# requires-python = ">=3.12"
+# dependencies = [
+# "soundfile",
+# "rich"
+# ]
+# ///
+
+"""
+Script to pack the per-voice recordings of each word (or category) into sprite packs.
+
+A pack is the byte-for-byte concatenation of complete encoded files, so any
+entry can be cut out of it with a single range request (or a Blob.slice of the
+whole pack) and played as-is. The offset index is written next to the packs in
+_packs/sprites.json and embedded in audio_manifest.json by
+generate_audio_manifest.py. Packs whose member files are unchanged since the
+last run are left alone, so regenerating one voice only rewrites the packs that
+contain it.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from rich.console import Console
+from rich.progress import Progress, SpinnerColumn, TextColumn, BarColumn
+
+console = Console()
+
+PACKS_DIRNAME = "_packs"
+SPRITE_INDEX_FILENAME = "sprites.json"
+
+
+def slugify(name):
+    """Turn a category name into a URL-safe pack name (e.g. 'Oral vs. Nasalized Vowels' -> 'oral-vs-nasalized-vowels')."""
+    return re.sub(r"[^\w]+", "-", name).strip("-").lower()
+
+
+def collect_word_files(audio_dir, extension):
+    """Return {transliteration: {voice: path}} for every ``extension`` file in the word tree."""
+    word_files = {}
+    for word_dir in sorted(Path(audio_dir).iterdir()):
+        if not word_dir.is_dir() or word_dir.name.startswith("_"):
+            continue
+        prefix = f"{word_dir.name}_"
+        for file_path in sorted(word_dir.glob(f"{prefix}*.{extension}")):
+            voice = file_path.stem[len(prefix):]
+            word_files.setdefault(word_dir.name, {})[voice] = file_path
+    return word_files
+
+
+def plan_packs(word_files, by="word", data_file=None, lang_code="bn-IN"):
+    """
+    Decide which words go into which pack.
+
+    Returns:
+        {pack_name: [transliteration, ...]}
+    """
+    if by == "word":
+        return {word: [word] for word in word_files}
+
+    with open(data_file, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    packs = {}
+    for category, category_data in data[lang_code].get("types", {}).items():
+        pack_name = slugify(category)
+        words = []
+        for pair in category_data.get("pairs", []):
+            for word in pair:
+                if word[1] in word_files and word[1] not in words:
+                    words.append(word[1])
+        if words:
+            packs[pack_name] = words
+    return packs
+
+
+def source_stamps(words, word_files, audio_dir):
+    """Return the (size, mtime_ns) of every member file, keyed by its path relative to ``audio_dir``."""
+    stamps = {}
+    for word in words:
+        for voice, file_path in sorted(word_files[word].items()):
+            st = file_path.stat()
+            stamps[file_path.relative_to(audio_dir).as_posix()] = [st.st_size, st.st_mtime_ns]
+    return stamps
+
+
+def build_pack(pack_name, words, word_files, audio_dir, packs_dir, extension):
+    """
+    Concatenate the member files of one pack and return its index entry.
+
+    The pack is written under a temporary name and renamed into place.
+    """
+    import soundfile as sf
+
+    pack_path = packs_dir / f"{pack_name}.{extension}.pack"
+    tmp_path = pack_path.with_name(f".{pack_path.name}.{os.getpid()}.tmp")
+    entries = {}
+    offset = 0
+    sample_offset = 0
+
+    hasher = hashlib.blake2b(digest_size=16)  # same hash as the manifest uses
+
+    with open(tmp_path, "wb") as pack:
+        for word in words:
+            for voice, file_path in sorted(word_files[word].items()):
+                data = file_path.read_bytes()
+                pack.write(data)
+                hasher.update(data)
+                info = sf.info(str(file_path))
+                entries.setdefault(word, {})[voice] = {
+                    "offset": offset,
+                    "length": len(data),
+                    "sample_offset": sample_offset,
+                    "samples": info.frames,
+                    "sample_rate": info.samplerate,
+                }
+                offset += len(data)
+                sample_offset += info.frames
+    os.replace(tmp_path, pack_path)
+
+    return {
+        "url": pack_path.relative_to(audio_dir.parent.parent).as_posix(),
+        "size": offset,
+        "hash": hasher.hexdigest(),
+        "words": entries,
+        "sources": source_stamps(words, word_files, audio_dir),
+    }
+
+
+def pack_sprites(audio_dir, extension="opus", by="word", data_file=None, lang_code="bn-IN", workers=8, force=False):
+    """
+    Build or refresh all sprite packs for ``audio_dir`` and write the index.
+
+    Returns:
+        (index, rebuilt): the sprite index dict and the names of rewritten packs
+    """
+    audio_dir = Path(audio_dir)
+    packs_dir = audio_dir / PACKS_DIRNAME / by
+    packs_dir.mkdir(parents=True, exist_ok=True)
+    index_path = audio_dir / PACKS_DIRNAME / SPRITE_INDEX_FILENAME
+
+    previous = {}
+    if index_path.exists():
+        with open(index_path, "r", encoding="utf-8") as f:
+            old_index = json.load(f)
+        if old_index.get("format") == extension and old_index.get("by") == by:
+            previous = old_index.get("packs", {})
+        else:
+            # Packs from a different format or grouping are no longer indexed
+            for old_pack in old_index.get("packs", {}).values():
+                (audio_dir.parent.parent / old_pack["url"]).unlink(missing_ok=True)
+
+    word_files = collect_word_files(audio_dir, extension)
+    plan = plan_packs(word_files, by, data_file, lang_code)
+
+    packs = {}
+    to_build = []
+    for pack_name, words in plan.items():
+        old = previous.get(pack_name)
+        pack_exists = old is not None and (audio_dir.parent.parent / old["url"]).exists()
+        if not force and pack_exists and old["sources"] == source_stamps(words, word_files, audio_dir):
+            packs[pack_name] = old
+        else:
+            to_build.append((pack_name, words))
+
+    with Progress(
+        SpinnerColumn(),
+        TextColumn("[progress.description]{task.description}"),
+        BarColumn(),
+        TextColumn("[progress.percentage]{task.percentage:>3.0f}%"),
+        console=console
+    ) as progress, ThreadPoolExecutor(max_workers=workers) as pool:
+        task = progress.add_task("Packing...", total=len(to_build))
+        futures = {
+            pool.submit(build_pack, pack_name, words, word_files, audio_dir, packs_dir, extension): pack_name
+            for pack_name, words in to_build
+        }
+        for future, pack_name in futures.items():
+            packs[pack_name] = future.result()
+            progress.update(task, advance=1, description=f"Packed {pack_name}")
+
+    # Remove packs that no longer correspond to anything
+    for pack_name in set(previous) - set(plan):
+        (audio_dir.parent.parent / previous[pack_name]["url"]).unlink(missing_ok=True)
+
+    index = {"format": extension, "by": by, "packs": dict(sorted(packs.items()))}
+    tmp_index = index_path.with_name(f".{index_path.name}.tmp")
+    with open(tmp_index, "w", encoding="utf-8") as f:
+        json.dump(index, f, ensure_ascii=False)
+    os.replace(tmp_index, index_path)
+
+    return index, [pack_name for pack_name, _ in to_build]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pack per-voice recordings into sprite packs with an offset index")
+    parser.add_argument(
+        "--audio-dir",
+        default="public/audio/bn-IN",
+        help="Word tree to pack (default: public/audio/bn-IN)",
+    )
+    parser.add_argument(
+        "--format",
+        default="opus",
+        help="Extension of the encoded files to pack (default: opus; see encode_audio.py)",
+    )
+    parser.add_argument(
+        "--by",
+        choices=["word", "category"],
+        default="word",
+        help="One pack per word, or one per category (default: word)",
+    )
+    parser.add_argument(
+        "--data-file",
+        default="public/minimal_pairs_db.json",
+        help="Minimal pairs data, used to group words by category (default: public/minimal_pairs_db.json)",
+    )
+    parser.add_argument(
+        "--lang",
+        default="bn-IN",
+        help="Language code in the data file (default: bn-IN)",
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Rebuild every pack even if its members are unchanged",
+    )
+    args = parser.parse_args()
+
+    console.print("[bold blue]Audio Sprite Packer[/bold blue]")
+
+    audio_dir = Path(args.audio_dir)
+    if not audio_dir.exists():
+        console.print(f"[red]Error: Audio directory not found at {audio_dir}[/red]")
+        return
+
+    index, rebuilt = pack_sprites(
+        audio_dir, args.format, args.by, args.data_file, args.lang, force=args.force
+    )
+
+    total_bytes = sum(pack["size"] for pack in index["packs"].values())
+    console.print(f"\n[bold green]✓ {len(index['packs'])} packs ({total_bytes / 1024 ** 2:.1f} MB)[/bold green]")
+    console.print(f"[cyan]Rebuilt:[/cyan] {len(rebuilt)}, [cyan]unchanged:[/cyan] {len(index['packs']) - len(rebuilt)}")
+    console.print(f"[cyan]Index:[/cyan] {audio_dir / PACKS_DIRNAME / SPRITE_INDEX_FILENAME}")
+    console.print("Run generate_audio_manifest.py to publish the index in audio_manifest.json")
+
+
+if __name__ == "__main__":
+    main()
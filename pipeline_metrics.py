@@ -0,0 +1,337 @@
+"""
+Timing metrics and profiling for the recording pipeline.
+
+PipelineMetrics keeps a histogram per pipeline stage (API call, response
+decode, trim, write, validate, time lost to retries, ...) and per voice for
+API latency, plus labelled counters. It is filled from the network threads of
+make_tree_audio.py and from the timings the CPU worker processes return with
+each result, and written at the end of a run as a JSON report and, optionally,
+as a Prometheus text-format file (e.g. for the node_exporter textfile
+collector).
+
+RunProfiler collects cProfile statistics from the main thread, every network
+thread and the CPU stage calls in the worker processes into one pstats dump.
+"""
+
+import bisect
+import cProfile
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+
+DEFAULT_METRICS_PATH = Path(".audio_run_metrics.json")
+DEFAULT_PROFILE_PATH = Path(".audio_run.prof")
+
+# From Python 3.12 cProfile is built on sys.monitoring: one enabled profiler
+# sees every thread of the process, and a second one can't be enabled
+PROCESS_WIDE_PROFILER = sys.version_info >= (3, 12)
+
+# Histogram bucket upper bounds in seconds (Prometheus "le" labels); +Inf is implicit
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Prefix of every Prometheus metric name
+PROMETHEUS_PREFIX = "audio_pipeline"
+
+
+class Histogram:
+    """Fixed-bucket latency histogram with exact count, sum and max."""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last one is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def quantile(self, q):
+        """Estimate the ``q`` quantile by interpolating inside its bucket."""
+        if self.count == 0:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            if n and seen + n >= rank:
+                lower = self.buckets[i - 1] if i > 0 else 0.0
+                upper = self.buckets[i] if i < len(self.buckets) else self.max
+                return min(lower + (upper - lower) * (rank - seen) / n, self.max)
+            seen += n
+        return self.max
+
+    def summary(self):
+        """Return count, total and mean/p50/p90/p99/max in seconds."""
+        return {
+            "count": self.count,
+            "total": self.sum,
+            "mean": self.sum / self.count if self.count else 0.0,
+            "p50": self.quantile(0.5),
+            "p90": self.quantile(0.9),
+            "p99": self.quantile(0.99),
+            "max": self.max,
+        }
+
+
+class PipelineMetrics:
+    """
+    Thread-safe histograms and counters for one pipeline run.
+
+    Histograms and counters are identified by a name plus optional labels,
+    e.g. observe("stage", 0.12, stage="api") or count("retries", voice=...).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms = {}  # (name, labels) -> Histogram
+        self._counters = {}  # (name, labels) -> number
+        self.started = time.time()
+        self.finished = None
+
+    def observe(self, name, seconds, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram()
+            histogram.observe(seconds)
+
+    def count(self, name, amount=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def observe_stages(self, timings):
+        """Observe each {stage: seconds} entry, e.g. the timings returned by the CPU stage."""
+        for stage, seconds in timings.items():
+            self.observe("stage", seconds, stage=stage)
+
+    @contextmanager
+    def api_call(self, voice):
+        """Time one TTS API request as the "api" stage and as API latency of ``voice``; count its errors."""
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception as e:
+            self.count("api_errors", voice=voice, error=type(e).__name__)
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            self.observe("stage", elapsed, stage="api")
+            self.observe("api_latency", elapsed, voice=voice)
+
+    @contextmanager
+    def timer(self, name, **labels):
+        """Observe the time spent in the ``with`` block."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def stop(self):
+        """Mark the end of the run (for the wall-clock time in the reports)."""
+        self.finished = time.time()
+
+    def report(self):
+        """
+        Return the run's metrics as a JSON-serializable dict.
+
+        "stages" summarizes each stage, "voices" the API latency, retries and
+        failures per voice, and "counters" has every counter with its labels.
+        """
+        with self._lock:
+            histograms = dict(self._histograms)
+            counters = dict(self._counters)
+
+        stages = {}
+        voices = {}
+        for (name, labels), histogram in sorted(histograms.items()):
+            labels = dict(labels)
+            if name == "stage":
+                stages[labels["stage"]] = histogram.summary()
+            elif name == "api_latency":
+                voices.setdefault(labels["voice"], {})["api"] = histogram.summary()
+        for (name, labels), value in counters.items():
+            labels = dict(labels)
+            if "voice" in labels and name in ("retries", "failed", "api_errors"):
+                voice = voices.setdefault(labels["voice"], {})
+                voice[name] = voice.get(name, 0) + value
+
+        finished = self.finished or time.time()
+        return {
+            "started": self.started,
+            "elapsed": finished - self.started,
+            "stages": stages,
+            "voices": dict(sorted(voices.items())),
+            "counters": [
+                {"name": name, "labels": dict(labels), "value": value}
+                for (name, labels), value in sorted(counters.items())
+            ],
+        }
+
+    def write_json(self, path):
+        """Write report() to ``path`` atomically."""
+        _write_atomic(path, json.dumps(self.report(), indent=2))
+
+    def write_prometheus(self, path):
+        """Write every histogram and counter to ``path`` in the Prometheus text format."""
+        with self._lock:
+            histograms = dict(self._histograms)
+            counters = dict(self._counters)
+
+        lines = []
+        for name in sorted({name for name, _ in histograms}):
+            metric = f"{PROMETHEUS_PREFIX}_{name}_seconds"
+            lines.append(f"# TYPE {metric} histogram")
+            for (n, labels), histogram in sorted(histograms.items()):
+                if n != name:
+                    continue
+                cumulative = 0
+                for bound, count in zip(list(histogram.buckets) + ["+Inf"], histogram.counts):
+                    cumulative += count
+                    lines.append(f"{metric}_bucket{_labels(labels + (('le', bound),))} {cumulative}")
+                lines.append(f"{metric}_sum{_labels(labels)} {histogram.sum}")
+                lines.append(f"{metric}_count{_labels(labels)} {histogram.count}")
+        for name in sorted({name for name, _ in counters}):
+            metric = f"{PROMETHEUS_PREFIX}_{name}_total"
+            lines.append(f"# TYPE {metric} counter")
+            for (n, labels), value in sorted(counters.items()):
+                if n == name:
+                    lines.append(f"{metric}{_labels(labels)} {value}")
+        finished = self.finished or time.time()
+        lines.append(f"# TYPE {PROMETHEUS_PREFIX}_run_seconds gauge")
+        lines.append(f"{PROMETHEUS_PREFIX}_run_seconds {finished - self.started}")
+        lines.append(f"# TYPE {PROMETHEUS_PREFIX}_last_run_timestamp_seconds gauge")
+        lines.append(f"{PROMETHEUS_PREFIX}_last_run_timestamp_seconds {finished}")
+        _write_atomic(path, "\n".join(lines) + "\n")
+
+
+def timed(metrics, stage):
+    """metrics.timer("stage", stage=stage) if ``metrics`` is given, else a no-op context."""
+    if metrics is None:
+        return nullcontext()
+    return metrics.timer("stage", stage=stage)
+
+
+def api_call(metrics, voice):
+    """metrics.api_call(voice) if ``metrics`` is given, else a no-op context."""
+    if metrics is None:
+        return nullcontext()
+    return metrics.api_call(voice)
+
+
+def _labels(labels):
+    if not labels:
+        return ""
+    escaped = (
+        (key, str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")) for key, value in labels
+    )
+    return "{" + ",".join(f'{key}="{value}"' for key, value in escaped) + "}"
+
+
+def _write_atomic(path, text):
+    path = Path(path)
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    try:
+        tmp_path.write_text(text, encoding="utf-8")
+        os.replace(tmp_path, path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+
+class _CollectedStats:
+    """Adapter letting pstats.Stats.add() take raw stats returned by a worker process."""
+
+    def __init__(self, stats):
+        self.stats = stats
+
+    def create_stats(self):
+        pass
+
+
+def profiled_call(fn, *args, **kwargs):
+    """
+    Run ``fn`` under cProfile (in a worker process) and return (result, raw stats).
+
+    The raw stats are picklable and are merged by RunProfiler.add_stats().
+    """
+    if PROCESS_WIDE_PROFILER:
+        _release_inherited_profiler()
+    profile = cProfile.Profile()
+    result = profile.runcall(fn, *args, **kwargs)
+    profile.create_stats()
+    return result, profile.stats
+
+
+def _release_inherited_profiler():
+    """
+    Free the sys.monitoring profiler slot a forked worker inherits from a
+    parent that was profiling, so the worker can enable its own profiler.
+    """
+    monitoring = sys.monitoring
+    if monitoring.get_tool(monitoring.PROFILER_ID) is not None:
+        monitoring.set_events(monitoring.PROFILER_ID, 0)
+        monitoring.free_tool_id(monitoring.PROFILER_ID)
+
+
+class RunProfiler:
+    """
+    cProfile across the threads and worker processes of a run.
+
+    Call start() on the main thread, pass profile_thread as the initializer of
+    thread pools, hand the raw stats of worker-process calls (profiled_call) to
+    add_stats(), and call stop() to merge everything into one pstats.Stats.
+
+    Before Python 3.12 each thread gets its own profiler; from 3.12 the main
+    thread's profiler already covers every thread, so profile_thread does nothing.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._main = cProfile.Profile()
+        self._threads = []
+        self._worker_stats = []
+
+    def start(self):
+        self._main.enable()
+
+    def profile_thread(self):
+        """Thread pool initializer: profile the calling thread until stop()."""
+        if PROCESS_WIDE_PROFILER:
+            return
+        profile = cProfile.Profile()
+        with self._lock:
+            self._threads.append(profile)
+        profile.enable()
+
+    def add_stats(self, stats):
+        with self._lock:
+            self._worker_stats.append(stats)
+
+    def stop(self, path=None):
+        """Stop profiling and return the merged pstats.Stats, dumped to ``path`` if given."""
+        # Disable the main thread's profiler first; disabling the others resets
+        # the profile hook of the calling thread
+        self._main.disable()
+        merged = pstats.Stats(self._main)
+        with self._lock:
+            for profile in self._threads:
+                profile.create_stats()
+                if profile.stats:
+                    merged.add(profile)
+            for stats in self._worker_stats:
+                if stats:
+                    merged.add(_CollectedStats(stats))
+        if path is not None:
+            merged.dump_stats(str(path))
+        return merged
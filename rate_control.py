@@ -0,0 +1,357 @@
+"""
+Adaptive pacing of TTS API calls.
+
+RateController combines the pieces make_tree_audio.py needs to run at the
+quota ceiling without burning retries:
+
+    TokenBucket     requests per second sized to the project's quota
+    AIMDLimiter     concurrent requests: +1 per window of fast successes, halved
+                    on RESOURCE_EXHAUSTED or UNAVAILABLE or when latency climbs
+                    far above the best latency seen
+    backoff_delay   exponential backoff with full jitter between retries
+    CircuitBreaker  per voice: after repeated hard failures a voice is skipped
+                    for a cooldown instead of stalling the run, then probed again
+
+Transient errors (throttling, UNAVAILABLE, deadlines) say nothing about the
+voice: they only shrink the concurrency limit and are retried after a
+backoff. Only other errors and invalid audio count toward a voice's breaker.
+
+Only real API calls go through the controller; cache hits don't use quota.
+"""
+
+import random
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+# Multiple of the best smoothed latency above which the AIMD limit is decreased,
+# and the lowest such target (so jitter on very fast responses isn't mistaken for load)
+LATENCY_TOLERANCE = 3.0
+MIN_LATENCY_TARGET = 0.25
+
+# Weight of the newest sample in the smoothed latency
+LATENCY_SMOOTHING = 0.2
+
+# HTTP status codes (as used by google.api_core exceptions) of transient errors;
+# INTERNAL (500) is not among them, so a voice that keeps failing with it trips its breaker
+THROTTLED_CODES = (429,)
+UNAVAILABLE_CODES = (502, 503, 504)
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling the API for a voice whose circuit breaker is open."""
+
+
+def classify_error(error):
+    """
+    Return "throttled" (RESOURCE_EXHAUSTED / HTTP 429), "unavailable"
+    (UNAVAILABLE, bad gateway, DEADLINE_EXCEEDED or a client-side timeout) or
+    "error" for an exception from the TTS client.
+    """
+    code = getattr(error, "code", None)
+    if isinstance(code, int):
+        if code in THROTTLED_CODES:
+            return "throttled"
+        if code in UNAVAILABLE_CODES:
+            return "unavailable"
+    if isinstance(error, TimeoutError) or type(error).__name__ in ("DeadlineExceeded", "Timeout", "ReadTimeout"):
+        return "unavailable"
+    return "error"
+
+
+def backoff_delay(attempt, base=0.5, cap=30.0, rng=random):
+    """
+    Delay before retry number ``attempt`` (1 for the first retry).
+
+    Exponential backoff with full jitter: uniform between 0 and
+    min(cap, base * 2 ** (attempt - 1)), so clients that failed together don't
+    retry together.
+    """
+    return rng.uniform(0, min(cap, base * 2 ** max(attempt - 1, 0)))
+
+
+class TokenBucket:
+    """
+    Blocking token bucket.
+
+    Args:
+        rate: Tokens added per second
+        capacity: Maximum burst (default: one second's worth, at least 1)
+    """
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(rate, 1.0)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens=1):
+        """Take ``tokens``, sleeping until they are available; returns the seconds waited."""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return waited
+                delay = (tokens - self._tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+
+class AIMDLimiter:
+    """
+    Concurrency limit adjusted by additive increase / multiplicative decrease.
+
+    The limit grows by ``increase`` after each full window of successful
+    requests (one per slot), and is multiplied by ``decrease`` when a request
+    is throttled or the smoothed latency exceeds ``latency_target`` (default:
+    LATENCY_TOLERANCE times the best smoothed latency seen, at least
+    MIN_LATENCY_TARGET). Decreases happen
+    at most once per smoothed latency, since requests already in flight were
+    sent under the old limit.
+
+    Args:
+        initial: Starting limit
+        minimum: Lowest limit
+        maximum: Highest limit (default: ``initial``)
+    """
+
+    def __init__(self, initial, minimum=1, maximum=None, increase=1.0, decrease=0.5, latency_target=None):
+        self.minimum = minimum
+        self.maximum = maximum if maximum is not None else initial
+        self.increase = increase
+        self.decrease = decrease
+        self.latency_target = latency_target
+        self.limit = float(min(max(initial, minimum), self.maximum))
+        self.lowest_limit = self.limit
+        self.decreases = 0
+        self._in_flight = 0
+        self._successes = 0
+        self._latency = None
+        self._best_latency = None
+        self._last_decrease = 0.0
+        self._condition = threading.Condition()
+
+    def acquire(self):
+        """Wait for a free slot under the current limit; returns the seconds waited."""
+        start = time.monotonic()
+        with self._condition:
+            while self._in_flight >= int(self.limit):
+                self._condition.wait()
+            self._in_flight += 1
+        return time.monotonic() - start
+
+    def release(self, latency=None, throttled=False):
+        """Free a slot and adjust the limit from the request's outcome."""
+        with self._condition:
+            self._in_flight -= 1
+            now = time.monotonic()
+            slow = False
+            if latency is not None and not throttled:
+                self._latency = latency if self._latency is None else (
+                    LATENCY_SMOOTHING * latency + (1 - LATENCY_SMOOTHING) * self._latency
+                )
+                self._best_latency = min(self._best_latency or self._latency, self._latency)
+                target = self.latency_target or max(LATENCY_TOLERANCE * self._best_latency, MIN_LATENCY_TARGET)
+                slow = self._latency > target
+
+            if throttled or slow:
+                if now - self._last_decrease >= (self._latency or 0.0):
+                    self.limit = max(self.minimum, self.limit * self.decrease)
+                    self.lowest_limit = min(self.lowest_limit, self.limit)
+                    self.decreases += 1
+                    self._last_decrease = now
+                self._successes = 0
+            else:
+                self._successes += 1
+                if self._successes >= int(self.limit):
+                    self.limit = min(self.maximum, self.limit + self.increase)
+                    self._successes = 0
+            self._condition.notify_all()
+
+
+class CircuitBreaker:
+    """
+    Closed / open / half-open breaker for one voice.
+
+    After ``failure_threshold`` consecutive failures the breaker opens and
+    allow() is False for ``cooldown`` seconds. Then one probe is let through
+    (half-open): success closes the breaker, failure opens it again with the
+    cooldown doubled, up to ``max_cooldown``.
+    """
+
+    def __init__(self, failure_threshold=5, cooldown=30.0, max_cooldown=300.0):
+        self.failure_threshold = failure_threshold
+        self.base_cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.cooldown = cooldown
+        self.state = "closed"
+        self.opened = 0
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == "closed":
+                return True
+            if self.state == "open" and time.monotonic() - self._opened_at >= self.cooldown:
+                self.state = "half-open"
+                self._probing = False
+            if self.state == "half-open" and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = "closed"
+            self.cooldown = self.base_cooldown
+            self._failures = 0
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self.state == "half-open":
+                self.cooldown = min(self.cooldown * 2, self.max_cooldown)
+                self._open()
+            elif self.state == "closed" and self._failures >= self.failure_threshold:
+                self._open()
+
+    def record_neutral(self):
+        """A transient error says nothing about the voice; let another probe through."""
+        with self._lock:
+            self._probing = False
+
+    def _open(self):
+        self.state = "open"
+        self.opened += 1
+        self._opened_at = time.monotonic()
+        self._probing = False
+
+
+class RateController:
+    """
+    Token bucket, AIMD concurrency limit, backoff and per-voice circuit breakers.
+
+    Wrap each API call in ``with controller.request(voice):`` and report the
+    final outcome of every attempt (including validation of the returned
+    audio) with record_result().
+
+    Args:
+        quota_per_minute: Requests per minute allowed by the project quota
+            (None = no token bucket)
+        concurrency: Maximum (and starting) number of concurrent requests
+        min_concurrency: Lowest the AIMD limit may go
+        latency_target: Smoothed latency in seconds above which concurrency is
+            reduced (default: LATENCY_TOLERANCE x the best latency seen)
+        backoff_base: First retry waits up to this many seconds
+        backoff_max: Longest wait between retries
+        breaker_threshold: Consecutive failures that open a voice's breaker
+        breaker_cooldown: Seconds a voice is skipped before being probed again
+    """
+
+    def __init__(
+        self,
+        quota_per_minute=None,
+        concurrency=8,
+        min_concurrency=1,
+        latency_target=None,
+        backoff_base=0.5,
+        backoff_max=30.0,
+        breaker_threshold=5,
+        breaker_cooldown=30.0,
+    ):
+        self.bucket = TokenBucket(quota_per_minute / 60) if quota_per_minute else None
+        self.limiter = AIMDLimiter(concurrency, minimum=min_concurrency, latency_target=latency_target)
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.breaker_threshold = breaker_threshold
+        self.breaker_cooldown = breaker_cooldown
+        self._breakers = {}
+        self._lock = threading.Lock()
+        self._random = random.Random()
+        self.stats = {"requests": 0, "throttled": 0, "unavailable": 0, "errors": 0, "rejected": 0, "quota_wait": 0.0}
+
+    def breaker(self, voice):
+        with self._lock:
+            breaker = self._breakers.get(voice)
+            if breaker is None:
+                breaker = self._breakers[voice] = CircuitBreaker(self.breaker_threshold, self.breaker_cooldown)
+            return breaker
+
+    def _count(self, key, amount=1):
+        with self._lock:
+            self.stats[key] += amount
+
+    @contextmanager
+    def request(self, voice):
+        """
+        Pace one API request for ``voice``.
+
+        Raises CircuitOpenError without calling the API if the voice's breaker
+        is open. Errors raised inside the block are classified: throttling
+        and unavailability shrink the concurrency limit, other errors count
+        against the voice's breaker.
+        """
+        breaker = self.breaker(voice)
+        if not breaker.allow():
+            self._count("rejected")
+            raise CircuitOpenError(f"Circuit breaker open for {voice} after repeated failures")
+
+        if self.bucket is not None:
+            self._count("quota_wait", self.bucket.acquire())
+        self.limiter.acquire()
+        self._count("requests")
+        start = time.monotonic()
+        transient = False
+        try:
+            yield
+        except Exception as e:
+            kind = classify_error(e)
+            transient = kind in ("throttled", "unavailable")
+            if transient:
+                self._count(kind)
+                breaker.record_neutral()
+            else:
+                self._count("errors")
+                breaker.record_failure()
+            raise
+        finally:
+            self.limiter.release(latency=None if transient else time.monotonic() - start, throttled=transient)
+
+    def record_result(self, voice, ok):
+        """Report whether an attempt for ``voice`` produced a valid recording."""
+        if ok:
+            self.breaker(voice).record_success()
+        else:
+            self.breaker(voice).record_failure()
+
+    def backoff(self, attempt):
+        """Seconds to wait before retry number ``attempt`` (see backoff_delay)."""
+        with self._lock:
+            return backoff_delay(attempt, self.backoff_base, self.backoff_max, self._random)
+
+    def snapshot(self):
+        """Return the request counters, the AIMD limit and the open breakers."""
+        with self._lock:
+            stats = dict(self.stats)
+            breakers = dict(self._breakers)
+        stats["concurrency_limit"] = self.limiter.limit
+        stats["lowest_concurrency_limit"] = self.limiter.lowest_limit
+        stats["concurrency_decreases"] = self.limiter.decreases
+        stats["breakers_opened"] = {voice: b.opened for voice, b in sorted(breakers.items()) if b.opened}
+        return stats
+
+
+def rate_limited(controller, voice):
+    """controller.request(voice) if ``controller`` is given, else a no-op context."""
+    if controller is None:
+        return nullcontext()
+    return controller.request(voice)
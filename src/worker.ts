@@ -29,12 +29,24 @@ export default {
         if (assetPath.startsWith('/assets/')) {
           // Cache static assets for 1 year
           response.headers.set('Cache-Control', 'public, max-age=31536000, immutable');
-        } else if (assetPath.match(/\.(mp3|wav|json)$/)) {
+        } else if (assetPath.includes('/_hashed/')) {
+          // Content-hashed audio published by generate_audio_manifest.py --publish never changes
+          response.headers.set('Cache-Control', 'public, max-age=31536000, immutable');
+          response.headers.set('Access-Control-Allow-Origin', '*');
+          response.headers.set('Access-Control-Allow-Methods', 'GET, HEAD, OPTIONS');
+          response.headers.set('Access-Control-Allow-Headers', 'Range');
+        } else if (assetPath.match(/\/data\/[^/]+\/[^/]+\.[0-9a-f]{16}\.json$/)) {
+          // Content-hashed data shards written by build_data.py never change
+          response.headers.set('Cache-Control', 'public, max-age=31536000, immutable');
+        } else if (assetPath.endsWith('/audio_manifest.json') || assetPath.endsWith('/data/index.json')) {
+          // The manifest and the data index map to hashed URLs, so they must always be revalidated
+          response.headers.set('Cache-Control', 'public, no-cache');
+        } else if (assetPath.match(/\.(mp3|wav|opus|m4a|pack|json)$/)) {
           // Cache audio and data files for 24 hours
           response.headers.set('Cache-Control', 'public, max-age=86400');
           
           // Add CORS headers for audio files
-          if (assetPath.match(/\.(mp3|wav)$/)) {
+          if (assetPath.match(/\.(mp3|wav|opus|m4a|pack)$/)) {
             response.headers.set('Access-Control-Allow-Origin', '*');
             response.headers.set('Access-Control-Allow-Methods', 'GET, HEAD, OPTIONS');
             response.headers.set('Access-Control-Allow-Headers', 'Range');
@@ -90,7 +102,7 @@ function addSecurityHeaders(response: Response): void {
     "script-src 'self' 'unsafe-inline' 'unsafe-eval'; " +
     "style-src 'self' 'unsafe-inline'; " +
     "img-src 'self' data: https:; " +
-    "media-src 'self' data:; " +
+    "media-src 'self' data: blob:; " +
     "connect-src 'self' https:; " +
     "font-src 'self' data:;"
   );
@@ -0,0 +1,27 @@
+import numpy as np
+import pytest
+
+from audio_trim import _synthetic_corpus, nonsilent_bounds, split_on_silence
+
+librosa = pytest.importorskip("librosa")
+
+
+@pytest.mark.parametrize("top_db", [20, 40, 60])
+def test_split_on_silence_matches_librosa(top_db):
+    for clip in _synthetic_corpus(n_clips=40):
+        np.testing.assert_array_equal(split_on_silence(clip, top_db=top_db), librosa.effects.split(clip, top_db=top_db))
+
+
+def test_split_on_silence_matches_librosa_on_float_and_stereo():
+    for clip in _synthetic_corpus(n_clips=10, seed=1):
+        y = clip.astype(np.float32) / 32768
+        np.testing.assert_array_equal(split_on_silence(y, top_db=40), librosa.effects.split(y, top_db=40))
+        stereo = np.stack([y, 0.5 * y], axis=1)
+        np.testing.assert_array_equal(split_on_silence(stereo, top_db=40), librosa.effects.split(stereo.T, top_db=40))
+
+
+def test_nonsilent_bounds_are_the_outer_edges_of_the_split():
+    for clip in _synthetic_corpus(n_clips=40, seed=2):
+        intervals = librosa.effects.split(clip, top_db=40)
+        assert nonsilent_bounds(clip, top_db=40) == (intervals[0, 0], intervals[-1, 1])
+    assert nonsilent_bounds(np.zeros(4096, dtype=np.int16), ref=1.0) is None
@@ -0,0 +1,69 @@
+import json
+import os
+import shutil
+import sys
+
+import numpy as np
+import soundfile as sf
+
+import generate_audio_manifest
+from generate_audio_manifest import link_published_copies, load_scan_cache, publish_hashed_files, scan_audio_directory
+
+
+def write_tone(path, freq):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tone = np.sin(2 * np.pi * freq * np.arange(2400) / 24000)
+    sf.write(path, tone, 24000, subtype="PCM_16")
+
+
+def test_every_language_gets_its_own_manifest(tmp_path, monkeypatch):
+    audio_root = tmp_path / "audio"
+    write_tone(audio_root / "bn-IN" / "kal" / "kal_aoede.wav", 220)
+    write_tone(audio_root / "hi-IN" / "kal" / "kal_puck.wav", 330)
+    write_tone(audio_root / "hi-IN" / "tal" / "tal_puck.wav", 440)
+    cache_file = tmp_path / "scan_cache.json"
+
+    def run(*args):
+        argv = ["generate_audio_manifest.py", "--audio-root", str(audio_root), "--cache-file", str(cache_file),
+                "--no-feature-cache", *args]
+        monkeypatch.setattr(sys, "argv", argv)
+        generate_audio_manifest.main()
+
+    run()
+    manifests = {
+        language: json.loads((audio_root / language / "audio_manifest.json").read_text(encoding="utf-8"))
+        for language in ("bn-IN", "hi-IN")
+    }
+    assert manifests["bn-IN"]["words"]["kal"]["voices"] == ["aoede"]
+    assert manifests["hi-IN"]["words"]["kal"]["voices"] == ["puck"]
+    assert manifests["hi-IN"]["total_words"] == 2
+
+    # A run limited to one language keeps the other language's cached scans
+    write_tone(audio_root / "bn-IN" / "tal" / "tal_aoede.wav", 550)
+    run("--languages", "bn-IN")
+    assert set(load_scan_cache(cache_file)) == {str((audio_root / language).resolve()) for language in ("bn-IN", "hi-IN")}
+    manifest = json.loads((audio_root / "bn-IN" / "audio_manifest.json").read_text(encoding="utf-8"))
+    assert manifest["total_words"] == 2
+
+
+def test_link_dist_stores_published_recordings_once(tmp_path):
+    audio_dir = tmp_path / "public" / "audio" / "bn-IN"
+    for word, voice, freq in (("kal", "aoede", 220), ("kal", "puck", 330), ("tal", "aoede", 440)):
+        write_tone(audio_dir / word / f"{word}_{voice}.wav", freq)
+
+    manifest, dirs, _ = scan_audio_directory(audio_dir)
+    manifest, created, _, skipped = publish_hashed_files(manifest, dirs, audio_dir)
+    assert (created, skipped) == (3, 0)
+
+    # Copying public/ into dist/ loses the hard links
+    dist = tmp_path / "dist"
+    shutil.copytree(tmp_path / "public", dist)
+    plain = dist / "audio" / "bn-IN" / "kal" / "kal_aoede.wav"
+    hashed = dist / manifest["words"]["kal"]["files"]["wav"]["aoede"]["url"]
+    assert not os.path.samefile(plain, hashed)
+
+    assert link_published_copies(manifest, dist) == (3, 0)
+    assert os.path.samefile(plain, hashed)
+    assert plain.read_bytes() == (audio_dir / "kal" / "kal_aoede.wav").read_bytes()
+    # Nothing left to link on a second run
+    assert link_published_copies(manifest, dist) == (0, 0)
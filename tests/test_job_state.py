@@ -0,0 +1,72 @@
+import time
+
+from job_state import JobStateDB, FLAGGED_STATUS
+
+
+def _set_updated_at(db, path, updated_at, file_size=None):
+    db._conn.execute("UPDATE jobs SET updated_at = ? WHERE path = ?", (updated_at, path))
+    if file_size is not None:
+        db._conn.execute("UPDATE jobs SET file_size = ? WHERE path = ?", (file_size, path))
+    db._conn.commit()
+
+
+def test_merge_prefers_done_over_failed_despite_clock_skew(tmp_path):
+    now = time.time()
+    with JobStateDB(tmp_path / "ours.sqlite") as ours, JobStateDB(tmp_path / "theirs.sqlite") as theirs:
+        # Our machine's clock runs ahead: its stale failures look newer than their fresh results
+        ours.record_result("a.wav", "a", "voice-A", "failed", False, reason="timeout")
+        _set_updated_at(ours, "a.wav", now + 3600)
+        theirs.record_result("a.wav", "a", "voice-A", "success", True, duration=0.8)
+        _set_updated_at(theirs, "a.wav", now)
+
+        ours.record_result("b.wav", "b", "voice-A", "success", True, duration=0.7)
+        _set_updated_at(ours, "b.wav", now - 3600)
+        theirs.record_result("b.wav", "b", "voice-A", FLAGGED_STATUS, False, reason="clipped")
+        _set_updated_at(theirs, "b.wav", now)
+
+        # Same kind of status on both sides: the later timestamp still wins
+        ours.record_result("c.wav", "c", "voice-A", "failed", False, reason="old")
+        _set_updated_at(ours, "c.wav", now - 60)
+        theirs.record_result("c.wav", "c", "voice-A", "failed", False, reason="new")
+        _set_updated_at(theirs, "c.wav", now)
+
+        theirs.record_result("d.wav", "d", "voice-A", "success", True, duration=0.9)
+
+        assert ours.merge(tmp_path / "theirs.sqlite") == 4
+        assert ours.get("a.wav")["status"] == "success"
+        assert ours.get("b.wav")["status"] == FLAGGED_STATUS
+        assert ours.get("c.wav")["reason"] == "new"
+        assert ours.get("d.wav")["status"] == "success"
+
+
+def test_merge_keeps_flags_until_the_recording_is_replaced(tmp_path):
+    now = time.time()
+    with JobStateDB(tmp_path / "ours.sqlite") as ours, JobStateDB(tmp_path / "theirs.sqlite") as theirs:
+        # An older success of the same file doesn't clear a flag
+        ours.record_result("a.wav", "a", "voice-A", FLAGGED_STATUS, False, reason="clipped")
+        _set_updated_at(ours, "a.wav", now, file_size=9000)
+        theirs.record_result("a.wav", "a", "voice-A", "success", True)
+        _set_updated_at(theirs, "a.wav", now - 3600, file_size=9000)
+
+        # A success for a different file does, even with an earlier (skewed) timestamp
+        ours.record_result("b.wav", "b", "voice-A", FLAGGED_STATUS, False, reason="clipped")
+        _set_updated_at(ours, "b.wav", now, file_size=9000)
+        theirs.record_result("b.wav", "b", "voice-A", "regenerate", True)
+        _set_updated_at(theirs, "b.wav", now - 3600, file_size=12000)
+
+        # So does a later success of the same file
+        ours.record_result("c.wav", "c", "voice-A", FLAGGED_STATUS, False, reason="clipped")
+        _set_updated_at(ours, "c.wav", now - 3600, file_size=9000)
+        theirs.record_result("c.wav", "c", "voice-A", "skipped", True)
+        _set_updated_at(theirs, "c.wav", now, file_size=9000)
+
+        # A failed regeneration never does
+        ours.record_result("d.wav", "d", "voice-A", FLAGGED_STATUS, False, reason="clipped")
+        _set_updated_at(ours, "d.wav", now - 3600)
+        theirs.record_result("d.wav", "d", "voice-A", "failed", False, reason="timeout")
+
+        assert ours.merge(tmp_path / "theirs.sqlite") == 2
+        assert ours.get("a.wav")["status"] == FLAGGED_STATUS
+        assert ours.get("b.wav")["status"] == "regenerate"
+        assert ours.get("c.wav")["status"] == "skipped"
+        assert ours.get("d.wav")["status"] == FLAGGED_STATUS
@@ -0,0 +1,30 @@
+import make_tree_audio
+from fake_tts import FakeTTSClient
+from pipeline_metrics import RunProfiler
+
+
+def test_pipeline_runs_with_profiling(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(make_tree_audio, "_tts_client_factory", lambda beta: FakeTTSClient())
+    unique_words = {f"word{i}": (f"শব্দ{i}", f"word{i}") for i in range(4)}
+    base_audio_config = {"volume_gain_db": 0.0, "effects_profile": "headphone-class-device", "language_code": "bn-IN"}
+    jobs = make_tree_audio.build_recording_jobs(
+        unique_words, ["bn-IN-Wavenet-A", "bn-IN-Wavenet-B"], base_audio_config
+    )
+
+    profiler = RunProfiler()
+    profiler.start()
+    results = []
+    try:
+        make_tree_audio.run_recording_pipeline(
+            jobs, tmp_path / "audio", on_result=lambda job, result: results.append(result),
+            network_workers=2, cpu_workers=1, profiler=profiler,
+        )
+    finally:
+        stats = profiler.stop(tmp_path / "run.prof")
+
+    assert [result["status"] for result in results] == ["success"] * len(jobs)
+    profiled = {name for _, _, name in stats.stats}
+    assert "fetch_word_audio" in profiled  # network threads
+    assert "postprocess_recording" in profiled  # CPU worker processes
+    assert (tmp_path / "run.prof").exists()
@@ -0,0 +1,27 @@
+import pytest
+
+from rate_control import RateController
+
+
+class _APIError(Exception):
+    def __init__(self, code):
+        super().__init__(f"HTTP {code}")
+        self.code = code
+
+
+def _fail(controller, voice, error):
+    with pytest.raises(type(error)):
+        with controller.request(voice):
+            raise error
+
+
+def test_only_hard_errors_open_the_breaker():
+    controller = RateController(concurrency=4, breaker_threshold=3)
+    for error in (_APIError(429), _APIError(503), _APIError(504), TimeoutError()) * 3:
+        _fail(controller, "transient-voice", error)
+    assert controller.breaker("transient-voice").state == "closed"
+    assert controller.limiter.decreases > 0
+
+    for _ in range(3):
+        _fail(controller, "broken-voice", _APIError(500))
+    assert controller.breaker("broken-voice").state == "open"
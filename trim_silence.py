@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+# /// script
+# requires-python = ">=3.12"
+# dependencies = [
+# "numpy",
+# "soundfile",
+# "rich"
+# ]
+# ///
+
+"""
+Script to trim leading and trailing silence from the recordings in place.
+
+Walks public/audio/<lang>/<word>/ (or any tree of audio files; directories
+starting with "_", such as the published _hashed copies, are skipped) and
+trims every file in a process pool. Each file is decoded once and framed
+once: the first and last non-silent frames of the RMS mask give both cut
+points, so the trailing silence is found without scanning a reversed copy.
+A margin of --keep-ms is left on either side.
+
+Trimmed files are written atomically, either over the original or into a
+mirror tree under --output-dir. WAV recordings stay 16-bit PCM, so trimming
+them is lossless; compressed formats are re-encoded with the same codec. Run
+encode_audio.py afterwards to refresh the encoded siblings of trimmed WAVs.
+
+Files already trimmed with the same settings are listed, with the size and
+mtime they were left with, in a small state file, so a rerun only decodes new
+or changed files.
+"""
+
+import argparse
+import json
+import os
+import shutil
+import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from rich.console import Console
+from rich.progress import Progress, SpinnerColumn, TextColumn, BarColumn, TimeRemainingColumn
+
+console = Console()
+
+DEFAULT_AUDIO_ROOT = Path("public", "audio")
+DEFAULT_STATE_PATH = Path(".audio_trim_state.json")
+TRIM_STATE_VERSION = 1
+
+AUDIO_EXTENSIONS = ("wav", "mp3", "opus", "ogg", "flac")
+
+# Analysis frames, in seconds so the cut precision doesn't depend on the sample rate
+FRAME_SECONDS = 0.02
+HOP_SECONDS = 0.005
+
+
+def find_audio_files(audio_root, extensions=("wav",), languages=None):
+    """
+    Return every audio file with one of ``extensions`` below ``audio_root``.
+
+    Args:
+        audio_root: Root of the <lang>/<word>/ tree
+        extensions: File extensions to include, without the dot
+        languages: If given, only these top-level language directories are searched
+    """
+    audio_root = Path(audio_root)
+    roots = [audio_root / lang for lang in languages] if languages else [audio_root]
+    suffixes = {f".{extension.lower()}" for extension in extensions}
+    files = []
+    for root in roots:
+        for path in root.rglob("*"):
+            if path.suffix.lower() not in suffixes or path.name.startswith("."):
+                continue
+            if any(part.startswith("_") for part in path.relative_to(audio_root).parts[:-1]):
+                continue
+            if path.is_file():
+                files.append(path)
+    return sorted(files)
+
+
+def settings_key(threshold_db, keep_ms, output_dir=None):
+    """Identify the trim settings, so files trimmed differently are trimmed again."""
+    return f"{threshold_db:g}:{keep_ms:g}:{output_dir or ''}"
+
+
+def load_trim_state(state_path, audio_root):
+    """Return {relative path: [size, mtime_ns, settings key]} for ``audio_root``, or {} if there is none."""
+    try:
+        with open(state_path, "r", encoding="utf-8") as f:
+            state = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+    if state.get("version") != TRIM_STATE_VERSION or state.get("audio_root") != str(Path(audio_root).resolve()):
+        return {}
+    return state.get("files", {})
+
+
+def save_trim_state(state_path, audio_root, files):
+    """Write the trim state atomically."""
+    state_path = Path(state_path)
+    tmp_path = state_path.with_name(f".{state_path.name}.{os.getpid()}.tmp")
+    state = {"version": TRIM_STATE_VERSION, "audio_root": str(Path(audio_root).resolve()), "files": files}
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(json.dumps(state, ensure_ascii=False, separators=(",", ":")))
+    os.replace(tmp_path, state_path)
+
+
+def is_already_trimmed(entry, source_file, output_file, key):
+    """True if the state ``entry`` shows ``source_file`` unchanged since it was trimmed with ``key``."""
+    if entry is None or entry[2] != key:
+        return False
+    try:
+        st = source_file.stat()
+    except FileNotFoundError:
+        return False
+    return st.st_size == entry[0] and st.st_mtime_ns == entry[1] and output_file.exists()
+
+
+def trim_file(source_file, output_file, threshold_db=-50.0, keep_ms=100.0, dry_run=False):
+    """
+    Trim the silence around one recording.
+
+    Runs in a worker process. The output is written under a temporary name and
+    renamed into place, so an interrupted run never leaves a partial file.
+
+    Args:
+        source_file: Recording to trim
+        output_file: Where to write the result (may be ``source_file``)
+        threshold_db: Frames quieter than this (dBFS) count as silence
+        keep_ms: Silence to keep before the first and after the last non-silent frame
+        dry_run: Only measure what would be cut
+
+    Returns:
+        dict with "source", "output", "status" ("trimmed", "unchanged", "silent"
+        or "failed"), the frame counts before and after, the sample rate, the
+        source's size and mtime_ns after the run, and reason
+    """
+    import numpy as np
+    import soundfile as sf
+    from audio_trim import nonsilent_bounds
+    from wav_io import write_pcm16_atomic
+
+    source_file, output_file = Path(source_file), Path(output_file)
+    result = {"source": source_file, "output": output_file}
+    tmp_file = output_file.with_name(f".{output_file.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+
+    try:
+        info = sf.info(str(source_file))
+        pcm16_wav = info.format == "WAV" and info.subtype == "PCM_16"
+        # 16-bit WAVs are read as int16 so writing them back loses nothing
+        samples, sample_rate = sf.read(str(source_file), dtype="int16" if pcm16_wav else "float32")
+        n_frames = samples.shape[0]
+        result.update(sample_rate=sample_rate, frames_before=n_frames, frames_after=n_frames)
+
+        bounds = nonsilent_bounds(
+            samples,
+            top_db=-threshold_db,
+            frame_length=max(1, round(FRAME_SECONDS * sample_rate)),
+            hop_length=max(1, round(HOP_SECONDS * sample_rate)),
+            ref=32768.0 if pcm16_wav else 1.0,
+        )
+        if bounds is None:
+            return {**result, "status": "silent", "reason": f"no frame above {threshold_db:g} dBFS"}
+
+        keep = round(keep_ms / 1000 * sample_rate)
+        start, end = max(0, bounds[0] - keep), min(n_frames, bounds[1] + keep)
+        result["frames_after"] = end - start
+
+        if dry_run:
+            status = "unchanged" if (start, end) == (0, n_frames) else "trimmed"
+        elif (start, end) == (0, n_frames):
+            status = "unchanged"
+            if output_file != source_file:
+                output_file.parent.mkdir(parents=True, exist_ok=True)
+                shutil.copyfile(source_file, tmp_file)
+                os.replace(tmp_file, output_file)
+        else:
+            status = "trimmed"
+            output_file.parent.mkdir(parents=True, exist_ok=True)
+            trimmed = samples[start:end]
+            if pcm16_wav:
+                write_pcm16_atomic(output_file, trimmed, sample_rate)
+            else:
+                sf.write(str(tmp_file), np.ascontiguousarray(trimmed), sample_rate, format=info.format, subtype=info.subtype)
+                os.replace(tmp_file, output_file)
+
+        st = source_file.stat()
+        return {**result, "status": status, "size": st.st_size, "mtime_ns": st.st_mtime_ns}
+    except Exception as e:
+        tmp_file.unlink(missing_ok=True)
+        return {**result, "status": "failed", "reason": str(e)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Trim leading and trailing silence from the recordings")
+    parser.add_argument(
+        "--audio-root",
+        default=str(DEFAULT_AUDIO_ROOT),
+        help=f"Root of the <lang>/<word>/ recordings (default: {DEFAULT_AUDIO_ROOT})",
+    )
+    parser.add_argument(
+        "--languages",
+        nargs="+",
+        default=None,
+        help="Only trim these language directories (default: all)",
+    )
+    parser.add_argument(
+        "--extensions",
+        nargs="+",
+        choices=AUDIO_EXTENSIONS,
+        default=["wav"],
+        help="File types to trim; compressed files are re-encoded (default: wav)",
+    )
+    parser.add_argument(
+        "--output-dir",
+        default=None,
+        help="Write trimmed files into a mirror tree here instead of in place",
+    )
+    parser.add_argument(
+        "--threshold-db",
+        type=float,
+        default=-50.0,
+        help="Level in dBFS below which audio counts as silence (default: -50)",
+    )
+    parser.add_argument(
+        "--keep-ms",
+        type=float,
+        default=100.0,
+        help="Silence to keep at the beginning and end, in milliseconds (default: 100)",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Trimming processes (default: CPU count)",
+    )
+    parser.add_argument(
+        "--state-file",
+        default=str(DEFAULT_STATE_PATH),
+        help=f"Record of files already trimmed (default: {DEFAULT_STATE_PATH})",
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Trim every file, even those the state file lists as already trimmed",
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Report how much would be trimmed without writing anything",
+    )
+    args = parser.parse_args()
+
+    console.print("[bold blue]Silence Trimmer[/bold blue]")
+
+    audio_root = Path(args.audio_root)
+    if not audio_root.exists():
+        console.print(f"[red]Error: Audio directory not found at {audio_root}[/red]")
+        return
+    output_dir = Path(args.output_dir) if args.output_dir else None
+
+    key = settings_key(args.threshold_db, args.keep_ms, output_dir and output_dir.resolve())
+    state = load_trim_state(args.state_file, audio_root)
+    sources = find_audio_files(audio_root, args.extensions, args.languages)
+    tasks = []
+    for source in sources:
+        relative = source.relative_to(audio_root)
+        output = output_dir / relative if output_dir else source
+        if args.force or not is_already_trimmed(state.get(str(relative)), source, output, key):
+            tasks.append((source, output))
+    skipped = len(sources) - len(tasks)
+    console.print(f"[green]{len(sources)} files, {len(tasks)} to check, {skipped} already trimmed[/green]")
+
+    counts = {"trimmed": 0, "unchanged": 0, "silent": 0, "failed": 0}
+    failed = []
+    seconds_before = seconds_after = 0.0
+
+    try:
+        with Progress(
+            SpinnerColumn(),
+            TextColumn("[progress.description]{task.description}"),
+            BarColumn(),
+            TextColumn("[progress.percentage]{task.percentage:>3.0f}%"),
+            TimeRemainingColumn(),
+            console=console
+        ) as progress, ProcessPoolExecutor(max_workers=args.workers) as pool:
+
+            task = progress.add_task("Trimming...", total=len(tasks))
+            futures = [
+                pool.submit(trim_file, source, output, args.threshold_db, args.keep_ms, args.dry_run)
+                for source, output in tasks
+            ]
+            for future in as_completed(futures):
+                result = future.result()
+                counts[result["status"]] += 1
+                if result["status"] in ("silent", "failed"):
+                    failed.append(result)
+                else:
+                    seconds_before += result["frames_before"] / result["sample_rate"]
+                    seconds_after += result["frames_after"] / result["sample_rate"]
+                    if not args.dry_run:
+                        relative = str(result["source"].relative_to(audio_root))
+                        state[relative] = [result["size"], result["mtime_ns"], key]
+                progress.update(task, advance=1, description=f"Checked {result['source'].name}")
+    finally:
+        # Keep the progress of an interrupted run
+        if not args.dry_run:
+            save_trim_state(args.state_file, audio_root, state)
+
+    verb = "Would trim" if args.dry_run else "Trimmed"
+    console.print(
+        f"\n[bold green]✓ {verb} {counts['trimmed']} files[/bold green] "
+        f"({counts['unchanged']} had nothing to trim, {skipped} already trimmed)"
+    )
+    if seconds_before:
+        console.print(
+            f"[cyan]Audio:[/cyan] {seconds_before:.1f}s → {seconds_after:.1f}s "
+            f"({1 - seconds_after / seconds_before:.1%} silence removed)"
+        )
+    for result in failed[:10]:
+        color = "yellow" if result["status"] == "silent" else "red"
+        console.print(f"[{color}]✗ {result['source']}: {result['reason']}[/{color}]")
+    if len(failed) > 10:
+        console.print(f"[red]  ... and {len(failed) - 10} more files not trimmed[/red]")
+    if counts["failed"]:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
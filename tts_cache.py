@@ -0,0 +1,180 @@
+"""
+On-disk, content-addressed cache of raw Text-to-Speech responses.
+
+Entries are keyed by a hash of everything that affects the synthesized audio
+(text, voice, gain, effects profile, language and encoding), so reprocessing
+existing recordings with new trimming or validation settings never has to call
+the paid API again. The cache is bounded by total size and evicts the least
+recently used entries first.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from pathlib import Path
+
+DEFAULT_CACHE_DIR = Path(".tts_cache")
+DEFAULT_MAX_BYTES = 2 * 1024 ** 3  # 2 GiB
+
+
+def make_cache_key(text, voice_name, volume_gain_db, effects_profile, language_code, audio_encoding="LINEAR16"):
+    """Return the hex digest identifying a synthesis request."""
+    payload = json.dumps(
+        [text, voice_name, float(volume_gain_db), effects_profile or "", language_code, audio_encoding],
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class TTSResponseCache:
+    """
+    Thread-safe LRU cache of raw audio bytes stored under ``cache_dir``.
+
+    Recency is tracked through file modification times, so the LRU order
+    survives across runs.
+
+    Args:
+        cache_dir: Directory holding the cache entries
+        max_bytes: Total size above which the oldest entries are evicted
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._in_flight = {}  # request key -> Future of the thread fetching it
+        self._entries = OrderedDict()  # key -> size, least recently used first
+        self._total_bytes = 0
+        self._load_index()
+
+    def _path_for(self, key):
+        return self.cache_dir / key[:2] / f"{key}.wav"
+
+    def _load_index(self):
+        if not self.cache_dir.exists():
+            return
+        entries = []
+        for path in self.cache_dir.glob("*/*.wav"):
+            try:
+                st = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((st.st_mtime_ns, path.stem, st.st_size))
+        for _, key, size in sorted(entries):
+            self._entries[key] = size
+            self._total_bytes += size
+
+    @property
+    def total_bytes(self):
+        return self._total_bytes
+
+    def __len__(self):
+        return len(self._entries)
+
+    def fetch_once(self, key, fetch):
+        """
+        Return ``fetch()``, sharing one call among threads asking for the same ``key``.
+
+        The first caller runs ``fetch()``; callers arriving while it runs wait
+        for its result (or exception) instead of calling the API again, e.g. for
+        one text under two transliterations. Requests for other keys never wait
+        on each other, so rate limiting and backoff inside ``fetch()`` only
+        delay the threads that need that response.
+        """
+        with self._lock:
+            future = self._in_flight.get(key)
+            owner = future is None
+            if owner:
+                future = self._in_flight[key] = Future()
+        if not owner:
+            return future.result()
+
+        try:
+            result = fetch()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+
+    def get(self, key):
+        """Return the cached bytes for ``key``, or None on a miss."""
+        entry = self.get_with_meta(key)
+        return None if entry is None else entry[0]
+
+    def get_with_meta(self, key):
+        """Return (bytes, meta) for ``key``, or None on a miss; ``meta`` is None if none was stored."""
+        path = self._path_for(key)
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+        try:
+            data = path.read_bytes()
+            os.utime(path)
+            meta_path = path.with_suffix(".json")
+            meta = json.loads(meta_path.read_text(encoding="utf-8")) if meta_path.exists() else None
+        except FileNotFoundError:
+            with self._lock:
+                size = self._entries.pop(key, None)
+                if size is not None:
+                    self._total_bytes -= size
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return data, meta
+
+    def put(self, key, data, meta=None):
+        """
+        Store ``data`` under ``key`` and evict old entries if over budget.
+
+        ``meta`` is an optional JSON-serializable value stored alongside, e.g.
+        the timepoints returned with a batched response.
+        """
+        path = self._path_for(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        # The metadata goes first so an entry's audio is never visible without it
+        if meta is not None:
+            _write_atomic(path.with_suffix(".json"), json.dumps(meta).encode("utf-8"))
+        _write_atomic(path, data)
+
+        with self._lock:
+            old_size = self._entries.pop(key, None)
+            if old_size is not None:
+                self._total_bytes -= old_size
+            self._entries[key] = len(data)
+            self._total_bytes += len(data)
+            self._evict_locked()
+
+    def _evict_locked(self):
+        while self._total_bytes > self.max_bytes and len(self._entries) > 1:
+            key, size = self._entries.popitem(last=False)
+            self._total_bytes -= size
+            path = self._path_for(key)
+            path.unlink(missing_ok=True)
+            path.with_suffix(".json").unlink(missing_ok=True)
+
+
+def _write_atomic(path, data):
+    """Write to a temporary file first so readers never see partial entries."""
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_name, path)
+    except BaseException:
+        Path(tmp_name).unlink(missing_ok=True)
+        raise
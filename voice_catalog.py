@@ -0,0 +1,151 @@
+"""
+On-disk cache of the TTS voice catalog.
+
+make_tree_audio.py picks the voices for each language from the API's
+list_voices() response. Calling it on every start would make startup (and
+--plan) depend on the API, so the catalog is kept in a small JSON file and
+only refreshed once it is older than a TTL. If a refresh fails, a stale
+catalog is used, and if there is none, the built-in FALLBACK_VOICES; the
+failure is cached too, so the API is only retried after FAILED_REFRESH_TTL.
+Loading without a fetch function (as --plan does) never calls the API.
+"""
+
+import json
+import os
+import re
+import time
+from pathlib import Path
+
+DEFAULT_CATALOG_PATH = Path(".tts_voice_catalog.json")
+DEFAULT_CATALOG_TTL = 7 * 24 * 3600  # seconds
+FAILED_REFRESH_TTL = 15 * 60  # seconds before a failed refresh is retried
+CATALOG_VERSION = 1
+
+# Voice families used for the recordings, in the order they are listed
+VOICE_TYPES = ("Chirp3-HD", "Wavenet")
+
+# Catalog used when the API can't be reached and nothing is cached
+FALLBACK_VOICES = {
+    "bn-IN": [
+        *(f"bn-IN-Chirp3-HD-{name}" for name in (
+            "Achernar", "Achird", "Algenib", "Algieba", "Alnilam", "Aoede", "Autonoe", "Callirrhoe", "Charon",
+            "Despina", "Enceladus", "Erinome", "Fenrir", "Gacrux", "Iapetus", "Kore", "Laomedeia", "Leda", "Orus",
+            "Puck", "Pulcherrima", "Rasalgethi", "Sadachbia", "Sadaltager", "Schedar", "Sulafat", "Umbriel",
+        )),
+        *(f"bn-IN-Wavenet-{name}" for name in "ABCD"),
+    ],
+}
+
+# Language code prefix of a voice name, e.g. "bn-IN-" or "cmn-CN-" or "es-419-"
+_LANGUAGE_PREFIX_RE = re.compile(r"^[a-z]{2,3}-(?:[A-Z]{2}|\d{3})-")
+
+
+def split_voice_name(voice_name):
+    """Split 'bn-IN-Chirp3-HD-Aoede' into ('bn-IN', 'Chirp3-HD-Aoede'); ('', name) without a prefix."""
+    match = _LANGUAGE_PREFIX_RE.match(voice_name)
+    if match is None:
+        return "", voice_name
+    return voice_name[:match.end() - 1], voice_name[match.end():]
+
+
+def voice_type(voice_name):
+    """Return the VOICE_TYPES family of ``voice_name`` (e.g. 'Wavenet'), or None."""
+    _, rest = split_voice_name(voice_name)
+    for family in VOICE_TYPES:
+        if rest.startswith(f"{family}-"):
+            return family
+    return None
+
+
+def fetch_voice_catalog(client):
+    """
+    Call list_voices() on a TextToSpeechClient.
+
+    Returns:
+        {language_code: [voice name, ...]} for every voice the API lists
+    """
+    response = client.list_voices(request={})
+    catalog = {}
+    for voice in response.voices:
+        for language_code in voice.language_codes:
+            catalog.setdefault(language_code, []).append(voice.name)
+    return {language_code: sorted(names) for language_code, names in sorted(catalog.items())}
+
+
+class VoiceCatalog:
+    """
+    Voice names per language code, loaded from the cache file or the API.
+
+    Args:
+        path: Location of the cached catalog
+        ttl: Seconds after which the cached catalog is refreshed
+    """
+
+    def __init__(self, path=DEFAULT_CATALOG_PATH, ttl=DEFAULT_CATALOG_TTL):
+        self.path = Path(path)
+        self.ttl = ttl
+        self.voices = {}
+        self.fetched_at = None
+        self.source = None  # "cache", "api", "stale cache" or "fallback"
+        self.error = None  # why a refresh failed, if it did
+
+    def load(self, fetch=None, refresh=False):
+        """
+        Fill the catalog, calling ``fetch()`` (e.g. lambda: fetch_voice_catalog(client))
+        only if the cached copy is missing, expired or ``refresh`` is set, and
+        no refresh failed within the last FAILED_REFRESH_TTL seconds.
+
+        Returns:
+            self
+        """
+        now = time.time()
+        cached = self._read()
+        if cached is not None:
+            self.voices = cached["voices"]
+            self.fetched_at = cached["fetched_at"]
+            if self.fetched_at is not None and now - self.fetched_at < self.ttl:
+                self.source = "cache"
+            else:
+                self.source = "stale cache" if self.fetched_at is not None else "fallback"
+                if cached.get("failed_at") is not None and now - cached["failed_at"] < FAILED_REFRESH_TTL:
+                    fetch = fetch if refresh else None
+        else:
+            self.voices, self.source = FALLBACK_VOICES, "fallback"
+
+        if fetch is None or (self.source == "cache" and not refresh):
+            return self
+
+        try:
+            voices = fetch()
+        except Exception as e:
+            # Keep what we have, and remember the failure so the next runs don't retry at once
+            self.error = str(e)
+            self._write(failed_at=now)
+        else:
+            self.voices, self.fetched_at, self.source, self.error = voices, now, "api", None
+            self._write()
+        return self
+
+    def voices_for(self, language_code, voice_types=VOICE_TYPES):
+        """Return the voices for ``language_code`` in ``voice_types``, grouped by type, each sorted."""
+        names = self.voices.get(language_code, [])
+        return [name for family in voice_types for name in sorted(names) if voice_type(name) == family]
+
+    def _read(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                cached = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        if cached.get("version") != CATALOG_VERSION:
+            return None
+        return cached
+
+    def _write(self, failed_at=None):
+        catalog = {"version": CATALOG_VERSION, "fetched_at": self.fetched_at, "voices": self.voices}
+        if failed_at is not None:
+            catalog.update(failed_at=failed_at, error=self.error)
+        tmp_path = self.path.with_name(f".{self.path.name}.{os.getpid()}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(catalog, f, indent=2)
+        os.replace(tmp_path, self.path)
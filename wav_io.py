@@ -0,0 +1,181 @@
+"""
+Minimal WAV (RIFF) helpers that work from the header alone.
+
+These let the audio tools get the duration and format of a file, and spot
+truncated or header-only files, without decoding any samples.
+"""
+
+import struct
+
+WAVE_FORMAT_PCM = 0x0001
+WAVE_FORMAT_IEEE_FLOAT = 0x0003
+WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+# Size of the canonical header written by write_pcm16_atomic
+PCM16_HEADER_SIZE = 44
+
+# Enough for the RIFF, fmt and any LIST/fact chunks that precede the data chunk
+HEADER_READ_SIZE = 4096
+
+
+def parse_wav_header(buf):
+    """
+    Parse the RIFF header at the start of ``buf``.
+
+    Args:
+        buf: Bytes-like object holding at least the start of a WAV file
+
+    Returns:
+        dict with keys: format_tag, channels, sample_rate, bits_per_sample,
+        block_align, data_offset, data_size, frames, duration
+
+    Raises:
+        ValueError: If ``buf`` does not start with a usable WAV header
+    """
+    buf = memoryview(buf)
+    if len(buf) < 12 or bytes(buf[0:4]) != b"RIFF" or bytes(buf[8:12]) != b"WAVE":
+        raise ValueError("Not a RIFF/WAVE file")
+
+    fmt = None
+    pos = 12
+    while pos + 8 <= len(buf):
+        chunk_id = bytes(buf[pos:pos + 4])
+        (chunk_size,) = struct.unpack_from("<I", buf, pos + 4)
+        body = pos + 8
+
+        if chunk_id == b"fmt ":
+            if body + 16 > len(buf):
+                raise ValueError("Truncated fmt chunk")
+            format_tag, channels, sample_rate, _, block_align, bits = struct.unpack_from("<HHIIHH", buf, body)
+            if format_tag == WAVE_FORMAT_EXTENSIBLE and chunk_size >= 40 and body + 26 <= len(buf):
+                # The real format is the first two bytes of the SubFormat GUID
+                (format_tag,) = struct.unpack_from("<H", buf, body + 24)
+            fmt = {
+                "format_tag": format_tag,
+                "channels": channels,
+                "sample_rate": sample_rate,
+                "bits_per_sample": bits,
+                "block_align": block_align,
+            }
+        elif chunk_id == b"data":
+            if fmt is None:
+                raise ValueError("data chunk before fmt chunk")
+            if fmt["block_align"] == 0 or fmt["sample_rate"] == 0:
+                raise ValueError("Invalid fmt chunk")
+            frames = chunk_size // fmt["block_align"]
+            return {
+                **fmt,
+                "data_offset": body,
+                "data_size": chunk_size,
+                "frames": frames,
+                "duration": frames / fmt["sample_rate"],
+            }
+
+        # Chunks are word-aligned
+        pos = body + chunk_size + (chunk_size & 1)
+
+    raise ValueError("No data chunk found in header")
+
+
+def read_wav_header(file_path):
+    """Read and parse the header of the WAV file at ``file_path`` (see parse_wav_header)."""
+    with open(file_path, "rb") as f:
+        return parse_wav_header(f.read(HEADER_READ_SIZE))
+
+
+def iter_pcm16_blocks(file_path, header, block_frames=65536):
+    """
+    Yield the int16 samples of a PCM WAV file in blocks of ``block_frames`` frames.
+
+    Memory use is bounded by the block size regardless of the file length.
+    """
+    import numpy as np
+
+    samples_per_block = block_frames * header["channels"]
+    remaining = header["data_size"] // 2
+    with open(file_path, "rb") as f:
+        f.seek(header["data_offset"])
+        while remaining > 0:
+            block = np.fromfile(f, dtype="<i2", count=min(samples_per_block, remaining))
+            if block.size == 0:
+                break
+            remaining -= block.size
+            yield block
+
+
+def pcm16_from_bytes(buf):
+    """
+    View the samples of an in-memory 16-bit PCM WAV without copying them.
+
+    Args:
+        buf: Bytes of a complete WAV file (e.g. a LINEAR16 TTS response)
+
+    Returns:
+        (sample_rate, samples): ``samples`` is a read-only int16 array backed by
+        ``buf``, shape (frames,) for mono or (frames, channels) otherwise
+
+    Raises:
+        ValueError: If ``buf`` is not 16-bit PCM WAV
+    """
+    import numpy as np
+
+    header = parse_wav_header(buf)
+    if header["format_tag"] != WAVE_FORMAT_PCM or header["bits_per_sample"] != 16:
+        raise ValueError(
+            f"Expected 16-bit PCM, got format {header['format_tag']:#06x} at {header['bits_per_sample']} bits"
+        )
+
+    # Streaming encoders may declare a placeholder data size; trust the buffer
+    available = len(buf) - header["data_offset"]
+    data_size = min(header["data_size"], available)
+    frames = data_size // header["block_align"]
+    samples = np.frombuffer(buf, dtype="<i2", count=frames * header["channels"], offset=header["data_offset"])
+    if header["channels"] > 1:
+        samples = samples.reshape(frames, header["channels"])
+    return header["sample_rate"], samples
+
+
+def pcm16_header(sample_rate, channels, frames):
+    """Return a canonical 44-byte header for a 16-bit PCM WAV file."""
+    block_align = channels * 2
+    data_size = frames * block_align
+    return struct.pack(
+        "<4sI4s4sIHHIIHH4sI",
+        b"RIFF", 36 + data_size, b"WAVE",
+        b"fmt ", 16, WAVE_FORMAT_PCM, channels, sample_rate, sample_rate * block_align, block_align, 16,
+        b"data", data_size,
+    )
+
+
+def write_pcm16_atomic(file_path, samples, sample_rate):
+    """
+    Write int16 ``samples`` as a WAV file in one pass, atomically.
+
+    The file is written next to its destination under a temporary name and
+    renamed into place, so readers (and crashed runs) never see a partial file.
+
+    Returns:
+        Size of the written file in bytes
+    """
+    import os
+    import threading
+    from pathlib import Path
+
+    import numpy as np
+
+    samples = np.ascontiguousarray(samples, dtype="<i2")
+    channels = 1 if samples.ndim == 1 else samples.shape[1]
+    header = pcm16_header(sample_rate, channels, samples.shape[0])
+
+    # A per-thread temporary name (created with the normal umask) in the same directory
+    file_path = Path(file_path)
+    tmp_name = file_path.parent / f".{file_path.name}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp_name, "wb") as f:
+            f.write(header)
+            f.write(memoryview(samples).cast("B"))
+        os.replace(tmp_name, file_path)
+    except BaseException:
+        Path(tmp_name).unlink(missing_ok=True)
+        raise
+    return len(header) + samples.nbytes